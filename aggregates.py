@@ -0,0 +1,187 @@
+"""
+Running emissions aggregates for YourCarbonFootprint application.
+Keeps the totals behind the emissions summary up to date as entries change.
+"""
+
+import json
+import math
+import os
+from schema import apply_schema
+from storage import _atomic_write
+
+
+class RunningAggregates:
+    """
+    Emission totals maintained incrementally.
+
+    Holds the overall total plus a [sum, row count] pair per scope, per
+    category and per (month, scope). Adding or removing rows only touches
+    the groups those rows belong to, so the cost depends on the size of the
+    change, not of the dataset. Groups whose row count drops to zero are
+    removed, matching what a groupby over the remaining rows would return.
+    """
+
+    GROUPS = ('scope', 'category', 'month_scope')
+
+    def __init__(self):
+        """Initialize empty aggregates."""
+        self.total = 0.0
+        self.rows = 0
+        self.groups = {name: {} for name in self.GROUPS}
+        self.version = None
+        self.storage = None
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Build aggregates from scratch.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+
+        Returns:
+            RunningAggregates: Aggregates of data
+        """
+        aggregates = cls()
+        aggregates.add_rows(data)
+        return aggregates
+
+    def add_rows(self, rows):
+        """
+        Include rows in the aggregates.
+
+        Args:
+            rows (pandas.DataFrame): Emissions rows added to the data
+        """
+        self._apply(rows, 1)
+
+    def remove_rows(self, rows):
+        """
+        Take rows out of the aggregates.
+
+        Args:
+            rows (pandas.DataFrame): Emissions rows deleted from the data
+        """
+        self._apply(rows, -1)
+
+    def _apply(self, rows, sign):
+        """Add (sign 1) or subtract (sign -1) the rows' emissions per group."""
+        if len(rows) == 0:
+            return
+        rows = apply_schema(rows)
+        # Missing emissions count as rows but add nothing, like a pandas sum
+        emissions = rows['emissions_kgCO2e'].fillna(0.0)
+        self.total += sign * float(emissions.sum())
+        self.rows += sign * len(rows)
+
+        months = rows['date'].dt.strftime('%Y-%m')
+        keys = {
+            'scope': [rows['scope']],
+            'category': [rows['category']],
+            'month_scope': [months, rows['scope']],
+        }
+        for name, by in keys.items():
+            grouped = emissions.groupby(by, observed=True)
+            sums = grouped.sum()
+            target = self.groups[name]
+            for key, value, count in zip(sums.index, sums.tolist(), grouped.size().tolist()):
+                entry = target.setdefault(key, [0.0, 0])
+                entry[0] += sign * value
+                entry[1] += sign * count
+                if entry[1] <= 0:
+                    del target[key]
+
+    def summary(self):
+        """
+        Get the summary in the same shape as DataHandler.get_emissions_summary.
+
+        Returns:
+            dict: total_emissions, scope_breakdown, category_breakdown and time_series
+        """
+        time_series = {}
+        for (month, scope), (value, _) in sorted(self.groups['month_scope'].items()):
+            time_series.setdefault(month, {})[scope] = value
+        return {
+            "total_emissions": self.total,
+            "scope_breakdown": {key: value for key, (value, _) in self.groups['scope'].items()},
+            "category_breakdown": {key: value for key, (value, _) in self.groups['category'].items()},
+            "time_series": time_series
+        }
+
+    def verify(self, data):
+        """
+        Compare against aggregates rebuilt from the data.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+
+        Returns:
+            list: Descriptions of mismatches; empty if the aggregates are consistent
+        """
+        expected = RunningAggregates.from_data(data)
+        mismatches = []
+        if self.rows != expected.rows:
+            mismatches.append(f"rows: {self.rows} != {expected.rows}")
+        if not math.isclose(self.total, expected.total, rel_tol=1e-9, abs_tol=1e-6):
+            mismatches.append(f"total: {self.total} != {expected.total}")
+        for name in self.GROUPS:
+            ours, theirs = self.groups[name], expected.groups[name]
+            for key in set(ours) | set(theirs):
+                value, count = ours.get(key, [0.0, 0])
+                expected_value, expected_count = theirs.get(key, [0.0, 0])
+                if count != expected_count or not math.isclose(value, expected_value, rel_tol=1e-9, abs_tol=1e-6):
+                    mismatches.append(f"{name} {key}: {value} ({count} rows) != {expected_value} ({expected_count} rows)")
+        return mismatches
+
+    def save(self, path, version, storage):
+        """
+        Write the aggregates to disk, stamped with the data version they match.
+
+        Args:
+            path (str): Path to the aggregates file
+            version (int): Data version the aggregates reflect
+            storage (str): Name of the storage backend the data lives in
+        """
+        self.version = version
+        self.storage = storage
+        content = {
+            "version": version,
+            "storage": storage,
+            "total": self.total,
+            "rows": self.rows,
+            "scope": self.groups['scope'],
+            "category": self.groups['category'],
+            "month_scope": [[month, scope, value, count]
+                            for (month, scope), (value, count) in self.groups['month_scope'].items()],
+        }
+        _atomic_write(path, json.dumps(content).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read aggregates written by save().
+
+        Args:
+            path (str): Path to the aggregates file
+
+        Returns:
+            RunningAggregates: Aggregates, or None if the file is missing or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                content = json.load(f)
+        except json.JSONDecodeError:
+            return None
+        aggregates = cls()
+        aggregates.version = content['version']
+        aggregates.storage = content['storage']
+        aggregates.total = content['total']
+        aggregates.rows = content['rows']
+        aggregates.groups['scope'] = content['scope']
+        aggregates.groups['category'] = content['category']
+        aggregates.groups['month_scope'] = {
+            (month, scope): [value, count] for month, scope, value, count in content['month_scope']
+        }
+        return aggregates
@@ -0,0 +1,100 @@
+"""
+Period-over-period analytics for YourCarbonFootprint application.
+Year-over-year and period-on-period changes, rolling and year-to-date totals.
+"""
+
+import numpy as np
+import pandas as pd
+from periods import period_labels, period_range, periods_per_year, to_periods, year_of
+
+VALUE_COLUMN = 'emissions_kgCO2e'
+
+ANALYTICS_COLUMNS = [
+    'emissions_kgCO2e', 'change', 'change_pct', 'yoy_change', 'yoy_pct',
+    'rolling_total', 'year_to_date'
+]
+
+
+def period_matrix(data, granularity='month', by=None):
+    """
+    Sum emissions into a groups x periods matrix.
+
+    Columns form a complete PeriodIndex from the first to the last period
+    in the data, so periods without entries are 0 rather than missing and
+    shifting by n columns always means n periods back.
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+        granularity (str, optional): A key of periods.PERIOD_FREQUENCIES
+        by (list, optional): Columns to group by, e.g. ['facility', 'category']
+
+    Returns:
+        pandas.DataFrame: One row per group (a single 'All' row without by),
+            one column per period
+    """
+    by = list(by or [])
+    periods = to_periods(data['date'], granularity).rename('period')
+    keys = [data[col] for col in by] if by else [pd.Series('All', index=data.index, name='group')]
+    totals = data[VALUE_COLUMN].fillna(0.0).groupby(keys + [periods], observed=True).sum()
+    matrix = totals.unstack('period', fill_value=0.0)
+    matrix = matrix.reindex(columns=period_range(matrix.columns, granularity), fill_value=0.0)
+    return matrix.rename_axis(columns='period')
+
+
+def _percent_change(current, previous):
+    """Percentage change; NaN where the previous value is 0 or missing."""
+    return (current - previous) / previous.where(previous != 0) * 100
+
+
+def period_over_period(data, granularity='month', by=None, year_basis='fiscal', window=None):
+    """
+    Compute period-over-period analytics for every group at once.
+
+    All measures are column operations on the period_matrix, so the cost
+    is a few vectorized passes regardless of the number of groups.
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+        granularity (str, optional): 'month', 'quarter', 'fiscal_quarter',
+            'calendar_year' or 'fiscal_year'
+        by (list, optional): Columns to group by, e.g. ['facility', 'category']
+        year_basis (str, optional): "fiscal" (July - June) or "calendar" year
+            for the year-to-date totals
+        window (int, optional): Periods in the rolling total; defaults to one
+            year (12 months, 4 quarters)
+
+    Returns:
+        pandas.DataFrame: One row per group and period with the by columns,
+            period (pandas Period), period_label and ANALYTICS_COLUMNS:
+            change / change_pct against the previous period, yoy_change /
+            yoy_pct against the same period a year earlier, rolling_total
+            over the window (NaN until the window is full) and year_to_date
+    """
+    by = list(by or [])
+    matrix = period_matrix(data, granularity, by)
+    if matrix.shape[1] == 0:
+        return pd.DataFrame(columns=by + ['period', 'period_label'] + ANALYTICS_COLUMNS)
+
+    year_length = periods_per_year(granularity)
+    window = window or year_length
+    previous = matrix.shift(1, axis=1)
+    year_ago = matrix.shift(year_length, axis=1)
+    measures = {
+        'emissions_kgCO2e': matrix,
+        'change': matrix - previous,
+        'change_pct': _percent_change(matrix, previous),
+        'yoy_change': matrix - year_ago,
+        'yoy_pct': _percent_change(matrix, year_ago),
+        'rolling_total': matrix.T.rolling(window, min_periods=window).sum().T,
+        'year_to_date': matrix.T.groupby(year_of(matrix.columns, year_basis)).cumsum().T,
+    }
+
+    # Long format: one row per (group, period), groups in the outer order
+    groups, periods = matrix.shape
+    result = matrix.index.to_frame(index=False).iloc[np.repeat(np.arange(groups), periods)]
+    result = result.reset_index(drop=True)
+    result['period'] = np.tile(matrix.columns, groups)
+    result['period_label'] = np.tile(np.asarray(period_labels(matrix.columns)), groups)
+    for name, frame in measures.items():
+        result[name] = frame.to_numpy().ravel()
+    return result[by + ['period', 'period_label'] + ANALYTICS_COLUMNS]
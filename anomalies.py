@@ -0,0 +1,151 @@
+"""
+Anomaly detection for YourCarbonFootprint application.
+Flags emission entries far from the usual values of their facility and activity.
+"""
+
+import numpy as np
+import pandas as pd
+from config import ANOMALY_MIN_POINTS, ANOMALY_Z_THRESHOLD
+from data_generator import get_bangladesh_season
+
+SERIES_KEYS = ['facility', 'activity']
+VALUE_COLUMN = 'emissions_kgCO2e'
+
+# Month number (1-12) to Bangladesh season, evaluated once for vectorized lookups
+SEASON_BY_MONTH = np.array([''] + [get_bangladesh_season(month) for month in range(1, 13)], dtype=object)
+
+# Scales the MAD (and the mean absolute deviation) to a standard deviation
+MAD_SCALE = 0.6745
+MEAN_AD_SCALE = 1.253314
+
+
+def _text(data, column):
+    """A text column as plain strings; '' where missing, or for every row if data has no such column."""
+    if column not in data.columns:
+        return pd.Series('', index=data.index, dtype=object)
+    values = data[column].astype(object)
+    return values.where(values.notna(), '').astype(str)
+
+
+def _prepare(data):
+    """Get the series keys, season and value of each row as plain columns."""
+    dates = pd.to_datetime(data['date'], errors='coerce')
+    months = dates.dt.month.fillna(0).astype(int).to_numpy()
+    return pd.DataFrame({
+        'facility': _text(data, 'facility'),
+        'activity': _text(data, 'activity'),
+        'season': SEASON_BY_MONTH[months],
+        'value': pd.to_numeric(data[VALUE_COLUMN], errors='coerce'),
+    }, index=data.index)
+
+
+def _baselines(history, keys):
+    """
+    Get the robust centre and spread of each series.
+
+    Returns:
+        pandas.DataFrame: Indexed by keys, with median, mad, mean_ad and count columns
+    """
+    history = history[history['value'].notna()]
+    grouped = history.groupby(keys)['value']
+    deviation = (history['value'] - grouped.transform('median')).abs()
+    stats = grouped.agg(['median', 'count'])
+    deviation_groups = deviation.groupby([history[key] for key in keys])
+    stats['mad'] = deviation_groups.median()
+    stats['mean_ad'] = deviation_groups.mean()
+    return stats
+
+
+def _robust_z(values, stats):
+    """Modified z-score against a baseline; NaN where the series does not vary."""
+    mad_z = MAD_SCALE * (values - stats['median']) / stats['mad'].where(stats['mad'] > 0)
+    mean_ad_z = (values - stats['median']) / (MEAN_AD_SCALE * stats['mean_ad'].where(stats['mean_ad'] > 0))
+    return mad_z.fillna(mean_ad_z)
+
+
+def score_anomalies(rows, history=None, min_points=ANOMALY_MIN_POINTS):
+    """
+    Score rows against the usual emissions of their facility and activity.
+
+    Each facility x activity series gets a seasonal baseline (its median
+    in the same Bangladesh season, see data_generator.get_bangladesh_season)
+    when it has at least min_points entries in that season, and otherwise
+    its all-year median. The score is the modified z-score
+    0.6745 * (value - median) / MAD, so a few outliers in the history do
+    not hide new ones. All series are scored together with grouped
+    aggregations and joins.
+
+    Args:
+        rows (pandas.DataFrame): Entries to score, with date, activity and
+            emissions_kgCO2e columns, and facility if known (rows without
+            one form a series per activity)
+        history (pandas.DataFrame, optional): Entries the baselines are
+            taken from; defaults to rows themselves
+        min_points (int, optional): Entries a series needs to be scored
+
+    Returns:
+        pandas.DataFrame: Indexed like rows, with season, seasonal (whether
+            the baseline is the season's), baseline, robust_z and ratio
+            (value / baseline) columns; NaN where a series has too few
+            entries or does not vary
+    """
+    prepared = _prepare(rows)
+    past = prepared if history is None else _prepare(history)
+    values = prepared['value']
+
+    seasonal = _baselines(past, SERIES_KEYS + ['season'])
+    overall = _baselines(past, SERIES_KEYS)
+    seasonal = seasonal[seasonal['count'] >= min_points]
+    overall = overall[overall['count'] >= min_points]
+
+    stat_columns = ['median', 'mad', 'mean_ad']
+    seasonal_stats = prepared.join(seasonal[stat_columns], on=SERIES_KEYS + ['season'])[stat_columns]
+    overall_stats = prepared.join(overall[stat_columns], on=SERIES_KEYS)[stat_columns]
+    use_seasonal = seasonal_stats['median'].notna()
+    stats = seasonal_stats.where(use_seasonal, overall_stats, axis=0).astype(float)
+
+    return pd.DataFrame({
+        'season': prepared['season'],
+        'seasonal': use_seasonal,
+        'baseline': stats['median'],
+        'robust_z': _robust_z(values, stats),
+        'ratio': values / stats['median'].where(stats['median'] != 0),
+    }, index=rows.index)
+
+
+def detect_anomalies(rows, history=None, threshold=ANOMALY_Z_THRESHOLD, min_points=ANOMALY_MIN_POINTS):
+    """
+    Get the rows whose emissions are unusual for their series.
+
+    Args:
+        rows (pandas.DataFrame): Entries to check
+        history (pandas.DataFrame, optional): Entries the baselines are
+            taken from; defaults to rows themselves
+        threshold (float, optional): Absolute robust z-score above which a row is flagged
+        min_points (int, optional): Entries a series needs to be scored
+
+    Returns:
+        pandas.DataFrame: The flagged rows with the score_anomalies columns
+            added, most extreme first
+    """
+    scores = score_anomalies(rows, history, min_points)
+    flagged = scores['robust_z'].abs() > threshold
+    result = rows.loc[flagged].join(scores.loc[flagged])
+    return result.reindex(result['robust_z'].abs().sort_values(ascending=False).index)
+
+
+def describe_anomaly(row):
+    """
+    Describe a flagged row for users.
+
+    Args:
+        row (pandas.Series): A row returned by detect_anomalies
+
+    Returns:
+        str: E.g. "Bangladesh Grid at Dhaka Factory: 10.2x the usual monsoon value"
+    """
+    ratio = f"{row['ratio']:.1f}x" if pd.notna(row['ratio']) else "far from"
+    facility = row.get('facility')
+    facility = f" at {facility}" if pd.notna(facility) and str(facility) else ""
+    usual = f"usual {row['season']}" if row['seasonal'] else "usual"
+    return f"{row['activity']}{facility}: {ratio} the {usual} value"
@@ -10,6 +10,13 @@ import plotly.graph_objects as go
 from dotenv import load_dotenv
 import base64
 from io import BytesIO
+from data_store import SharedEmissionsStore
+from anomalies import describe_anomaly
+from cube import EmissionsCube
+from periods import resample_frame
+from factor_registry import FACTOR_REGISTRY
+from factor_search import FACTOR_SEARCH_INDEX
+from units import compatible_units, conversion_factor
 
 # Load environment variables
 load_dotenv()
@@ -20,63 +27,31 @@ os.makedirs('data', exist_ok=True)
 # Set page config for wide layout
 st.set_page_config(page_title="YourCarbonFootprint Bangladesh", page_icon="🇧🇩", layout="wide")
 
+@st.cache_resource
+def get_data_store():
+    """Create the emissions data store shared by every session on this server."""
+    return SharedEmissionsStore()
+
 # Initialize session state variables if they don't exist
 if 'language' not in st.session_state:
     st.session_state.language = 'English'
-if 'emissions_data' not in st.session_state:
-    # Load data if exists, otherwise create empty dataframe
-    if os.path.exists('data/emissions.json'):
-        try:
-            with open('data/emissions.json', 'r') as f:
-                data = f.read().strip()
-                if data:  # Check if file is not empty
-                    try:
-                        st.session_state.emissions_data = pd.DataFrame(json.loads(data))
-                    except json.JSONDecodeError:
-                        # Create a backup of the corrupted file
-                        backup_file = f'data/emissions_backup_{int(time.time())}.json'
-                        shutil.copy('data/emissions.json', backup_file)
-                        st.warning(f"Corrupted emissions data file found. A backup has been created at {backup_file}")
-                        # Create empty dataframe
-                        st.session_state.emissions_data = pd.DataFrame(columns=[
-                            'date', 'scope', 'category', 'activity', 'quantity', 
-                            'unit', 'emission_factor', 'emissions_kgCO2e', 'notes',
-                            'business_unit', 'project', 'country', 'facility', 
-                            'responsible_person', 'data_quality', 'verification_status'
-                        ])
-                else:
-                    # Empty file, create new DataFrame
-                    st.session_state.emissions_data = pd.DataFrame(columns=[
-                        'date', 'scope', 'category', 'activity', 'quantity', 
-                        'unit', 'emission_factor', 'emissions_kgCO2e', 'notes',
-                        'business_unit', 'project', 'country', 'facility', 
-                        'responsible_person', 'data_quality', 'verification_status'
-                    ])
-        except Exception as e:
-            st.error(f"Error loading emissions data: {str(e)}")
-            # Create empty dataframe if loading fails
-            st.session_state.emissions_data = pd.DataFrame(columns=[
-                'date', 'scope', 'category', 'activity', 'quantity', 
-                'unit', 'emission_factor', 'emissions_kgCO2e', 'notes',
-                'business_unit', 'project', 'country', 'facility', 
-                'responsible_person', 'data_quality', 'verification_status'
-            ])
-            # Make sure data directory exists
-            os.makedirs('data', exist_ok=True)
-    else:
-        st.session_state.emissions_data = pd.DataFrame(columns=[
-            'date', 'scope', 'category', 'activity', 'quantity', 
-            'unit', 'emission_factor', 'emissions_kgCO2e', 'notes',
-            'business_unit', 'project', 'country', 'facility', 
-            'responsible_person', 'data_quality', 'verification_status'
-        ])
-        # Make sure data directory exists
-        os.makedirs('data', exist_ok=True)
+if 'data_store' not in st.session_state:
+    # Sessions share one store per process and only keep a reference to it
+    try:
+        st.session_state.data_store = get_data_store()
+    except Exception as e:
+        st.error(f"Error loading emissions data: {str(e)}")
+        st.stop()
+    if st.session_state.data_store.load_warning:
+        st.warning(st.session_state.data_store.load_warning)
 if 'theme' not in st.session_state:
     st.session_state.theme = 'dark'
 if 'active_page' not in st.session_state:
     st.session_state.active_page = "AI Insights"
 
+# Current shared data for this run; read-only, changes go through the store
+emissions_version, emissions_data = st.session_state.data_store.snapshot()
+
 # Translation dictionary (English and Bengali)
 translations = {
     'English': {
@@ -167,124 +142,17 @@ translations = {
     }
 }
 
-# Bangladesh-specific emission factors (in kgCO2e per unit)
-BANGLADESH_EMISSION_FACTORS = {
-    # Scope 1 - Direct emissions
-    "Stationary Combustion": {
-        "Natural Gas": {"factor": 0.18316, "unit": "kWh"},
-        "Diesel": {"factor": 2.68787, "unit": "liter"},
-        "Furnace Oil": {"factor": 3.15123, "unit": "liter"},
-        "Coal": {"factor": 2.42287, "unit": "kg"},
-        "Biomass": {"factor": 0.0, "unit": "kg"},  # Considered carbon neutral
-    },
-    "Mobile Combustion": {
-        "Petrol/Gasoline": {"factor": 2.31495, "unit": "liter"},
-        "Diesel": {"factor": 2.70553, "unit": "liter"},
-        "CNG": {"factor": 2.53721, "unit": "kg"},
-        "LPG": {"factor": 1.55537, "unit": "liter"},
-    },
-    "Refrigerants": {
-        "R-410A": {"factor": 2088.0, "unit": "kg"},
-        "R-134a": {"factor": 1430.0, "unit": "kg"},
-        "R-404A": {"factor": 3922.0, "unit": "kg"},
-        "R-407C": {"factor": 1774.0, "unit": "kg"},
-    },
-    
-    # Scope 2 - Indirect emissions from purchased energy
-    "Electricity": {
-        "Bangladesh Grid": {"factor": 0.6815, "unit": "kWh"},  # Based on Bangladesh's electricity grid mix
-        "Solar Power": {"factor": 0.041, "unit": "kWh"},
-        "Hydropower": {"factor": 0.024, "unit": "kWh"},
-        "Wind Power": {"factor": 0.011, "unit": "kWh"},
-    },
-    "Steam": {
-        "Purchased Steam": {"factor": 0.19, "unit": "kg"},
-    },
-    
-    # Scope 3 - Other indirect emissions
-    "Business Travel": {
-        "Domestic Flight": {"factor": 0.15298, "unit": "passenger-km"},
-        "International Flight": {"factor": 0.19085, "unit": "passenger-km"},
-        "Train": {"factor": 0.03694, "unit": "passenger-km"},
-        "Bus": {"factor": 0.10471, "unit": "passenger-km"},
-        "Rickshaw (CNG)": {"factor": 0.08545, "unit": "km"},
-        "Taxi": {"factor": 0.14549, "unit": "km"},
-    },
-    "Employee Commuting": {
-        "Car (Petrol)": {"factor": 0.17336, "unit": "km"},
-        "Car (Diesel)": {"factor": 0.16844, "unit": "km"},
-        "Motorcycle": {"factor": 0.11501, "unit": "km"},
-        "Bus": {"factor": 0.10471, "unit": "passenger-km"},
-        "Rickshaw (CNG)": {"factor": 0.08545, "unit": "passenger-km"},
-        "Train": {"factor": 0.03694, "unit": "passenger-km"},
-    },
-    "Waste": {
-        "Landfill": {"factor": 0.45727, "unit": "kg"},
-        "Recycling": {"factor": 0.01042, "unit": "kg"},
-        "Composting": {"factor": 0.01042, "unit": "kg"},
-        "Incineration": {"factor": 0.01613, "unit": "kg"},
-    },
-    "Water": {
-        "Water Supply": {"factor": 0.298, "unit": "cubic meter"},  # Adjusted for Bangladesh
-        "Water Treatment": {"factor": 0.615, "unit": "cubic meter"},
-    },
-    "Purchased Goods & Services": {
-        "Jute Products": {"factor": 0.82, "unit": "kg"},  # Bangladesh-specific
-        "Cotton Textiles": {"factor": 5.89, "unit": "kg"},
-        "Leather Products": {"factor": 17.0, "unit": "kg"},
-        "Paper": {"factor": 0.919, "unit": "kg"},
-        "Plastic": {"factor": 3.14, "unit": "kg"},
-        "Steel": {"factor": 2.58, "unit": "kg"},
-        "Cement": {"factor": 0.82, "unit": "kg"},
-        "Rice": {"factor": 2.7, "unit": "kg"},  # Important staple food
-        "Fish": {"factor": 5.4, "unit": "kg"},  # Major protein source
-    },
-}
-
 # Function to get translated text
 def t(key):
     lang = st.session_state.language
     return translations.get(lang, {}).get(key, key)
 
-# Function to save emissions data
-def save_emissions_data():
-    try:
-        # Create data directory if it doesn't exist
-        os.makedirs('data', exist_ok=True)
-        
-        # Create a backup of the existing file if it exists
-        if os.path.exists('data/emissions.json'):
-            backup_path = 'data/emissions_backup.json'
-            try:
-                with open('data/emissions.json', 'r') as src, open(backup_path, 'w') as dst:
-                    dst.write(src.read())
-            except Exception:
-                # Continue even if backup fails
-                pass
-        
-        # Save data to JSON file with proper formatting
-        with open('data/emissions.json', 'w') as f:
-            if len(st.session_state.emissions_data) > 0:
-                json.dump(st.session_state.emissions_data.to_dict('records'), f, indent=2)
-            else:
-                # Write empty array if no data
-                f.write('[]')
-                
-        return True
-    except Exception as e:
-        st.error(f"Error saving data: {str(e)}")
-        return False
-
 # Function to add new emission entry
 def add_emission_entry(date, business_unit, project, scope, category, activity, country, facility, responsible_person, quantity, unit, emission_factor, data_quality, verification_status, notes):
     """Add a new emission entry to the emissions data."""
     try:
-        # Calculate emissions
-        emissions_kgCO2e = float(quantity) * float(emission_factor)
-        
-        # Create new entry
-        new_entry = pd.DataFrame([{
-            'date': date.strftime('%Y-%m-%d'),
+        results = st.session_state.data_store.add_entries([{
+            'date': date,
             'business_unit': business_unit,
             'project': project,
             'scope': scope,
@@ -293,36 +161,30 @@ def add_emission_entry(date, business_unit, project, scope, category, activity,
             'country': country,
             'facility': facility,
             'responsible_person': responsible_person,
-            'quantity': float(quantity),
+            'quantity': quantity,
             'unit': unit,
-            'emission_factor': float(emission_factor),
-            'emissions_kgCO2e': emissions_kgCO2e,
+            'emission_factor': emission_factor,
             'data_quality': data_quality,
             'verification_status': verification_status,
             'notes': notes
         }])
+        success, message = results[0]
+        if not success:
+            st.error(f"Error adding entry: {message}")
+            return False
         
-        # Add to existing data
-        st.session_state.emissions_data = pd.concat([st.session_state.emissions_data, new_entry], ignore_index=True)
-        
-        # Save data and return success/failure
-        return save_emissions_data()
+        return True
     except Exception as e:
         st.error(f"Error adding entry: {str(e)}")
         return False
 
-def delete_emission_entry(index):
+def delete_emission_entry(index, expected_version=None):
     try:
-        # Make a copy of the current data
-        if len(st.session_state.emissions_data) > index:
-            # Drop the row at the specified index
-            st.session_state.emissions_data = st.session_state.emissions_data.drop(index).reset_index(drop=True)
-            
-            # Save data and return success/failure
-            return save_emissions_data()
-        else:
-            st.error("Invalid index for deletion")
-            return False
+        # Refused if another user changed the data since the table was shown
+        success, message = st.session_state.data_store.delete_entry(index, expected_version)
+        if not success:
+            st.error(message)
+        return success
     except Exception as e:
         st.error(f"Error deleting entry: {str(e)}")
         return False
@@ -340,49 +202,26 @@ def process_csv(uploaded_file):
             st.error(f"CSV must contain all required columns: {', '.join(required_columns)}")
             return False
         
-        # Validate data types
-        try:
-            # Convert quantity and emission_factor to float
-            df['quantity'] = df['quantity'].astype(float)
-            df['emission_factor'] = df['emission_factor'].astype(float)
-            
-            # Validate dates
-            df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-        except Exception as e:
-            st.error(f"Data validation error: {str(e)}")
-            return False
-        
-        # Calculate emissions if not provided
-        if 'emissions_kgCO2e' not in df.columns:
-            df['emissions_kgCO2e'] = df['quantity'] * df['emission_factor']
-        
-        # Add enterprise fields if not present
-        enterprise_fields = {
-            'business_unit': 'Corporate',
-            'project': 'Not Applicable',
-            'country': 'Bangladesh',
-            'facility': '',
-            'responsible_person': '',
-            'data_quality': 'Medium',
-            'verification_status': 'Unverified',
-            'notes': ''
-        }
-        
-        # Add missing columns with default values
-        for field, default_value in enterprise_fields.items():
-            if field not in df.columns:
-                df[field] = default_value
-        
-        # Append to existing data
-        st.session_state.emissions_data = pd.concat([st.session_state.emissions_data, df], ignore_index=True)
+        # Validate and append all rows with a single save, flagging unusual ones
+        results, anomalies = st.session_state.data_store.import_entries(df)
+        added = sum(1 for success, _ in results if success)
+        failed = [(i, message) for i, (success, message) in enumerate(results) if not success]
         
-        # Save data
-        if save_emissions_data():
-            st.success(f"Successfully added {len(df)} entries")
-            return True
-        else:
+        if failed:
+            details = "; ".join(f"row {i + 1}: {message}" for i, message in failed[:5])
+            st.warning(f"Skipped {len(failed)} invalid rows ({details})")
+        if added == 0:
             st.error("Failed to save data")
             return False
+        
+        # Shown on the next page, since a successful import reruns the app
+        if len(anomalies) > 0:
+            st.session_state.import_anomalies = [
+                f"Row {i + 1} ({row['date']}) - {describe_anomaly(row)}" for i, row in anomalies.iterrows()
+            ]
+        
+        st.success(f"Successfully added {added} entries")
+        return True
     except Exception as e:
         st.error(f"Error processing CSV: {str(e)}")
         return False
@@ -631,6 +470,121 @@ def metric_card(title, value, description=None, icon=None, prefix="", suffix="")
     </div>
     ''', unsafe_allow_html=True)
 
+# Time buckets offered for the emissions-over-time chart
+TIME_BUCKET_OPTIONS = {
+    'month': 'Month',
+    'quarter': 'Quarter',
+    'fiscal_quarter': 'Fiscal quarter',
+    'fiscal_year': 'Fiscal year',
+    'week': 'Week',
+    'export_season': 'Export season',
+    'monsoon': 'Monsoon',
+}
+
+# Dashboard figures, cached per data version
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_dashboard(_data_store, _data, data_version, time_bucket='month'):
+    """
+    Build the dashboard metrics and Plotly figures.
+    
+    Cached on data_version and time_bucket (the store and data arguments
+    are not hashed), so reruns with unchanged data, such as a language toggle,
+    skip the aggregation and figure building; a change to the data bumps
+    the version and builds a new entry. The figures contain no translated
+    text. Old versions are evicted after max_entries.
+    
+    Args:
+        _data_store (SharedEmissionsStore): Store to read the emissions cube from
+        _data (pandas.DataFrame): Emissions data of the snapshot being shown
+        data_version (int): Version of that snapshot
+        time_bucket (str, optional): Bucket of the over-time chart, a key of TIME_BUCKET_OPTIONS
+        
+    Returns:
+        dict: total_emissions, latest_date, entry_count, scope_figure,
+            category_figure and time_figure (None when there is nothing to plot)
+            and time_message explaining a missing time chart
+    """
+    data = _data
+    # Charts and totals read from the pre-aggregated cube, not the raw rows
+    inputs = _data_store.dashboard_inputs(data_version, time_bucket)
+    if inputs is None:
+        # Written since the snapshot was taken: aggregate the snapshot's own rows
+        cube = EmissionsCube.from_data(data, data_version)
+        time_data = resample_frame(data, time_bucket, ['scope'])
+    else:
+        cube, time_data = inputs
+    total_emissions = cube.total()
+    dates = data['date'].dropna()
+    dashboard = {
+        'total_emissions': total_emissions,
+        # Rows are kept in date order, so the latest date is the last one
+        'latest_date': dates.iloc[-1].strftime('%Y-%m-%d') if len(dates) > 0 else "No date data",
+        'entry_count': len(data),
+        'scope_figure': None,
+        'category_figure': None,
+        'time_figure': None,
+        'time_message': "No emissions data available for time series chart.",
+    }
+    if total_emissions <= 0:
+        return dashboard
+    
+    scope_data = cube.rollup('scope')
+    if not scope_data.empty and scope_data['emissions_kgCO2e'].sum() > 0:
+        fig1 = px.pie(
+            scope_data, 
+            values='emissions_kgCO2e', 
+            names='scope', 
+            color='scope', 
+            color_discrete_map={'Scope 1': '#006A4E', 'Scope 2': '#F42A41', 'Scope 3': '#FFD700'},
+            hole=0.4
+        )
+        fig1.update_layout(
+            margin=dict(t=0, b=0, l=0, r=0),
+            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
+            height=400
+        )
+        dashboard['scope_figure'] = fig1
+    
+    category_data = cube.rollup('category')
+    category_data = category_data.sort_values('emissions_kgCO2e', ascending=False)
+    if not category_data.empty and category_data['emissions_kgCO2e'].sum() > 0:
+        fig2 = px.bar(
+            category_data, 
+            x='category', 
+            y='emissions_kgCO2e', 
+            color='category',
+            color_discrete_sequence=['#006A4E', '#F42A41', '#FFD700', '#228B22', '#DC143C'],
+            labels={'emissions_kgCO2e': 'Emissions (kgCO2e)', 'category': 'Category'}
+        )
+        fig2.update_layout(
+            showlegend=False,
+            margin=dict(t=0, b=0, l=0, r=0),
+            height=400
+        )
+        dashboard['category_figure'] = fig2
+    
+    if time_data.empty:
+        dashboard['time_message'] = "No valid date data available for time series chart."
+        return dashboard
+    fig3 = px.line(
+        time_data, 
+        x='label', 
+        y='emissions_kgCO2e', 
+        color='scope', 
+        markers=True,
+        color_discrete_map={'Scope 1': '#006A4E', 'Scope 2': '#F42A41', 'Scope 3': '#FFD700'},
+        labels={'emissions_kgCO2e': 'Emissions (kgCO2e)', 'label': TIME_BUCKET_OPTIONS[time_bucket], 'scope': 'Scope'}
+    )
+    fig3.update_layout(
+        margin=dict(t=0, b=0, l=0, r=0),
+        xaxis_title="",
+        yaxis_title="kgCO2e",
+        legend_title="",
+        height=400
+    )
+    dashboard['time_figure'] = fig3
+    return dashboard
+
 # Apply custom CSS
 local_css()
 
@@ -664,14 +618,20 @@ with st.sidebar:
 if st.session_state.active_page == "Dashboard":
     st.markdown(f"<h1>🇧🇩 {t('dashboard')}</h1>", unsafe_allow_html=True)
     
-    if len(st.session_state.emissions_data) == 0:
+    # Unusual values found in the last CSV import, shown once
+    import_anomalies = st.session_state.pop('import_anomalies', None)
+    if import_anomalies:
+        st.warning(f"{len(import_anomalies)} imported entries look unusual; please check them:\n\n" +
+                   "\n".join(f"- {line}" for line in import_anomalies[:10]))
+    
+    if len(emissions_data) == 0:
         st.markdown(f"<div class='info-box'>{t('welcome_message')}</div>", unsafe_allow_html=True)
     else:
-        # Calculate metrics
-        st.session_state.emissions_data['emissions_kgCO2e'] = pd.to_numeric(st.session_state.emissions_data['emissions_kgCO2e'], errors='coerce')
-        st.session_state.emissions_data['emissions_kgCO2e'].fillna(0, inplace=True)
-        
-        total_emissions = st.session_state.emissions_data['emissions_kgCO2e'].sum()
+        # Built once per data version; reruns with unchanged data reuse it
+        # The bucket picked in the over-time chart's selector (set before this run)
+        time_bucket = st.session_state.get('dashboard_time_bucket', 'month')
+        dashboard = build_dashboard(st.session_state.data_store, emissions_data, emissions_version, time_bucket)
+        total_emissions = dashboard['total_emissions']
         
         # Display metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -683,22 +643,15 @@ if st.session_state.active_page == "Dashboard":
                 icon="🇧🇩"
             )
         with col2:
-            if 'date' in st.session_state.emissions_data.columns:
-                st.session_state.emissions_data['date'] = pd.to_datetime(st.session_state.emissions_data['date'], errors='coerce')
-                if not st.session_state.emissions_data['date'].isnull().all():
-                    latest_date = st.session_state.emissions_data['date'].max().strftime('%Y-%m-%d')
-                else:
-                    latest_date = "No date data"
-                metric_card(
-                    title="Latest Entry",
-                    value=latest_date,
-                    icon="📅"
-                )
+            metric_card(
+                title="Latest Entry",
+                value=dashboard['latest_date'],
+                icon="📅"
+            )
         with col3:
-            entry_count = len(st.session_state.emissions_data)
             metric_card(
                 title="Total Entries",
-                value=str(entry_count),
+                value=str(dashboard['entry_count']),
                 icon="📊"
             )
         with col4:
@@ -715,26 +668,8 @@ if st.session_state.active_page == "Dashboard":
         # Charts
         st.markdown(f"<h2>{t('emissions_by_scope')}</h2>", unsafe_allow_html=True)
         
-        if total_emissions > 0:
-            scope_data = st.session_state.emissions_data.groupby('scope')['emissions_kgCO2e'].sum().reset_index()
-            
-            if not scope_data.empty and scope_data['emissions_kgCO2e'].sum() > 0:
-                fig1 = px.pie(
-                    scope_data, 
-                    values='emissions_kgCO2e', 
-                    names='scope', 
-                    color='scope', 
-                    color_discrete_map={'Scope 1': '#006A4E', 'Scope 2': '#F42A41', 'Scope 3': '#FFD700'},
-                    hole=0.4
-                )
-                fig1.update_layout(
-                    margin=dict(t=0, b=0, l=0, r=0),
-                    legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
-                    height=400
-                )
-                st.plotly_chart(fig1, use_container_width=True, config={'displayModeBar': False})
-            else:
-                st.info("No emissions data available for scope breakdown.")
+        if dashboard['scope_figure'] is not None:
+            st.plotly_chart(dashboard['scope_figure'], use_container_width=True, config={'displayModeBar': False})
         else:
             st.info("No emissions data available for scope breakdown.")
         
@@ -743,66 +678,24 @@ if st.session_state.active_page == "Dashboard":
         with col1:
             st.markdown(f"<h2>{t('emissions_by_category')}</h2>", unsafe_allow_html=True)
             
-            if total_emissions > 0:
-                category_data = st.session_state.emissions_data.groupby('category')['emissions_kgCO2e'].sum().reset_index()
-                category_data = category_data.sort_values('emissions_kgCO2e', ascending=False)
-                
-                if not category_data.empty and category_data['emissions_kgCO2e'].sum() > 0:
-                    fig2 = px.bar(
-                        category_data, 
-                        x='category', 
-                        y='emissions_kgCO2e', 
-                        color='category',
-                        color_discrete_sequence=['#006A4E', '#F42A41', '#FFD700', '#228B22', '#DC143C'],
-                        labels={'emissions_kgCO2e': 'Emissions (kgCO2e)', 'category': 'Category'}
-                    )
-                    fig2.update_layout(
-                        showlegend=False,
-                        margin=dict(t=0, b=0, l=0, r=0),
-                        height=400
-                    )
-                    st.plotly_chart(fig2, use_container_width=True, config={'displayModeBar': False})
-                else:
-                    st.info("No emissions data available for category breakdown.")
+            if dashboard['category_figure'] is not None:
+                st.plotly_chart(dashboard['category_figure'], use_container_width=True, config={'displayModeBar': False})
             else:
                 st.info("No emissions data available for category breakdown.")
         
         with col2:
             st.markdown(f"<h2>{t('emissions_over_time')}</h2>", unsafe_allow_html=True)
+            st.selectbox(
+                "Group by",
+                list(TIME_BUCKET_OPTIONS),
+                format_func=TIME_BUCKET_OPTIONS.get,
+                key='dashboard_time_bucket'
+            )
             
-            if total_emissions > 0 and 'date' in st.session_state.emissions_data.columns:
-                time_data = st.session_state.emissions_data.copy()
-                time_data['date'] = pd.to_datetime(time_data['date'], errors='coerce')
-                time_data = time_data.dropna(subset=['date'])
-                
-                if not time_data.empty:
-                    time_data['month'] = time_data['date'].dt.strftime('%Y-%m')
-                    time_data = time_data.groupby(['month', 'scope'])['emissions_kgCO2e'].sum().reset_index()
-                    
-                    if len(time_data['month'].unique()) > 0:
-                        fig3 = px.line(
-                            time_data, 
-                            x='month', 
-                            y='emissions_kgCO2e', 
-                            color='scope', 
-                            markers=True,
-                            color_discrete_map={'Scope 1': '#006A4E', 'Scope 2': '#F42A41', 'Scope 3': '#FFD700'},
-                            labels={'emissions_kgCO2e': 'Emissions (kgCO2e)', 'month': 'Month', 'scope': 'Scope'}
-                        )
-                        fig3.update_layout(
-                            margin=dict(t=0, b=0, l=0, r=0),
-                            xaxis_title="",
-                            yaxis_title="kgCO2e",
-                            legend_title="",
-                            height=400
-                        )
-                        st.plotly_chart(fig3, use_container_width=True, config={'displayModeBar': False})
-                    else:
-                        st.info("Not enough time data to show emissions over time.")
-                else:
-                    st.info("No valid date data available for time series chart.")
+            if dashboard['time_figure'] is not None:
+                st.plotly_chart(dashboard['time_figure'], use_container_width=True, config={'displayModeBar': False})
             else:
-                st.info("No emissions data available for time series chart.")
+                st.info(dashboard['time_message'])
 
 elif st.session_state.active_page == "Data Entry":
     st.markdown(f"<h1>📝 {t('data_entry')}</h1>", unsafe_allow_html=True)
@@ -811,6 +704,30 @@ elif st.session_state.active_page == "Data Entry":
     
     with tabs[0]:
         st.markdown("<h3>Add New Emission Entry</h3>", unsafe_allow_html=True)
+        
+        # Factor lookup: ranked, typo-tolerant, English or Bengali
+        factor_query = st.text_input(
+            "Find an emission factor",
+            placeholder="e.g. diesel, electrcity, বিদ্যুৎ",
+            help="Searches activities, categories, units and sources; suggestions update as you search"
+        )
+        if factor_query.strip():
+            suggestions = FACTOR_SEARCH_INDEX.search(factor_query, limit=5)
+            if suggestions:
+                st.dataframe(
+                    pd.DataFrame(suggestions)[['category', 'activity', 'factor', 'unit', 'source']],
+                    column_config={
+                        "category": st.column_config.TextColumn("Category"),
+                        "activity": st.column_config.TextColumn("Activity"),
+                        "factor": st.column_config.NumberColumn("Emission Factor", format="%.4f"),
+                        "unit": st.column_config.TextColumn("Unit"),
+                        "source": st.column_config.TextColumn("Source"),
+                    },
+                    hide_index=True
+                )
+            else:
+                st.info("No matching emission factors found")
+        
         with st.form("emission_form", border=False):
             col1, col2 = st.columns(2)
             with col1:
@@ -838,14 +755,10 @@ elif st.session_state.active_page == "Data Entry":
                     help="Scope 1: Direct emissions\nScope 2: Purchased electricity\nScope 3: Value chain emissions"
                 )
                 
-                category_options = {
-                    'Scope 1': ['Stationary Combustion', 'Mobile Combustion', 'Refrigerants', 'Process Emissions', 'Other'],
-                    'Scope 2': ['Electricity', 'Steam', 'Other'],
-                    'Scope 3': ['Business Travel', 'Employee Commuting', 'Waste', 'Water', 'Purchased Goods & Services', 'Other']
-                }
+                # Categories and activities with factors in the registry
                 category = st.selectbox(
                     t('category'), 
-                    category_options[scope],
+                    FACTOR_REGISTRY.categories(scope, with_factors=True) + ['Other'],
                     help="The category of emission source"
                 )
                 if category == 'Other':
@@ -874,24 +787,9 @@ elif st.session_state.active_page == "Data Entry":
             
             with col2:
                 # Activity options based on category
-                activity_options = {
-                    'Stationary Combustion': ['Natural Gas Boiler', 'Diesel Generator', 'Furnace Oil Boiler', 'Coal Furnace', 'Biomass Boiler', 'Other'],
-                    'Mobile Combustion': ['Company Vehicle', 'Delivery Truck', 'Motorcycle', 'CNG Vehicle', 'Other'],
-                    'Refrigerants': ['AC System', 'Cold Storage', 'Refrigerator', 'Other'],
-                    'Electricity': ['Bangladesh Grid', 'Solar Power', 'Hydropower', 'Wind Power', 'Other'],
-                    'Business Travel': ['Domestic Flight', 'International Flight', 'Train', 'Bus', 'Rickshaw (CNG)', 'Taxi', 'Other'],
-                    'Employee Commuting': ['Car (Petrol)', 'Car (Diesel)', 'Motorcycle', 'Bus', 'Rickshaw (CNG)', 'Train', 'Other'],
-                    'Waste': ['Landfill', 'Recycling', 'Composting', 'Incineration', 'Other'],
-                    'Water': ['Water Supply', 'Water Treatment', 'Other'],
-                    'Purchased Goods & Services': ['Jute Products', 'Cotton Textiles', 'Leather Products', 'Paper', 'Steel', 'Cement', 'Rice', 'Fish', 'Other'],
-                    'Other': ['Custom Activity', 'Other']
-                }
-                
-                activity_key = category if category != 'Other' else 'Other'
-                activity_list = activity_options.get(activity_key, ['Other'])
                 activity = st.selectbox(
                     "Activity", 
-                    activity_list,
+                    FACTOR_REGISTRY.activities_of(category) + ['Other'],
                     help="Specific activity that generated the emissions"
                 )
                 if activity == 'Other':
@@ -904,29 +802,39 @@ elif st.session_state.active_page == "Data Entry":
                     help="The amount of activity (e.g., kWh used, liters consumed, etc.)"
                 )
                 
-                unit_options = ['kWh', 'MWh', 'liter', 'kg', 'tonne', 'km', 'passenger-km', 'cubic meter', 'BDT', 'USD', 'Other']
+                # Default emission factor and unit for Bangladesh from the registry
+                default = FACTOR_REGISTRY.lookup(category, activity, date)
+                default_factor = default["factor"] if default else 0.0
+                
+                # Registry activities offer the units their factor's unit converts from
+                if default:
+                    unit_options = compatible_units(default["unit"]) + ['Other']
+                else:
+                    unit_options = ['kWh', 'MWh', 'liter', 'kg', 'tonne', 'km', 'passenger-km', 'cubic meter', 'BDT', 'USD', 'Other']
                 unit = st.selectbox(
                     t('unit'), 
                     unit_options,
+                    index=0,
                     help="The unit of measurement for the quantity"
                 )
                 if unit == 'Other':
                     unit = st.text_input(t('custom_unit'), placeholder="Enter custom unit")
                 
-                # Get default emission factor for Bangladesh
-                default_factor = 0.0
-                if category in BANGLADESH_EMISSION_FACTORS:
-                    if activity in BANGLADESH_EMISSION_FACTORS[category]:
-                        default_factor = BANGLADESH_EMISSION_FACTORS[category][activity]["factor"]
-                
-                st.info(f"💡 AI Suggestion: Emission factor for {activity} in Bangladesh: {default_factor:.4f} kgCO2e per {unit}")
+                factor_unit = default["unit"] if default else unit
+                st.info(f"💡 AI Suggestion: Emission factor for {activity} in Bangladesh: {default_factor:.4f} kgCO2e per {factor_unit}")
+                if default and unit != factor_unit:
+                    ratio = conversion_factor(unit, factor_unit)
+                    if ratio is not None:
+                        st.caption(f"{quantity:,.2f} {unit} will be recorded as {quantity * ratio:,.2f} {factor_unit}")
+                    else:
+                        st.warning(f"{unit} cannot be converted to {factor_unit}, the unit of this emission factor")
                 
                 emission_factor = st.number_input(
                     t('emission_factor'), 
                     min_value=0.0, 
                     value=default_factor, 
                     format="%.4f",
-                    help=f"Emission factor in kgCO2e per unit"
+                    help=f"Emission factor in kgCO2e per {factor_unit}"
                 )
                 
                 data_quality = st.select_slider(
@@ -1011,10 +919,13 @@ elif st.session_state.active_page == "Data Entry":
         )
     
     # Show existing data table
-    if len(st.session_state.emissions_data) > 0:
+    if len(emissions_data) > 0:
         st.markdown("<h3>Existing Emissions Data</h3>", unsafe_allow_html=True)
         
-        display_df = st.session_state.emissions_data.copy()
+        display_df = emissions_data
+        # Version of the table the entry number was picked from (the previous run)
+        table_version = st.session_state.get('emissions_table_version', emissions_version)
+        st.session_state.emissions_table_version = emissions_version
         
         col1, col2 = st.columns([3, 1])
         
@@ -1047,7 +958,7 @@ elif st.session_state.active_page == "Data Entry":
                                            step=1)
             
             if st.button("🗑️ Delete Selected Entry", type="primary"):
-                if delete_emission_entry(entry_to_delete):
+                if delete_emission_entry(entry_to_delete, table_version):
                     st.success(f"Entry {entry_to_delete} deleted successfully!")
                     st.rerun()
 
@@ -1114,6 +1025,22 @@ elif st.session_state.active_page == "Settings":
         submitted = st.form_submit_button("Save Settings")
         if submitted:
             st.success("Settings saved successfully!")
+    
+    st.markdown("<h3>Emission Factors</h3>", unsafe_allow_html=True)
+    st.markdown("Recalculate the emissions of all entries with the emission factors in effect on their dates, or apply newly published factor versions to the entries they cover.")
+    col1, col2 = st.columns(2)
+    with col1:
+        recalculate = st.button("Recalculate Emissions", type="secondary", use_container_width=True)
+    with col2:
+        # Only entries dated in the window of a newly published factor version change
+        restate = st.button("Apply New Factor Versions", type="secondary", use_container_width=True)
+    if recalculate or restate:
+        data_store = st.session_state.data_store
+        success, message = data_store.recalculate_emissions() if recalculate else data_store.restate_emissions()
+        if success:
+            st.success(message)
+        else:
+            st.warning(message)
 
 elif st.session_state.active_page == "AI Insights":
     st.markdown(f"<h1>🤖 AI Insights for Bangladesh</h1>", unsafe_allow_html=True)
@@ -1150,13 +1077,13 @@ elif st.session_state.active_page == "AI Insights":
             st.markdown("<h3>Report Summary Generator</h3>", unsafe_allow_html=True)
             st.markdown("Generate Bangladesh-focused emissions summaries.")
             
-            if len(st.session_state.emissions_data) == 0:
+            if len(emissions_data) == 0:
                 st.warning("No emissions data available. Please add data first.")
             else:
                 if st.button("Generate Summary", key="report_summary_btn"):
                     with st.spinner("Generating report summary..."):
                         try:
-                            emissions_str = st.session_state.emissions_data.to_string()
+                            emissions_str = emissions_data.to_string()
                             result = st.session_state.ai_agents.run_report_summary_crew(emissions_str)
                             result_str = str(result)
                             st.markdown(f"<div class='stCard'>{result_str}</div>", unsafe_allow_html=True)
@@ -1179,10 +1106,10 @@ elif st.session_state.active_page == "AI Insights":
                     "Agriculture", "Fisheries", "IT", "Other"
                 ])
             
-            if len(st.session_state.emissions_data) == 0:
+            if len(emissions_data) == 0:
                 st.warning("No emissions data available. Please add data first.")
             else:
-                total_emissions = st.session_state.emissions_data['emissions_kgCO2e'].sum()
+                total_emissions = st.session_state.data_store.get_cube().total()
                 st.markdown(f"<p>Total emissions to offset: <strong>{total_emissions:.2f} kgCO2e</strong></p>", unsafe_allow_html=True)
                 
                 if st.button("Get Offset Recommendations", key="offset_advisor_btn"):
@@ -1233,13 +1160,13 @@ elif st.session_state.active_page == "AI Insights":
             st.markdown("<h3>Emission Optimizer</h3>", unsafe_allow_html=True)
             st.markdown("Get AI-powered recommendations specific to Bangladesh context.")
             
-            if len(st.session_state.emissions_data) == 0:
+            if len(emissions_data) == 0:
                 st.warning("No emissions data available. Please add data first.")
             else:
                 if st.button("Generate Bangladesh-Specific Recommendations", key="emission_optimizer_btn"):
                     with st.spinner("Analyzing your emissions data for Bangladesh context..."):
                         try:
-                            emissions_str = st.session_state.emissions_data.to_string()
+                            emissions_str = emissions_data.to_string()
                             result = st.session_state.ai_agents.run_optimization_crew(emissions_str)
                             result_str = str(result)
                             st.markdown(f"<div class='stCard'>{result_str}</div>", unsafe_allow_html=True)
@@ -0,0 +1,234 @@
+"""
+Bitmap indexes for YourCarbonFootprint application.
+Answers multi-column filters on the emissions data with bitwise operations.
+"""
+
+import numpy as np
+import pandas as pd
+
+INDEXED_COLUMNS = [
+    'scope', 'category', 'facility', 'business_unit', 'project',
+    'data_quality', 'verification_status'
+]
+
+# Beyond this many inserted rows, rebuilding is cheaper than shifting bits
+MAX_SHIFTED_INSERTS = 64
+
+
+def _bits_from_mask(mask):
+    """Pack a boolean array into a Python int (bit i set if mask[i])."""
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def _make_room(bitmap, position):
+    """Insert a zero bit at position, moving the higher bits up by one."""
+    low = bitmap & ((1 << position) - 1)
+    return low | ((bitmap >> position) << (position + 1))
+
+
+def _remove_bit(bitmap, position):
+    """Remove the bit at position, moving the higher bits down by one."""
+    low = bitmap & ((1 << position) - 1)
+    return low | ((bitmap >> (position + 1)) << position)
+
+
+class BitmapIndex:
+    """
+    Per-value bitsets over the rows of the emissions data.
+
+    For every indexed column, each value maps to a Python int whose bit i
+    is set if row position i holds that value. A filter is answered by
+    AND-ing (across columns) and OR-ing (across values) these ints, which
+    touches one machine word per 64 rows instead of comparing every row.
+    Rows with a missing value are in no bitset. The index follows the row
+    positions of the DataFrame it was built from, so it has to be updated
+    with insert() and delete() whenever rows are added or removed.
+    """
+
+    def __init__(self, columns=None):
+        """
+        Initialize an empty BitmapIndex.
+
+        Args:
+            columns (list, optional): Columns to index; defaults to INDEXED_COLUMNS
+        """
+        self.columns = list(columns or INDEXED_COLUMNS)
+        self.bitmaps = {col: {} for col in self.columns}
+        self.rows = 0
+
+    @classmethod
+    def from_data(cls, data, columns=None):
+        """
+        Build the index for a DataFrame.
+
+        Args:
+            data (pandas.DataFrame): Emissions data
+            columns (list, optional): Columns to index; defaults to INDEXED_COLUMNS
+
+        Returns:
+            BitmapIndex: Index over the rows of data
+        """
+        index = cls(columns)
+        index._build(data)
+        return index
+
+    def _build(self, data):
+        """Replace all bitsets with ones computed from data."""
+        self.rows = len(data)
+        for col in self.columns:
+            bitmaps = {}
+            if col in data.columns:
+                values = data[col].astype('category')
+                codes = values.cat.codes.to_numpy()
+                for code, value in enumerate(values.cat.categories):
+                    mask = codes == code
+                    if mask.any():
+                        bitmaps[value] = _bits_from_mask(mask)
+            self.bitmaps[col] = bitmaps
+
+    def insert(self, data, positions):
+        """
+        Add rows that were inserted into the data.
+
+        Args:
+            data (pandas.DataFrame): Data after the insert
+            positions (array-like): Ascending row positions of the new rows in data
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) == 0:
+            return
+        appended = positions[0] == self.rows
+        if not appended and len(positions) > MAX_SHIFTED_INSERTS:
+            self._build(data)
+            return
+
+        if not appended:
+            for bitmaps in self.bitmaps.values():
+                for value, bitmap in bitmaps.items():
+                    for position in positions.tolist():
+                        bitmap = _make_room(bitmap, position)
+                    bitmaps[value] = bitmap
+
+        new_rows = data.iloc[positions]
+        start = int(positions[0])
+        for col in self.columns:
+            if col not in new_rows.columns:
+                continue
+            bitmaps = self.bitmaps[col]
+            for value, group in pd.Series(positions, index=new_rows.index).groupby(new_rows[col], observed=True):
+                mask = np.zeros(int(positions[-1]) - start + 1, dtype=bool)
+                mask[group.to_numpy() - start] = True
+                bitmaps[value] = bitmaps.get(value, 0) | (_bits_from_mask(mask) << start)
+        self.rows = len(data)
+
+    def delete(self, position):
+        """
+        Remove a deleted row, moving the later rows down by one position.
+
+        Args:
+            position (int): Row position the deleted row had
+        """
+        for bitmaps in self.bitmaps.values():
+            for value in list(bitmaps):
+                bitmap = _remove_bit(bitmaps[value], position)
+                if bitmap:
+                    bitmaps[value] = bitmap
+                else:
+                    del bitmaps[value]
+        self.rows -= 1
+
+    def all_rows(self):
+        """
+        Get the bitset with every row set.
+
+        Returns:
+            int: Bitset of all rows
+        """
+        return (1 << self.rows) - 1
+
+    def row_range(self, start, stop):
+        """
+        Get the bitset of a range of row positions.
+
+        Args:
+            start (int): First position
+            stop (int): Position after the last one
+
+        Returns:
+            int: Bitset with positions start to stop - 1 set
+        """
+        return ((1 << stop) - 1) ^ ((1 << start) - 1)
+
+    def match(self, column, value):
+        """
+        Get the bitset of the rows where a column has one of some values.
+
+        Args:
+            column (str): Indexed column
+            value: A value, or a list/tuple/set of values (any of them matches)
+
+        Returns:
+            int: Bitset of matching rows
+        """
+        if column not in self.bitmaps:
+            raise ValueError(f"Column is not indexed: {column}")
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        bitmap = 0
+        for item in values:
+            bitmap |= self.bitmaps[column].get(item, 0)
+        return bitmap
+
+    def query(self, match_any=False, **filters):
+        """
+        Get the rows matching a combination of column filters.
+
+        Filters with a value of None are ignored. Within a filter, a list
+        of values matches any of them.
+
+        Args:
+            match_any (bool, optional): Match rows meeting any filter instead of all
+            **filters: Column name to a value or list of values,
+                e.g. scope='Scope 1', facility=['Dhaka', 'Gazipur']
+
+        Returns:
+            int: Bitset of matching rows
+        """
+        active = {column: value for column, value in filters.items() if value is not None}
+        if not active:
+            return self.all_rows()
+        result = 0 if match_any else self.all_rows()
+        for column, value in active.items():
+            if match_any:
+                result |= self.match(column, value)
+            else:
+                result &= self.match(column, value)
+        return result
+
+    @staticmethod
+    def positions(bitmap):
+        """
+        Get the row positions set in a bitset.
+
+        Args:
+            bitmap (int): Bitset
+
+        Returns:
+            numpy.ndarray: Ascending row positions
+        """
+        if bitmap == 0:
+            return np.empty(0, dtype=np.int64)
+        packed = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+
+    @staticmethod
+    def count(bitmap):
+        """
+        Count the rows in a bitset.
+
+        Args:
+            bitmap (int): Bitset
+
+        Returns:
+            int: Number of rows set
+        """
+        return bin(bitmap).count('1')
@@ -26,6 +26,54 @@ DATA_DIR = "data"
 EMISSIONS_FILE = os.path.join(DATA_DIR, "emissions.json")
 COMPANY_INFO_FILE = os.path.join(DATA_DIR, "company_info.json")
 
+# Storage settings
+# "json" rewrites emissions.json on every save; "journal" appends new entries
+# to a JSON-lines log that is folded into emissions.json once it grows large;
+# "sqlite" keeps entries in an indexed SQLite database; "sharded" partitions
+# entries by date; "columnar" keeps memory-mapped NumPy column files for
+# very large histories.
+EMISSIONS_STORAGE_MODE = os.getenv("EMISSIONS_STORAGE_MODE", "json")
+EMISSIONS_JOURNAL_FILE = os.path.join(DATA_DIR, "emissions_journal.jsonl")
+EMISSIONS_DB_FILE = os.path.join(DATA_DIR, "emissions.db")
+# "sharded" keeps one JSON-lines file per month or fiscal year under emissions/
+EMISSIONS_SHARD_DIR = os.path.join(DATA_DIR, "emissions")
+EMISSIONS_SHARD_GRANULARITY = os.getenv("EMISSIONS_SHARD_GRANULARITY", "month")  # "month" or "fiscal_year"
+# "columnar" keeps .npy column files in segments of at most this many rows
+EMISSIONS_COLUMNAR_DIR = os.path.join(DATA_DIR, "emissions_columnar")
+COLUMNAR_SEGMENT_ROWS = 1_000_000
+COLUMNAR_MAX_SMALL_SEGMENTS = 16
+
+# Writers from every process take this lock; the version file counts writes
+EMISSIONS_LOCK_FILE = os.path.join(DATA_DIR, "emissions.lock")
+EMISSIONS_VERSION_FILE = os.path.join(DATA_DIR, "emissions.version")
+# Running totals for the emissions summary, rewritten after every save
+EMISSIONS_AGGREGATES_FILE = os.path.join(DATA_DIR, "emissions_aggregates.json")
+# Frozen totals of closed fiscal years, kept until a back-dated change touches the year
+EMISSIONS_ROLLUPS_FILE = os.path.join(DATA_DIR, "emissions_rollups.json")
+
+# Snapshots: every save stores the changed month blocks under snapshots/.
+# All snapshots of the last day are kept, then one per day for 90 days,
+# then one per month.
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "true").lower() == "true"
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+SNAPSHOT_KEEP_ALL_HOURS = 24
+SNAPSHOT_KEEP_DAILY_DAYS = 90
+
+# Write-behind persistence: edits are flushed after this many quiet seconds
+# (0 writes every change immediately), and never later than the max delay
+WRITE_BEHIND_DELAY_SECONDS = float(os.getenv("WRITE_BEHIND_DELAY_SECONDS", "1.0"))
+WRITE_BEHIND_MAX_DELAY_SECONDS = 10.0
+
+# First month of the Bangladesh fiscal year (see REPORTING_PERIODS)
+FISCAL_YEAR_START_MONTH = 7
+JOURNAL_COMPACT_THRESHOLD_BYTES = 1024 * 1024  # Compact the journal after 1 MB
+
+# Anomaly detection: entries whose robust z-score against their facility and
+# activity history exceeds the threshold are flagged; series with fewer
+# entries than the minimum are not scored
+ANOMALY_Z_THRESHOLD = 3.5
+ANOMALY_MIN_POINTS = 6
+
 # Supported languages for Bangladesh
 SUPPORTED_LANGUAGES = ["English", "Bengali"]
 
@@ -204,6 +252,12 @@ REPORTING_PERIODS = {
     "monsoon_impact": "June - September"
 }
 
+# First and last month of the seasonal reporting windows above
+REPORTING_WINDOWS = {
+    "export_season": (10, 3),
+    "monsoon": (6, 9)
+}
+
 # Default data quality levels
 DATA_QUALITY_LEVELS = {
     "High": {
@@ -0,0 +1,193 @@
+"""
+Emissions cube for YourCarbonFootprint application.
+Pre-aggregated emissions by scope, category, activity, month, facility,
+business unit and data quality, used by the dashboard and reports.
+"""
+
+import pandas as pd
+from schema import apply_schema, empty_emissions_frame
+
+DIMENSIONS = ['scope', 'category', 'activity', 'month', 'facility', 'business_unit', 'data_quality']
+MEASURES = ['emissions_kgCO2e', 'rows']
+
+
+def _month_start(value):
+    """Get the first day of the month containing a date."""
+    return pd.Timestamp(value).to_period('M').to_timestamp()
+
+
+class EmissionsCube:
+    """
+    Materialized roll-up of emissions data.
+
+    Each cell is one combination of the DIMENSIONS with the summed
+    emissions and the number of rows behind it; month holds the first day
+    of the month. Queries (dice, between, rollup, total) only read cells,
+    never the raw rows. A cube is never modified: with_added and
+    with_removed return a new cube, so one can be shared between readers.
+    """
+
+    def __init__(self, cells=None, version=None):
+        """
+        Initialize the EmissionsCube class.
+
+        Args:
+            cells (pandas.DataFrame, optional): Cells with DIMENSIONS and MEASURES columns
+            version (int, optional): Data version the cube was built from
+        """
+        if cells is None:
+            cells = self._aggregate(empty_emissions_frame())
+        self.cells = cells
+        self.version = version
+
+    @staticmethod
+    def _aggregate(data):
+        """
+        Roll raw emission rows up into cells.
+
+        Args:
+            data (pandas.DataFrame): Emissions rows
+
+        Returns:
+            pandas.DataFrame: Cells
+        """
+        columns = ['date', 'emissions_kgCO2e'] + [col for col in DIMENSIONS if col != 'month']
+        data = apply_schema(data)[columns]
+        data = data.assign(
+            month=data['date'].dt.to_period('M').dt.to_timestamp(),
+            rows=1,
+            emissions_kgCO2e=data['emissions_kgCO2e'].fillna(0.0)
+        )
+        return data.groupby(DIMENSIONS, observed=True, dropna=False)[MEASURES].sum().reset_index()
+
+    @classmethod
+    def from_data(cls, data, version=None):
+        """
+        Build a cube from raw emissions rows.
+
+        Args:
+            data (pandas.DataFrame): Emissions rows
+            version (int, optional): Data version of the rows
+
+        Returns:
+            EmissionsCube: Cube over data
+        """
+        if len(data) == 0:
+            return cls(version=version)
+        return cls(cls._aggregate(data), version)
+
+    def _merged(self, cells, version):
+        """Combine cells into this cube's, dropping cells left with no rows."""
+        combined = pd.concat([self.cells, cells], ignore_index=True)
+        for col in DIMENSIONS:
+            if col != 'month':
+                combined[col] = combined[col].astype('category')
+        combined = combined.groupby(DIMENSIONS, observed=True, dropna=False)[MEASURES].sum().reset_index()
+        return EmissionsCube(combined[combined['rows'] > 0].reset_index(drop=True), version)
+
+    def with_added(self, rows, version=None):
+        """
+        Get a cube that also includes rows.
+
+        Args:
+            rows (pandas.DataFrame): Emission rows added to the data
+            version (int, optional): Data version after the change
+
+        Returns:
+            EmissionsCube: Updated cube
+        """
+        if len(rows) == 0:
+            return EmissionsCube(self.cells, version)
+        return self._merged(self._aggregate(rows), version)
+
+    def with_removed(self, rows, version=None):
+        """
+        Get a cube without rows.
+
+        Args:
+            rows (pandas.DataFrame): Emission rows deleted from the data
+            version (int, optional): Data version after the change
+
+        Returns:
+            EmissionsCube: Updated cube
+        """
+        if len(rows) == 0:
+            return EmissionsCube(self.cells, version)
+        cells = self._aggregate(rows)
+        cells[MEASURES] = -cells[MEASURES]
+        return self._merged(cells, version)
+
+    def combine(self, other):
+        """
+        Get a cube holding the cells of both cubes.
+
+        Args:
+            other (EmissionsCube): Cube over different rows
+
+        Returns:
+            EmissionsCube: Combined cube
+        """
+        return self._merged(other.cells, self.version)
+
+    def dice(self, **filters):
+        """
+        Keep the cells matching the filters.
+
+        Args:
+            **filters: Dimension name to a value (slice) or list of values (dice)
+
+        Returns:
+            EmissionsCube: Sub-cube
+        """
+        mask = pd.Series(True, index=self.cells.index)
+        for dimension, value in filters.items():
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension: {dimension}")
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.cells[dimension].isin(values)
+        return EmissionsCube(self.cells[mask], self.version)
+
+    def between(self, start_month, end_month):
+        """
+        Keep the cells of whole months in a range.
+
+        Args:
+            start_month (datetime): Any date in the first month
+            end_month (datetime): Any date in the last month
+
+        Returns:
+            EmissionsCube: Sub-cube
+        """
+        months = self.cells['month']
+        mask = (months >= _month_start(start_month)) & (months <= _month_start(end_month))
+        return EmissionsCube(self.cells[mask], self.version)
+
+    def rollup(self, *dimensions):
+        """
+        Sum the measures over all other dimensions.
+
+        Cells with a missing value in one of the dimensions are left out,
+        as a pandas groupby would.
+
+        Args:
+            *dimensions: Dimensions to keep, e.g. 'scope' or 'month', 'scope'
+
+        Returns:
+            pandas.DataFrame: One row per combination, with the MEASURES columns
+        """
+        return self.cells.groupby(list(dimensions), observed=True)[MEASURES].sum().reset_index()
+
+    def total(self, measure='emissions_kgCO2e'):
+        """
+        Sum a measure over the whole cube.
+
+        Returns:
+            float: Total of the measure
+        """
+        return float(self.cells[measure].sum())
+
+    def __len__(self):
+        """Number of cells."""
+        return len(self.cells)
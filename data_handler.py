@@ -3,6 +3,7 @@ Data handler for YourCarbonFootprint application.
 Manages data import, export, and processing.
 """
 
+import numpy as np
 import pandas as pd
 import json
 import os
@@ -12,42 +13,409 @@ from io import StringIO
 from fpdf import FPDF
 import matplotlib.pyplot as plt
 import seaborn as sns
-from emission_factors import get_emission_factor, get_categories, get_activities
+from factor_registry import FACTOR_REGISTRY
+from storage import get_storage, summarize_emissions
+from schema import (apply_schema, append_sorted, date_range_positions, date_range_slice, empty_emissions_frame,
+                    sort_by_date, sorted_insert_positions)
+from config import EMISSION_SCOPES, EMISSIONS_AGGREGATES_FILE, EMISSIONS_ROLLUPS_FILE, SNAPSHOTS_ENABLED
+from aggregates import RunningAggregates
+from analytics import period_over_period
+from anomalies import describe_anomaly, detect_anomalies
+from bitmap_index import BitmapIndex
+from cube import EmissionsCube
+from intensity import score_intensity
+from periods import bucket_starts, resample_frame
+from persistence import WriteBehindWriter
+from recalculation import (FACTOR_VERSION_COLUMN, RECALCULATION_COLUMNS, recalculate_emissions,
+                           record_factor_versions, restate_emissions)
+from rollups import YearlyRollups
+from snapshots import SnapshotStore
+from units import FACTOR_PER_ENTERED_UNIT, FACTOR_PER_FACTOR_UNIT, normalize_units
 
 # Constants
 DATA_DIR = "data"
 EMISSIONS_FILE = os.path.join(DATA_DIR, "emissions.json")
 COMPANY_INFO_FILE = os.path.join(DATA_DIR, "company_info.json")
+REQUIRED_COLUMNS = ['date', 'scope', 'category', 'activity', 'quantity', 'unit', 'emission_factor']
+# Values of the enterprise columns for imported rows that do not have them
+IMPORT_DEFAULTS = {
+    'business_unit': 'Corporate',
+    'project': 'Not Applicable',
+    'country': 'Bangladesh',
+    'facility': '',
+    'responsible_person': '',
+    'data_quality': 'Medium',
+    'verification_status': 'Unverified',
+    'notes': ''
+}
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
 class DataHandler:
-    def __init__(self):
-        """Initialize the DataHandler class."""
+    def __init__(self, storage_mode=None):
+        """
+        Initialize the DataHandler class.
+        
+        Args:
+            storage_mode (str, optional): Storage backend name ("json", "journal",
+                "sqlite", "sharded" or "columnar"); defaults to EMISSIONS_STORAGE_MODE from config
+        """
+        self.storage = get_storage(storage_mode)
+        self.snapshots = SnapshotStore() if SNAPSHOTS_ENABLED else None
+        self.writer = WriteBehindWriter(self.storage, snapshots=self.snapshots)
+        # Another process wrote meanwhile; our changes were merged into its data
+        self.writer.on_merge = self._adopt_merged_data
+        self.writer.on_write = self._save_derived
+        self._emissions_data = None
+        self._aggregates = None
+        self._cube = None
+        self._bitmap_index = None
+        self._rollups = None
+        # (data_version, {bucket: bucket_starts array}) for resample()
+        self._bucket_cache = (None, {})
+        self.load_warning = None
+        # Increases on every change so shared readers and caches can tell data apart
+        self.data_version = 0
         self.load_emissions_data()
         self.load_company_info()
     
+    @property
+    def emissions_data(self):
+        """
+        Full emissions dataset as a DataFrame.
+        
+        Backends that answer queries themselves (e.g. SQLite) are only read in
+        full the first time this is accessed. Changes replace the DataFrame
+        rather than modifying it, so a frame handed out is never changed later.
+        Rows are kept in date order (see schema.sort_by_date) so date ranges
+        can be found by binary search; row positions refer to this order.
+        """
+        if self._emissions_data is None:
+            with self.writer.lock:
+                # Rows queued while the data was not loaded must be in storage first
+                self.writer.flush()
+                self._emissions_data = self._read_storage()
+        return self._emissions_data
+    
+    @emissions_data.setter
+    def emissions_data(self, value):
+        self._set_data(sort_by_date(value))
+        # The change is unknown, so derived totals are rebuilt when next needed
+        self._invalidate_derived()
+    
+    def _set_data(self, data):
+        """Replace the emissions DataFrame without touching the aggregates."""
+        self._emissions_data = data
+        self.data_version += 1
+    
+    def _invalidate_derived(self):
+        """Drop the running aggregates, cube and bitmap index so they are rebuilt from the data."""
+        self._aggregates = None
+        self._cube = None
+        self._bitmap_index = None
+        # Yearly rollups are kept: they are keyed on data_version, so refresh() refreezes them
+    
     def load_emissions_data(self):
-        """Load emissions data from file."""
-        if os.path.exists(EMISSIONS_FILE):
-            with open(EMISSIONS_FILE, 'r') as f:
-                try:
-                    self.emissions_data = pd.DataFrame(json.load(f))
-                    # Convert date strings to datetime objects
-                    if 'date' in self.emissions_data.columns:
-                        self.emissions_data['date'] = pd.to_datetime(self.emissions_data['date'])
-                except json.JSONDecodeError:
-                    self.create_empty_emissions_data()
+        """Load emissions data from storage (base file plus any journaled entries)."""
+        self.writer.flush()
+        self.storage.refresh()
+        self._invalidate_derived()
+        # The data now matches storage, so the saved rollups are reloaded if they match it
+        self._rollups = None
+        if self.storage.supports_queries:
+            # Defer the full read until something needs every row
+            self._emissions_data = None
+            self.writer.set_base(None, self.writer.file_lock.read_version())
         else:
-            self.create_empty_emissions_data()
+            self._emissions_data = self._read_storage()
+        self.data_version += 1
+    
+    def _read_storage(self):
+        """
+        Read the full dataset from storage and record it as the writer's base.
+        
+        Returns:
+            pandas.DataFrame: Emissions data in the canonical schema
+        """
+        restored = False
+        with self.writer.file_lock.acquire():
+            version = self.writer.file_lock.read_version()
+            try:
+                data = self.storage.load()
+            except json.JSONDecodeError:
+                data, restored = self._recover_corrupted_data()
+            
+            if len(data.columns) == 0:
+                data = empty_emissions_frame()
+            else:
+                # Apply the canonical dtypes and date order once at load time
+                data = sort_by_date(apply_schema(data))
+            self.writer.set_base(data, version)
+            
+            if restored:
+                # Write the restored data in place of the corrupted file
+                self.writer.mark_dirty(data)
+            elif self.snapshots is not None and len(data) > 0 and self.snapshots.latest() is None:
+                # First snapshot, so as_of() reaches back to before the first save
+                self.snapshots.take(data, version)
+        return data
+    
+    def _recover_corrupted_data(self):
+        """
+        Move a corrupted data file aside and fall back to the latest snapshot.
+        
+        Returns:
+            tuple: (data, restored) where restored is True if a snapshot was used
+        """
+        backup_file = self.storage.backup_corrupted_file()
+        if backup_file:
+            self.load_warning = f"Corrupted emissions data file found. A backup has been created at {backup_file}"
+        
+        latest = self.snapshots.latest() if self.snapshots is not None else None
+        if latest is None:
+            return empty_emissions_frame(), False
+        
+        self.load_warning = (self.load_warning or "Corrupted emissions data found.") + \
+            f" The data was restored from the snapshot taken at {latest['created_at']}."
+        return self.snapshots.load(self.snapshots.list_snapshots()[-1]), True
+    
+    def as_of(self, timestamp):
+        """
+        Get the emissions data as it was at a point in time.
+        
+        Args:
+            timestamp (datetime or str): Point in time, e.g. when a past report was made
+            
+        Returns:
+            pandas.DataFrame: Data from the last snapshot taken at or before the
+                timestamp, or None if snapshots are disabled or none is that old
+        """
+        if self.snapshots is None:
+            return None
+        self.writer.flush()
+        name = self.snapshots.find_as_of(timestamp)
+        if name is None:
+            return None
+        return self.snapshots.load(name)
+    
+    def _adopt_merged_data(self, data):
+        """Replace the in-memory data with the result of a merge on write."""
+        self.emissions_data = data
+    
+    @property
+    def aggregates(self):
+        """
+        Running totals behind get_emissions_summary.
+        
+        Loaded from the aggregates file when it matches the data version,
+        otherwise rebuilt from the full dataset; then kept up to date by
+        add_emission_entries and delete_emission_entry.
+        """
+        if self._aggregates is None:
+            with self.writer.lock:
+                self.writer.flush()
+                aggregates = RunningAggregates.load(EMISSIONS_AGGREGATES_FILE)
+                if (aggregates is None or aggregates.version != self.writer.base_version
+                        or aggregates.storage != type(self.storage).__name__):
+                    aggregates = self.rebuild_aggregates()
+                self._aggregates = aggregates
+        return self._aggregates
+    
+    @property
+    def cube(self):
+        """
+        Emissions cube over the full dataset (see cube.EmissionsCube).
+        
+        Built on first use, then updated with the rows changed by
+        add_emission_entries and delete_emission_entry; cube.version is
+        the data_version it reflects.
+        """
+        if self._cube is None:
+            with self.writer.lock:
+                self._cube = EmissionsCube.from_data(self.emissions_data, self.data_version)
+        return self._cube
+    
+    @property
+    def bitmap_index(self):
+        """
+        Bitmap index over the rows of emissions_data (see bitmap_index.BitmapIndex).
+        
+        Built on first use, then updated by add_emission_entries and
+        delete_emission_entry.
+        """
+        if self._bitmap_index is None:
+            with self.writer.lock:
+                self._bitmap_index = BitmapIndex.from_data(self.emissions_data)
+        return self._bitmap_index
+    
+    @property
+    def rollups(self):
+        """
+        Frozen totals of closed fiscal years (see rollups.YearlyRollups).
+        
+        Loaded from the rollups file on first use if they were saved for
+        the stored data version and the data in memory is what was stored.
+        From then on they are keyed on data_version: add_emission_entries,
+        delete_emission_entry and the recalculations drop the record of a
+        year they change, and any other change makes refresh() freeze every
+        year again.
+        """
+        if self._rollups is None:
+            with self.writer.lock:
+                rollups = YearlyRollups.load(EMISSIONS_ROLLUPS_FILE, type(self.storage).__name__)
+                if (rollups.version != self.writer.base_version
+                        or not self.writer.is_stored(self._emissions_data)):
+                    rollups = YearlyRollups(type(self.storage).__name__)
+                rollups.version = self.data_version
+                self._rollups = rollups
+        return self._rollups
+    
+    def _invalidate_rollups(self, dates, previous_version):
+        """
+        Drop the rollups of the years some changed rows fall in, on disk too.
+        
+        Rollups up to date with previous_version (the data version before
+        the change) are then up to date with the current one.
+        """
+        rollups = self.rollups
+        if rollups.version == previous_version:
+            rollups.version = self.data_version
+        if rollups.invalidate(dates):
+            self._save_rollups()
+    
+    def _save_rollups(self):
+        """Persist the yearly rollups next to the data if they match the stored data."""
+        # Records frozen from unsaved changes are written after the flush (see _save_derived)
+        if not self._rollups_match_storage():
+            return
+        try:
+            self._rollups.save(EMISSIONS_ROLLUPS_FILE, self.writer.base_version)
+        except Exception as e:
+            print(f"Error saving emissions rollups: {str(e)}")
+    
+    def _rollups_match_storage(self):
+        """Whether the yearly rollups are up to date with the data as stored."""
+        return (self._rollups is not None and self._rollups.version == self.data_version
+                and self.writer.is_stored(self._emissions_data))
+    
+    def get_yearly_trend(self, by=None):
+        """
+        Get total emissions per fiscal year for multi-year trend views.
+        
+        Closed years come from their frozen rollups (frozen on first use);
+        only the open year is aggregated from its rows.
+        
+        Args:
+            by (str, optional): 'scope', 'category' or 'data_quality' to break the totals down
+            
+        Returns:
+            pandas.DataFrame: bucket, label, the by column, emissions_kgCO2e,
+                rows and frozen, ordered by year (see rollups.YearlyRollups.trend)
+        """
+        with self.writer.lock:
+            data = self.emissions_data
+            rollups = self.rollups
+            if rollups.refresh(data, self.data_version):
+                self._save_rollups()
+            return rollups.trend(data, by)
+    
+    def get_cube(self, start_date=None, end_date=None):
+        """
+        Get the emissions cube for a reporting period.
+        
+        Whole months in the period come from the cube; partial months at
+        either end are aggregated from their raw rows.
+        
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            
+        Returns:
+            EmissionsCube: Cube over the period
+        """
+        cube = self.cube
+        if not (start_date and end_date):
+            return cube
+        
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+        first_full = start if start.day == 1 else start + pd.offsets.MonthBegin(1)
+        last_full = end if end.is_month_end else end - pd.offsets.MonthEnd(1)
+        if first_full > last_full:
+            return EmissionsCube.from_data(self.get_filtered_data(start, end), cube.version)
+        
+        result = cube.between(first_full, last_full)
+        if start < first_full:
+            edge = self.get_filtered_data(start, first_full - pd.Timedelta(days=1))
+            result = result.combine(EmissionsCube.from_data(edge))
+        if end > last_full:
+            edge = self.get_filtered_data(last_full + pd.Timedelta(days=1), end)
+            result = result.combine(EmissionsCube.from_data(edge))
+        return result
+    
+    def rebuild_aggregates(self):
+        """
+        Recompute the running aggregates from the full dataset.
+        
+        Returns:
+            RunningAggregates: The rebuilt aggregates
+        """
+        with self.writer.lock:
+            data = self.emissions_data
+            self._aggregates = RunningAggregates.from_data(data)
+            with self.writer.file_lock.acquire():
+                # Only persist if no other process has written since our data was read
+                if self.writer.base_version == self.writer.file_lock.read_version():
+                    self._save_aggregates(self.writer.base_version)
+            return self._aggregates
+    
+    def verify_aggregates(self, repair=True):
+        """
+        Check the running aggregates against the full dataset.
+        
+        Args:
+            repair (bool, optional): Rebuild the aggregates if they are inconsistent
+            
+        Returns:
+            list: Descriptions of mismatches; empty if the aggregates are consistent
+        """
+        with self.writer.lock:
+            mismatches = self.aggregates.verify(self.emissions_data)
+            if mismatches and repair:
+                self.rebuild_aggregates()
+            return mismatches
+    
+    def _save_derived(self, version):
+        """Persist the aggregates and yearly rollups after a write of data version version."""
+        self._save_aggregates(version)
+        if self._rollups_match_storage():
+            try:
+                self._rollups.save(EMISSIONS_ROLLUPS_FILE, version)
+            except Exception as e:
+                print(f"Error saving emissions rollups: {str(e)}")
+    
+    def _save_aggregates(self, version):
+        """Persist the aggregates next to the data, stamped with its version."""
+        if self._aggregates is None:
+            return
+        try:
+            self._aggregates.save(EMISSIONS_AGGREGATES_FILE, version, type(self.storage).__name__)
+        except Exception as e:
+            print(f"Error saving emissions aggregates: {str(e)}")
+    
+    def lock_stats(self):
+        """
+        Get wait-time statistics for the cross-process data lock.
+        
+        Returns:
+            dict: acquisitions, contended, total_wait_seconds and max_wait_seconds
+        """
+        return self.writer.file_lock.stats()
     
     def create_empty_emissions_data(self):
         """Create empty emissions dataframe."""
-        self.emissions_data = pd.DataFrame(columns=[
-            'date', 'scope', 'category', 'activity', 'quantity', 
-            'unit', 'emission_factor', 'emissions_kgCO2e', 'notes'
-        ])
+        self.emissions_data = empty_emissions_frame()
     
     def load_company_info(self):
         """Load company information from file."""
@@ -76,14 +444,23 @@ class DataHandler:
         }
     
     def save_emissions_data(self):
-        """Save emissions data to file."""
-        # Convert datetime objects to strings
-        data_to_save = self.emissions_data.copy()
-        if 'date' in data_to_save.columns:
-            data_to_save['date'] = data_to_save['date'].dt.strftime('%Y-%m-%d')
+        """
+        Save the full emissions dataset to storage.
         
-        with open(EMISSIONS_FILE, 'w') as f:
-            json.dump(data_to_save.to_dict('records'), f, indent=2)
+        The write is deferred and coalesced with other edits; call flush()
+        to write immediately. If another process writes in the meantime, the
+        edits are merged into its data rather than overwriting it.
+        """
+        with self.writer.lock:
+            self.writer.mark_dirty(self.emissions_data)
+    
+    def flush(self):
+        """Write any pending emissions changes to storage now."""
+        self.writer.flush()
+    
+    def close(self):
+        """Flush pending changes; call when the handler is no longer used."""
+        self.writer.close()
     
     def save_company_info(self):
         """Save company information to file."""
@@ -101,43 +478,190 @@ class DataHandler:
             activity (str): Specific activity
             quantity (float): Quantity of activity
             unit (str): Unit of measurement
-            emission_factor (float): Emission factor
+            emission_factor (float): Emission factor in kgCO2e per the factor's unit
             notes (str, optional): Additional notes
             
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            # Calculate emissions
-            emissions_kgCO2e = float(quantity) * float(emission_factor)
-            
-            # Create new entry
-            new_entry = pd.DataFrame([{
-                'date': pd.Timestamp(date),
-                'scope': scope,
-                'category': category,
-                'activity': activity,
-                'quantity': float(quantity),
-                'unit': unit,
-                'emission_factor': float(emission_factor),
-                'emissions_kgCO2e': emissions_kgCO2e,
-                'notes': notes
-            }])
-            
-            # Append to existing data
-            self.emissions_data = pd.concat([self.emissions_data, new_entry], ignore_index=True)
-            
-            # Save data
+        results = self.add_emission_entries([{
+            'date': date,
+            'scope': scope,
+            'category': category,
+            'activity': activity,
+            'quantity': quantity,
+            'unit': unit,
+            'emission_factor': emission_factor,
+            'notes': notes
+        }])
+        success, message = results[0]
+        if not success:
+            print(f"Error adding emission entry: {message}")
+        return success
+    
+    def add_emission_entries(self, records, factors_per=FACTOR_PER_FACTOR_UNIT):
+        """
+        Add a batch of emission entries with a single concat and a single save.
+        
+        Rows are validated together; invalid rows are skipped and reported
+        while the valid ones are added.
+        
+        Args:
+            records (iterable or pandas.DataFrame): Entries as dicts or a DataFrame
+                with at least the REQUIRED_COLUMNS; blank emission factors are
+                taken from the factor registry and emissions_kgCO2e is calculated
+                from quantity * emission_factor where not provided. Quantities
+                are converted to the unit of their registry factor (see
+                units.normalize_units); rows in an incompatible unit are
+                rejected. The factor version each entry used is recorded in
+                factor_version
+            factors_per (str, optional): What unit the emission factors are
+                per: units.FACTOR_PER_FACTOR_UNIT (as the data entry form and
+                the registry give them) or units.FACTOR_PER_ENTERED_UNIT
+                (as in CSV files), whose factors are converted with the quantity
+            
+        Returns:
+            list: One (success, message) tuple per input row, in input order
+        """
+        if isinstance(records, pd.DataFrame):
+            df = records.reset_index(drop=True)
+        else:
+            df = pd.DataFrame(list(records))
+        if len(df) == 0:
+            return []
+        
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing_columns:
+            return [(False, f"Missing required columns: {', '.join(missing_columns)}")] * len(df)
+        
+        # Convert types for the whole batch; unparseable values become NaN/NaT
+        df = df.assign(
+            date=pd.to_datetime(df['date'], errors='coerce'),
+            quantity=pd.to_numeric(df['quantity'], errors='coerce'),
+            emission_factor=pd.to_numeric(df['emission_factor'], errors='coerce')
+        )
+        # Quantities in another unit than their factor's (MWh for a kWh factor) are converted
+        df, unit_problems = normalize_units(df, factors_per)
+        # Blank emission factors default to the registry's factor in effect on the entry's date
+        missing_factor = df['emission_factor'].isna()
+        if missing_factor.any():
+            defaults, _ = FACTOR_REGISTRY.factors_as_of(
+                FACTOR_REGISTRY.factor_ids(df['category'], df['activity']), df['date'])
+            df['emission_factor'] = df['emission_factor'].where(~missing_factor, defaults)
+        
+        checks = [
+            (df['date'].isna(), "invalid date"),
+            (~df['scope'].isin(EMISSION_SCOPES), "invalid scope"),
+            (df['category'].fillna('').astype(str).str.strip() == '', "missing category"),
+            (df['activity'].fillna('').astype(str).str.strip() == '', "missing activity"),
+            (df['quantity'].isna() | (df['quantity'] < 0), "invalid quantity"),
+            (df['emission_factor'].isna() | (df['emission_factor'] < 0), "invalid emission factor"),
+        ]
+        errors = pd.Series('', index=df.index)
+        for mask, message in checks:
+            errors = errors.where(~mask, errors + message + '; ')
+        errors = errors.where(unit_problems == '', errors + unit_problems + '; ')
+        valid = (errors == '').to_numpy()
+        
+        # Calculate emissions where not provided
+        calculated = df['quantity'] * df['emission_factor']
+        if 'emissions_kgCO2e' in df.columns:
+            df['emissions_kgCO2e'] = pd.to_numeric(df['emissions_kgCO2e'], errors='coerce').fillna(calculated)
+        else:
+            df['emissions_kgCO2e'] = calculated
+        
+        # Add notes column if not present
+        if 'notes' not in df.columns:
+            df['notes'] = ""
+        
+        new_rows = df[valid]
+        if len(new_rows) > 0:
+            # Record which factor version each entry used, so restate_emissions can update it
+            new_rows = new_rows.assign(**{FACTOR_VERSION_COLUMN: record_factor_versions(new_rows)})
+            with self.writer.lock:
+                previous_data = self._emissions_data
+                previous_version = self.data_version
+                try:
+                    # Append to existing data (skipped if the full dataset was never loaded)
+                    if previous_data is not None:
+                        self._set_data(append_sorted(previous_data, new_rows))
+                        if self._bitmap_index is not None:
+                            self._bitmap_index.insert(self._emissions_data,
+                                                      sorted_insert_positions(previous_data, new_rows))
+                    else:
+                        self.data_version += 1
+                    if self._aggregates is not None:
+                        self._aggregates.add_rows(new_rows)
+                    if self._cube is not None:
+                        self._cube = self._cube.with_added(new_rows, self.data_version)
+                    self._invalidate_rollups(new_rows['date'], previous_version)
+                    
+                    # Queue only the new rows (journaled backends avoid a full rewrite)
+                    self.writer.mark_appended(new_rows, self._emissions_data)
+                except Exception as e:
+                    self._emissions_data = previous_data
+                    self._invalidate_derived()
+                    return [(False, f"Error saving entries: {str(e)}")] * len(df)
+        
+        return [
+            (True, "Entry added") if ok else (False, error.rstrip('; '))
+            for ok, error in zip(valid, errors)
+        ]
+    
+    def delete_emission_entry(self, index):
+        """
+        Delete an emission entry.
+        
+        Args:
+            index (int): Row position of the entry
+            
+        Returns:
+            tuple: (success, message)
+        """
+        with self.writer.lock:
+            data = self.emissions_data
+            if index < 0 or index >= len(data):
+                return False, "Invalid index for deletion"
+            
+            previous_version = self.data_version
+            self._set_data(data.drop(data.index[index]).reset_index(drop=True))
+            if self._aggregates is not None:
+                self._aggregates.remove_rows(data.iloc[[index]])
+            if self._cube is not None:
+                self._cube = self._cube.with_removed(data.iloc[[index]], self.data_version)
+            if self._bitmap_index is not None:
+                self._bitmap_index.delete(index)
+            self._invalidate_rollups(data['date'].iloc[[index]], previous_version)
             self.save_emissions_data()
+        return True, "Entry deleted"
+    
+    def import_entries(self, df):
+        """
+        Import rows read from a file, e.g. an uploaded CSV.
+        
+        Missing enterprise columns get IMPORT_DEFAULTS. Each row's emission
+        factor is per the unit in its own row (emissions_kgCO2e is quantity
+        * emission_factor), so it is converted along with the quantity.
+        
+        Args:
+            df (pandas.DataFrame): Rows with at least the REQUIRED_COLUMNS
             
-            return True
-        except Exception as e:
-            print(f"Error adding emission entry: {str(e)}")
-            return False
+        Returns:
+            tuple: (one (success, message) tuple per row, as from
+                add_emission_entries; pandas.DataFrame of the added rows that
+                look unusual, see detect_anomalies, indexed by row position)
+        """
+        df = df.reset_index(drop=True).assign(
+            **{col: value for col, value in IMPORT_DEFAULTS.items() if col not in df.columns})
+        # Checked against the history before the new rows become part of it,
+        # in the units the history is kept in
+        anomalies = self.detect_anomalies(normalize_units(df, FACTOR_PER_ENTERED_UNIT)[0])
+        results = self.add_emission_entries(df, FACTOR_PER_ENTERED_UNIT)
+        return results, anomalies.loc[[results[i][0] for i in anomalies.index]]
     
     def import_csv(self, file_path_or_buffer):
         """
-        Import emissions data from CSV.
+        Import emissions data from CSV (see import_entries).
         
         Args:
             file_path_or_buffer: Path to CSV file or file-like object
@@ -150,30 +674,24 @@ class DataHandler:
             df = pd.read_csv(file_path_or_buffer)
             
             # Check required columns
-            required_columns = ['date', 'scope', 'category', 'activity', 'quantity', 'unit', 'emission_factor']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
             
             if missing_columns:
                 return False, f"Missing required columns: {', '.join(missing_columns)}"
             
-            # Convert date strings to datetime objects
-            df['date'] = pd.to_datetime(df['date'])
-            
-            # Calculate emissions if not provided
-            if 'emissions_kgCO2e' not in df.columns:
-                df['emissions_kgCO2e'] = df['quantity'].astype(float) * df['emission_factor'].astype(float)
-            
-            # Add notes column if not present
-            if 'notes' not in df.columns:
-                df['notes'] = ""
-            
-            # Append to existing data
-            self.emissions_data = pd.concat([self.emissions_data, df], ignore_index=True)
-            
-            # Save data
-            self.save_emissions_data()
+            results, anomalies = self.import_entries(df)
+            added = sum(1 for success, _ in results if success)
+            failed = [(i, message) for i, (success, message) in enumerate(results) if not success]
             
-            return True, f"Successfully imported {len(df)} entries"
+            if added == 0:
+                return False, f"No entries imported: {failed[0][1] if failed else 'file is empty'}"
+            message = f"Successfully imported {added} entries"
+            if failed:
+                message += f" ({len(failed)} skipped, first at row {failed[0][0] + 1}: {failed[0][1]})"
+            if len(anomalies) > 0:
+                message += (f"; {len(anomalies)} entries look unusual, e.g. row {anomalies.index[0] + 1}: "
+                            f"{describe_anomaly(anomalies.iloc[0])}")
+            return True, message
         except Exception as e:
             return False, f"Error importing CSV: {str(e)}"
     
@@ -191,14 +709,11 @@ class DataHandler:
         """
         try:
             # Filter data by date range if specified
-            data = self.emissions_data.copy()
-            if start_date and end_date:
-                mask = (data['date'] >= pd.Timestamp(start_date)) & (data['date'] <= pd.Timestamp(end_date))
-                data = data.loc[mask]
+            data = self.get_filtered_data(start_date, end_date)
             
             # Convert datetime objects to strings
             if 'date' in data.columns:
-                data['date'] = data['date'].dt.strftime('%Y-%m-%d')
+                data = data.assign(date=data['date'].dt.strftime('%Y-%m-%d'))
             
             if file_path:
                 # Save to file
@@ -227,10 +742,8 @@ class DataHandler:
         """
         try:
             # Filter data by date range if specified
-            data = self.emissions_data.copy()
-            if start_date and end_date:
-                mask = (data['date'] >= pd.Timestamp(start_date)) & (data['date'] <= pd.Timestamp(end_date))
-                data = data.loc[mask]
+            data = self.get_filtered_data(start_date, end_date)
+            cube = self.get_cube(start_date, end_date)
             
             # Create PDF
             pdf = FPDF()
@@ -254,22 +767,21 @@ class DataHandler:
             pdf.cell(0, 10, "Summary", 0, 1)
             pdf.set_font("Arial", "", 12)
             
-            total_emissions = data['emissions_kgCO2e'].sum()
+            total_emissions = cube.total()
             pdf.cell(0, 10, f"Total Emissions: {total_emissions:.2f} kgCO2e", 0, 1)
             
             # Emissions by scope
-            scope_data = data.groupby('scope')['emissions_kgCO2e'].sum().reset_index()
             pdf.ln(5)
             pdf.cell(0, 10, "Emissions by Scope:", 0, 1)
-            for _, row in scope_data.iterrows():
-                pdf.cell(0, 10, f"{row['scope']}: {row['emissions_kgCO2e']:.2f} kgCO2e ({row['emissions_kgCO2e'] / total_emissions * 100:.1f}%)", 0, 1)
+            for scope, emissions in cube.rollup('scope')[['scope', 'emissions_kgCO2e']].itertuples(index=False):
+                pdf.cell(0, 10, f"{scope}: {emissions:.2f} kgCO2e ({emissions / total_emissions * 100:.1f}%)", 0, 1)
             
             # Emissions by category
-            category_data = data.groupby('category')['emissions_kgCO2e'].sum().reset_index()
+            top_categories = cube.rollup('category').nlargest(5, 'emissions_kgCO2e')
             pdf.ln(5)
             pdf.cell(0, 10, "Top Categories:", 0, 1)
-            for _, row in category_data.nlargest(5, 'emissions_kgCO2e').iterrows():
-                pdf.cell(0, 10, f"{row['category']}: {row['emissions_kgCO2e']:.2f} kgCO2e ({row['emissions_kgCO2e'] / total_emissions * 100:.1f}%)", 0, 1)
+            for category, emissions in top_categories[['category', 'emissions_kgCO2e']].itertuples(index=False):
+                pdf.cell(0, 10, f"{category}: {emissions:.2f} kgCO2e ({emissions / total_emissions * 100:.1f}%)", 0, 1)
             
             # Data table
             pdf.ln(10)
@@ -309,51 +821,197 @@ class DataHandler:
             print(f"Error generating PDF report: {str(e)}")
             return False
     
-    def get_emissions_summary(self):
+    def get_emissions_summary(self, start_date=None, end_date=None):
         """
         Get emissions summary statistics.
         
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+        
         Returns:
             dict: Summary statistics
         """
-        if len(self.emissions_data) == 0:
-            return {
-                "total_emissions": 0,
-                "scope_breakdown": {},
-                "category_breakdown": {},
-                "time_series": {}
-            }
-        
-        # Total emissions
-        total_emissions = self.emissions_data['emissions_kgCO2e'].sum()
-        
-        # Emissions by scope
-        scope_data = self.emissions_data.groupby('scope')['emissions_kgCO2e'].sum().to_dict()
-        
-        # Emissions by category
-        category_data = self.emissions_data.groupby('category')['emissions_kgCO2e'].sum().to_dict()
-        
-        # Time series data (monthly)
-        time_data = self.emissions_data.copy()
-        if 'date' in time_data.columns and len(time_data) > 0:
-            time_data['month'] = time_data['date'].dt.strftime('%Y-%m')
-            time_series = time_data.groupby(['month', 'scope'])['emissions_kgCO2e'].sum().reset_index()
-            time_series_dict = {}
-            for _, row in time_series.iterrows():
-                if row['month'] not in time_series_dict:
-                    time_series_dict[row['month']] = {}
-                time_series_dict[row['month']][row['scope']] = row['emissions_kgCO2e']
+        if not (start_date and end_date):
+            # Whole dataset: answered from the running aggregates
+            return self.aggregates.summary()
+        
+        if self.storage.supports_queries:
+            self.writer.flush()
+            return self.storage.summary(start_date, end_date)
+        
+        return summarize_emissions(self.get_filtered_data(start_date, end_date))
+    
+    def _bucket_assignments(self, bucket):
+        """
+        Get the data and the bucket of each of its rows.
+        
+        Assignments are computed once per bucket and data version.
+        
+        Returns:
+            tuple: (emissions DataFrame, numpy array of bucket start dates)
+        """
+        with self.writer.lock:
+            data = self.emissions_data
+            version, assignments = self._bucket_cache
+            if version != self.data_version:
+                assignments = {}
+                self._bucket_cache = (self.data_version, assignments)
+            if bucket not in assignments:
+                assignments[bucket] = bucket_starts(data['date'], bucket)
+            return data, assignments[bucket]
+    
+    def resample(self, bucket='month', by=None, start_date=None, end_date=None):
+        """
+        Total emissions per time bucket.
+        
+        Args:
+            bucket (str, optional): 'day', 'week', 'month', 'quarter',
+                'fiscal_quarter', 'calendar_year', 'fiscal_year',
+                'export_season' (October - March) or 'monsoon' (June - September)
+            by (list, optional): Columns to group by as well, e.g. ['scope']
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            
+        Returns:
+            pandas.DataFrame: bucket (first day), label, the by columns,
+                emissions_kgCO2e and rows, ordered by bucket (see periods.resample_frame)
+        """
+        data, starts = self._bucket_assignments(bucket)
+        if start_date and end_date:
+            first, stop = date_range_positions(data, start_date, end_date)
+            data, starts = data.iloc[first:stop], starts[first:stop]
+        return resample_frame(data, bucket, by, starts=starts)
+    
+    def get_period_analytics(self, granularity='month', by=None, year_basis='fiscal', window=None):
+        """
+        Get period-over-period analytics, e.g. YoY per facility and category.
+        
+        Args:
+            granularity (str, optional): 'month', 'quarter', 'fiscal_quarter',
+                'calendar_year' or 'fiscal_year'
+            by (list, optional): Columns to group by, e.g. ['facility', 'category']
+            year_basis (str, optional): "fiscal" (July - June) or "calendar" year
+                for year-to-date totals
+            window (int, optional): Periods in the rolling total; defaults to one year
+            
+        Returns:
+            pandas.DataFrame: One row per group and period (see analytics.period_over_period)
+        """
+        return period_over_period(self.emissions_data, granularity, by, year_basis, window)
+    
+    def score_intensity(self, production, granularity='month'):
+        """
+        Score facilities' emission intensity against industry benchmarks.
+        
+        Args:
+            production (pandas.DataFrame): Output per facility and period with
+                facility, period (or date), industry, metric and output columns
+            granularity (str, optional): Period granularity, e.g. 'month' or 'fiscal_year'
+            
+        Returns:
+            pandas.DataFrame: Intensity, benchmark, gap and percentile per
+                production row (see intensity.score_intensity)
+        """
+        return score_intensity(self.emissions_data, production, granularity)
+    
+    def detect_anomalies(self, rows=None):
+        """
+        Find entries whose emissions are unusual for their facility and activity.
+        
+        Args:
+            rows (pandas.DataFrame, optional): Entries about to be added, checked
+                against the stored history; if not given, every stored entry is
+                checked against the others
+            
+        Returns:
+            pandas.DataFrame: Flagged rows with season, seasonal, baseline,
+                robust_z and ratio columns (see anomalies.detect_anomalies)
+        """
+        history = self.emissions_data
+        if rows is None:
+            return detect_anomalies(history)
+        
+        rows = rows.copy()
+        calculated = pd.to_numeric(rows['quantity'], errors='coerce') * pd.to_numeric(rows['emission_factor'], errors='coerce')
+        if 'emissions_kgCO2e' in rows.columns:
+            rows['emissions_kgCO2e'] = pd.to_numeric(rows['emissions_kgCO2e'], errors='coerce').fillna(calculated)
         else:
-            time_series_dict = {}
+            rows['emissions_kgCO2e'] = calculated
+        return detect_anomalies(rows, history)
+    
+    def recalculate_emissions(self, use_registry=True):
+        """
+        Re-derive emissions_kgCO2e of every stored entry from the factor registry.
         
-        return {
-            "total_emissions": total_emissions,
-            "scope_breakdown": scope_data,
-            "category_breakdown": category_data,
-            "time_series": time_series_dict
-        }
+        Args:
+            use_registry (bool, optional): Replace stored emission factors with
+                the registry's where it has one; otherwise only recompute
+                quantity * emission_factor
+            
+        Quantities in another unit than their factor's are converted first
+        (see units.normalize_units); entries whose unit cannot be converted
+        keep their stored factor and are counted in the message.
+        
+        Returns:
+            tuple: (success, message) with the number of entries changed, of
+                entries whose stored factor differs from the registry and of
+                entries whose unit cannot be converted
+        """
+        with self.writer.lock:
+            data = self.emissions_data
+            if len(data) == 0:
+                return False, "No emissions data to recalculate"
+            
+            result = recalculate_emissions(data, use_registry)
+            deviating = int(result['factor_deviates'].sum())
+            unit_problems = result['unit_problem'][result['unit_problem'] != '']
+            changed = np.zeros(len(data), dtype=bool)
+            for column in ['quantity', 'emissions_kgCO2e']:
+                old = data[column].to_numpy(dtype=float, na_value=float('nan'))
+                new = result[column].to_numpy()
+                changed |= ~((old == new) | (pd.isna(old) & pd.isna(new)))
+            changed |= (data['unit'].astype(object) != result['unit'].astype(object)).to_numpy()
+            restamped = (FACTOR_VERSION_COLUMN not in data.columns or
+                         (data[FACTOR_VERSION_COLUMN].astype(object) != result[FACTOR_VERSION_COLUMN].astype(object)).any())
+            if changed.any() or restamped:
+                previous_version = self.data_version
+                self.emissions_data = result.drop(columns=RECALCULATION_COLUMNS)
+                self._invalidate_rollups(data['date'][changed], previous_version)
+                self.save_emissions_data()
+        message = f"Recalculated {int(changed.sum())} entries; {deviating} used an emission factor different from the registry"
+        if len(unit_problems) > 0:
+            message += (f"; {len(unit_problems)} kept their emission factor because their unit cannot be converted, "
+                        f"e.g. entry {unit_problems.index[0] + 1}: {unit_problems.iloc[0]}")
+        return True, message
+    
+    def restate_emissions(self):
+        """
+        Restate entries whose factor version is no longer the one in effect on their date.
+        
+        After a new factor version is added to EMISSION_FACTOR_VERSIONS,
+        only the entries dated in its window that used the previous
+        version are recalculated (see recalculation.restate_emissions);
+        entries with their own emission factor are left alone.
+        
+        Returns:
+            tuple: (success, message) with the number of entries restated
+        """
+        with self.writer.lock:
+            data = self.emissions_data
+            if len(data) == 0:
+                return False, "No emissions data to restate"
+            
+            result, restated = restate_emissions(data)
+            recorded = FACTOR_VERSION_COLUMN in data.columns and not data[FACTOR_VERSION_COLUMN].isna().any()
+            if restated.any() or not recorded:
+                previous_version = self.data_version
+                self.emissions_data = result
+                self._invalidate_rollups(data['date'][restated], previous_version)
+                self.save_emissions_data()
+        return True, f"Restated {int(restated.sum())} entries with the emission factor version in effect on their date"
     
-    def get_filtered_data(self, start_date=None, end_date=None, scope=None, category=None):
+    def get_filtered_data(self, start_date=None, end_date=None, scope=None, category=None, **filters):
         """
         Get filtered emissions data.
         
@@ -362,21 +1020,47 @@ class DataHandler:
             end_date (datetime, optional): End date for filtering
             scope (str, optional): Scope for filtering
             category (str, optional): Category for filtering
+            **filters: Further column filters as accepted by query()
             
         Returns:
-            pandas.DataFrame: Filtered data
+            pandas.DataFrame: Filtered data; with no filters, the data itself
+                (to be treated as read-only), otherwise a slice of it
         """
-        data = self.emissions_data.copy()
+        if self.storage.supports_queries and all(value is None for value in filters.values()):
+            self.writer.flush()
+            data = self.storage.query(start_date, end_date, scope=scope, category=category)
+            # In date order like the in-memory paths, whatever order the backend reads in
+            return sort_by_date(apply_schema(data))
         
-        # Apply filters
-        if start_date and end_date:
-            mask = (data['date'] >= pd.Timestamp(start_date)) & (data['date'] <= pd.Timestamp(end_date))
-            data = data.loc[mask]
-        
-        if scope:
-            data = data[data['scope'] == scope]
+        return self.query(start_date, end_date, scope=scope, category=category, **filters)
+    
+    def query(self, start_date=None, end_date=None, match_any=False, **filters):
+        """
+        Get the entries matching a combination of filters.
         
-        if category:
-            data = data[data['category'] == category]
+        Column filters are answered from the bitmap index: a list of values
+        matches any of them, and the filters must all match (or any of them,
+        with match_any). The date range always applies.
         
-        return data
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            match_any (bool, optional): Keep rows matching any column filter instead of all
+            **filters: Column name to a value or list of values, for the
+                columns in bitmap_index.INDEXED_COLUMNS, e.g.
+                facility=['Dhaka', 'Gazipur'], verification_status='Unverified'
+            
+        Returns:
+            pandas.DataFrame: Matching entries
+        """
+        active = {column: value for column, value in filters.items() if value is not None}
+        with self.writer.lock:
+            data = self.emissions_data
+            if not active:
+                return date_range_slice(data, start_date, end_date) if start_date and end_date else data
+            
+            index = self.bitmap_index
+            rows = index.query(match_any, **active)
+            if start_date and end_date:
+                rows &= index.row_range(*date_range_positions(data, start_date, end_date))
+            return data.iloc[index.positions(rows)]
@@ -0,0 +1,288 @@
+"""
+Shared emissions data store for YourCarbonFootprint application.
+Holds one DataHandler per process so every session reads the same data.
+"""
+
+import threading
+from data_handler import DataHandler
+from units import FACTOR_PER_FACTOR_UNIT
+
+
+class SharedEmissionsStore:
+    """
+    Process-wide emissions data shared by all sessions.
+
+    Every change goes through the wrapped DataHandler under a lock and
+    replaces its emissions DataFrame with a new one (copy-on-write), bumping
+    data_version. A snapshot is therefore never modified after it is handed
+    out: sessions can keep reading it without copying, and pick up other
+    users' changes by taking a new snapshot on their next run.
+    """
+
+    def __init__(self, data_handler=None):
+        """
+        Initialize the SharedEmissionsStore class.
+
+        Args:
+            data_handler (DataHandler, optional): Handler to wrap; a new one
+                using the configured storage backend is created if not given
+        """
+        self.data_handler = data_handler or DataHandler()
+        self._lock = threading.RLock()
+
+    @property
+    def version(self):
+        """int: Version of the current data; increases with every change."""
+        return self.data_handler.data_version
+
+    @property
+    def load_warning(self):
+        """str: Warning raised while loading the data, or None."""
+        return self.data_handler.load_warning
+
+    def snapshot(self):
+        """
+        Get the current emissions data and its version.
+
+        The returned DataFrame must be treated as read-only.
+
+        Returns:
+            tuple: (version, pandas.DataFrame)
+        """
+        with self._lock:
+            return self.data_handler.data_version, self.data_handler.emissions_data
+
+    def add_entries(self, records, factors_per=FACTOR_PER_FACTOR_UNIT):
+        """
+        Add a batch of emission entries.
+
+        Args:
+            records (iterable or pandas.DataFrame): Entries as accepted by
+                DataHandler.add_emission_entries
+            factors_per (str, optional): What unit the emission factors are per
+                (see DataHandler.add_emission_entries)
+
+        Returns:
+            list: One (success, message) tuple per input row
+        """
+        with self._lock:
+            return self.data_handler.add_emission_entries(records, factors_per)
+
+    def delete_entry(self, index, expected_version=None):
+        """
+        Delete an emission entry by row position.
+
+        Args:
+            index (int): Row position in the snapshot the user was shown
+            expected_version (int, optional): Version of that snapshot; the
+                delete is refused if the data has changed since
+
+        Returns:
+            tuple: (success, message)
+        """
+        with self._lock:
+            if expected_version is not None and expected_version != self.version:
+                return False, "The data was changed by another user; please check the entry and try again"
+            return self.data_handler.delete_emission_entry(index)
+
+    def get_emissions_summary(self, start_date=None, end_date=None):
+        """
+        Get emissions summary statistics.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            dict: Summary statistics
+        """
+        with self._lock:
+            return self.data_handler.get_emissions_summary(start_date, end_date)
+
+    def get_cube(self, start_date=None, end_date=None):
+        """
+        Get the emissions cube for a reporting period.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            EmissionsCube: Cube over the period
+        """
+        with self._lock:
+            return self.data_handler.get_cube(start_date, end_date)
+
+    def dashboard_inputs(self, data_version, time_bucket='month'):
+        """
+        Get the emissions cube and per-scope totals over time of one data version.
+
+        Both are read under the lock together with the version check, so
+        they describe exactly the data of that version.
+
+        Args:
+            data_version (int): Version returned by snapshot()
+            time_bucket (str, optional): Bucket of the totals over time (see DataHandler.resample)
+
+        Returns:
+            tuple: (EmissionsCube, pandas.DataFrame of totals per bucket and
+                scope), or None if the data has changed since that version
+        """
+        with self._lock:
+            if self.data_handler.data_version != data_version:
+                return None
+            cube = self.data_handler.get_cube()
+            if time_bucket == 'fiscal_year':
+                # Closed years come from their frozen rollups, only the open year from rows
+                time_data = self.data_handler.get_yearly_trend(by='scope')
+            else:
+                time_data = self.data_handler.resample(time_bucket, by=['scope'])
+            return cube, time_data
+
+    def resample(self, bucket='month', by=None, start_date=None, end_date=None):
+        """
+        Total emissions per time bucket (see DataHandler.resample).
+
+        Args:
+            bucket (str, optional): Time bucket, e.g. 'week', 'fiscal_year' or 'monsoon'
+            by (list, optional): Columns to group by as well
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            pandas.DataFrame: Totals per bucket
+        """
+        with self._lock:
+            return self.data_handler.resample(bucket, by, start_date, end_date)
+
+    def get_yearly_trend(self, by=None):
+        """
+        Total emissions per fiscal year (see DataHandler.get_yearly_trend).
+
+        Args:
+            by (str, optional): 'scope', 'category' or 'data_quality'
+
+        Returns:
+            pandas.DataFrame: Totals per fiscal year
+        """
+        with self._lock:
+            return self.data_handler.get_yearly_trend(by)
+
+    def get_period_analytics(self, granularity='month', by=None, year_basis='fiscal', window=None):
+        """
+        Get period-over-period analytics (see DataHandler.get_period_analytics).
+
+        Args:
+            granularity (str, optional): Period granularity, e.g. 'month' or 'fiscal_year'
+            by (list, optional): Columns to group by
+            year_basis (str, optional): "fiscal" or "calendar"
+            window (int, optional): Periods in the rolling total
+
+        Returns:
+            pandas.DataFrame: One row per group and period
+        """
+        with self._lock:
+            return self.data_handler.get_period_analytics(granularity, by, year_basis, window)
+
+    def score_intensity(self, production, granularity='month'):
+        """
+        Score facilities' emission intensity (see DataHandler.score_intensity).
+
+        Args:
+            production (pandas.DataFrame): Output per facility and period
+            granularity (str, optional): Period granularity
+
+        Returns:
+            pandas.DataFrame: Intensity, benchmark, gap and percentile per production row
+        """
+        with self._lock:
+            return self.data_handler.score_intensity(production, granularity)
+
+    def import_entries(self, df):
+        """
+        Import rows read from a file (see DataHandler.import_entries).
+
+        Args:
+            df (pandas.DataFrame): Rows with at least the required columns
+
+        Returns:
+            tuple: (one (success, message) tuple per row, pandas.DataFrame
+                of the added rows that look unusual)
+        """
+        with self._lock:
+            return self.data_handler.import_entries(df)
+
+    def detect_anomalies(self, rows=None):
+        """
+        Find entries with unusual emissions (see DataHandler.detect_anomalies).
+
+        Args:
+            rows (pandas.DataFrame, optional): Entries about to be added; all
+                stored entries are checked if not given
+
+        Returns:
+            pandas.DataFrame: Flagged rows with their scores
+        """
+        with self._lock:
+            return self.data_handler.detect_anomalies(rows)
+
+    def recalculate_emissions(self, use_registry=True):
+        """
+        Re-derive stored emissions from the factor registry (see DataHandler.recalculate_emissions).
+
+        Args:
+            use_registry (bool, optional): Replace stored factors with the registry's
+
+        Returns:
+            tuple: (success, message)
+        """
+        with self._lock:
+            return self.data_handler.recalculate_emissions(use_registry)
+
+    def restate_emissions(self):
+        """
+        Restate entries to the factor version in effect on their date (see DataHandler.restate_emissions).
+
+        Returns:
+            tuple: (success, message)
+        """
+        with self._lock:
+            return self.data_handler.restate_emissions()
+
+    def get_filtered_data(self, start_date=None, end_date=None, scope=None, category=None, **filters):
+        """
+        Get filtered emissions data.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            scope (str, optional): Scope for filtering
+            category (str, optional): Category for filtering
+            **filters: Further column filters, e.g. facility or project
+
+        Returns:
+            pandas.DataFrame: Filtered data
+        """
+        with self._lock:
+            return self.data_handler.get_filtered_data(start_date, end_date, scope, category, **filters)
+
+    def query(self, start_date=None, end_date=None, match_any=False, **filters):
+        """
+        Get the entries matching a combination of filters (see DataHandler.query).
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            match_any (bool, optional): Keep rows matching any column filter instead of all
+            **filters: Column name to a value or list of values
+
+        Returns:
+            pandas.DataFrame: Matching entries
+        """
+        with self._lock:
+            return self.data_handler.query(start_date, end_date, match_any, **filters)
+
+    def reload(self):
+        """Re-read the data from storage, e.g. after an external import."""
+        with self._lock:
+            self.data_handler.load_emissions_data()
@@ -96,6 +96,8 @@ BANGLADESH_EMISSION_FACTORS = {
     "Purchased Goods & Services": {
         # Bangladesh-specific products
         "Jute Fiber": {"factor": 0.82, "unit": "kg", "source": "Local LCA study"},
+        # The data entry form once used its own 0.82 here; record_factor_versions
+        # records such entries as custom factors, so restatements leave them alone
         "Jute Products": {"factor": 1.15, "unit": "kg", "source": "Local LCA study"},
         "Cotton (Raw)": {"factor": 3.8, "unit": "kg", "source": "Global average"},
         "Cotton Textiles": {"factor": 5.89, "unit": "kg", "source": "Industry study"},
@@ -173,6 +175,110 @@ BANGLADESH_SCOPE_CATEGORIES = {
     ]
 }
 
+# Later published values of the factors above. Each applies to entries dated
+# on or after its effective date; the value above applies before the first one.
+# The source names the version and is recorded with every entry (factor_version),
+# so it must differ between versions of an activity, e.g.
+#     ("Electricity", "Bangladesh Grid"): [
+#         {"effective_from": "2024-07-01", "factor": <published value>, "source": "Bangladesh grid emission factor 2024"},
+#     ],
+EMISSION_FACTOR_VERSIONS = {
+}
+
+# Older category names (from the data entry form and earlier data files)
+LEGACY_CATEGORY_ALIASES = {
+    "Waste": "Waste Management",
+    "Water": "Water and Wastewater",
+}
+
+# Older or equipment-style activity names and the factor they use
+LEGACY_ACTIVITY_ALIASES = {
+    "Stationary Combustion": {
+        "Natural Gas Boiler": "Natural Gas",
+        "Diesel Generator": "Diesel",
+        "Furnace Oil Boiler": "Furnace Oil",
+        "Coal Furnace": "Coal",
+        "Biomass": "Biomass (Wood)",
+        "Biomass Boiler": "Biomass (Wood)",
+    },
+    "Mobile Combustion": {
+        "Company Vehicle": "Petrol/Gasoline",
+        "Motorcycle": "Petrol/Gasoline",
+        "Delivery Truck": "Diesel",
+        "CNG Vehicle": "CNG",
+    },
+    "Refrigerants": {
+        "AC System": "R-134a",
+        "Refrigerator": "R-134a",
+        "Cold Storage": "R-404A",
+    },
+    "Steam": {
+        "Purchased Steam": "Purchased Steam (Natural Gas)",
+    },
+    "Business Travel": {
+        "International Flight": "International Flight (Long-haul)",
+    },
+    "Waste Management": {
+        "Landfill": "Landfill (Mixed Waste)",
+        "Recycling": "Recycling (Mixed)",
+    },
+    "Purchased Goods & Services": {
+        "Plastic": "Plastic (General)",
+        "Steel": "Steel (Primary)",
+        "Fish": "Fish (Freshwater)",
+    },
+}
+
+# Bengali search terms for words in category and activity names
+BENGALI_SEARCH_TERMS = {
+    "electricity": ["বিদ্যুৎ", "বিদ্যুত"],
+    "grid": ["গ্রিড"],
+    "solar": ["সৌর", "সোলার"],
+    "gas": ["গ্যাস"],
+    "natural": ["প্রাকৃতিক"],
+    "diesel": ["ডিজেল"],
+    "petrol": ["পেট্রোল", "অকটেন"],
+    "furnace": ["ফার্নেস"],
+    "coal": ["কয়লা"],
+    "kerosene": ["কেরোসিন"],
+    "cng": ["সিএনজি"],
+    "lpg": ["এলপিজি"],
+    "biomass": ["জৈববস্তু", "লাকড়ি"],
+    "jute": ["পাট"],
+    "rice": ["চাল", "ধান"],
+    "husk": ["তুষ"],
+    "cotton": ["তুলা"],
+    "leather": ["চামড়া"],
+    "fish": ["মাছ"],
+    "shrimp": ["চিংড়ি"],
+    "tea": ["চা"],
+    "sugar": ["চিনি"],
+    "cement": ["সিমেন্ট"],
+    "steel": ["ইস্পাত", "স্টিল"],
+    "bricks": ["ইট"],
+    "bamboo": ["বাঁশ"],
+    "paper": ["কাগজ"],
+    "plastic": ["প্লাস্টিক"],
+    "glass": ["কাচ"],
+    "water": ["পানি", "জল"],
+    "waste": ["বর্জ্য"],
+    "wastewater": ["বর্জ্যপানি"],
+    "refrigerants": ["রেফ্রিজারেন্ট"],
+    "flight": ["বিমান", "ফ্লাইট"],
+    "train": ["ট্রেন", "রেল"],
+    "bus": ["বাস"],
+    "rickshaw": ["রিকশা"],
+    "taxi": ["ট্যাক্সি"],
+    "truck": ["ট্রাক"],
+    "ship": ["জাহাজ"],
+    "launch": ["লঞ্চ", "ফেরি"],
+    "motorcycle": ["মোটরসাইকেল"],
+    "car": ["গাড়ি"],
+    "hotel": ["হোটেল"],
+    "travel": ["ভ্রমণ"],
+    "steam": ["বাষ্প"],
+}
+
 # Industry-specific emission benchmarks for Bangladesh (kgCO2e per unit)
 BANGLADESH_INDUSTRY_BENCHMARKS = {
     "Ready Made Garments": {
@@ -220,9 +326,9 @@ def get_emission_factor(category, activity):
     Returns:
         dict: Dictionary containing factor, unit, and source, or None if not found
     """
-    if category in BANGLADESH_EMISSION_FACTORS and activity in BANGLADESH_EMISSION_FACTORS[category]:
-        return BANGLADESH_EMISSION_FACTORS[category][activity]
-    return None
+    # Imported here: the registry is compiled from this module's tables
+    from factor_registry import FACTOR_REGISTRY
+    return FACTOR_REGISTRY.lookup(category, activity)
 
 def get_activities(category):
     """
@@ -234,9 +340,8 @@ def get_activities(category):
     Returns:
         list: List of activities for the category, or empty list if category not found
     """
-    if category in BANGLADESH_EMISSION_FACTORS:
-        return list(BANGLADESH_EMISSION_FACTORS[category].keys())
-    return []
+    from factor_registry import FACTOR_REGISTRY
+    return FACTOR_REGISTRY.activities_of(category)
 
 def get_categories(scope):
     """
@@ -248,9 +353,8 @@ def get_categories(scope):
     Returns:
         list: List of categories for the scope, or empty list if scope not found
     """
-    if scope in BANGLADESH_SCOPE_CATEGORIES:
-        return BANGLADESH_SCOPE_CATEGORIES[scope]
-    return []
+    from factor_registry import FACTOR_REGISTRY
+    return FACTOR_REGISTRY.categories(scope)
 
 def get_unit(category, activity):
     """
@@ -294,27 +398,27 @@ def get_all_industries():
 
 def search_emission_factors(search_term):
     """
-    Search for emission factors containing the search term.
+    Search for emission factors matching the search term.
+    
+    Matches activity and category names, units, sources, legacy names and
+    Bengali terms, tolerating typos (see factor_search.FactorSearchIndex).
     
     Args:
-        search_term (str): Term to search for
+        search_term (str): Term to search for, e.g. "disel" or "বিদ্যুৎ"
         
     Returns:
-        dict: Dictionary of matching categories and activities
+        dict: Dictionary of matching categories and activities, best matches first;
+            every factor if the term is empty
     """
-    results = {}
-    search_lower = search_term.lower()
-    
-    for category, activities in BANGLADESH_EMISSION_FACTORS.items():
-        matching_activities = {}
-        for activity, data in activities.items():
-            if (search_lower in category.lower() or 
-                search_lower in activity.lower()):
-                matching_activities[activity] = data
-        
-        if matching_activities:
-            results[category] = matching_activities
+    if not search_term.strip():
+        return {category: dict(activities) for category, activities in BANGLADESH_EMISSION_FACTORS.items()}
     
+    # Imported here: the index is built from this module's tables
+    from factor_search import FACTOR_SEARCH_INDEX
+    results = {}
+    for match in FACTOR_SEARCH_INDEX.search(search_term, limit=None):
+        category, activity = match['category'], match['activity']
+        results.setdefault(category, {})[activity] = BANGLADESH_EMISSION_FACTORS[category][activity]
     return results
 
 # Common emission factor recommendations for Bangladesh
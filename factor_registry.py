@@ -0,0 +1,315 @@
+"""
+Compiled emission-factor registry for YourCarbonFootprint application.
+Turns the nested factor tables of emission_factors into integer-coded arrays, built once at import.
+"""
+
+import numpy as np
+import pandas as pd
+from emission_factors import (BANGLADESH_EMISSION_FACTORS, BANGLADESH_SCOPE_CATEGORIES, EMISSION_FACTOR_VERSIONS,
+                              LEGACY_ACTIVITY_ALIASES, LEGACY_CATEGORY_ALIASES)
+
+# Version keys pack (factor ID, day) into one int64: IDs above, days below this bit
+_DAY_BITS = 21
+# Added to day numbers so every date from 1970 +- 2800 years is a positive key
+_DAY_OFFSET = 1 << 20
+
+
+def _encode(values, vocabulary):
+    """Position of each value in vocabulary (-1 if absent), looking up each distinct value once."""
+    codes, uniques = pd.factorize(pd.Series(values), sort=False)
+    positions = np.append(vocabulary.get_indexer(uniques), -1)
+    # Missing values have code -1, which picks the appended -1
+    return positions[codes]
+
+
+class FactorRegistry:
+    """
+    Emission factors keyed by integer (category, activity) IDs.
+
+    Every activity of the factor tables gets an ID; factors, units,
+    sources and category codes are parallel NumPy arrays indexed by it.
+    Legacy category and activity names resolve to the ID of the factor
+    they stand for. A category x activity-name matrix of IDs lets whole
+    columns of names be resolved with two categorical encodings and one
+    array lookup. The per-scope and per-category lists are computed once
+    and shared, so they must not be modified.
+
+    Each factor also has effective-dated versions: the table value, in
+    effect from the beginning, and any later published values. Versions
+    are kept sorted by (factor ID, effective date) under packed int64
+    keys, so picking the version in effect on each row's date is an as-of
+    join done with one binary search over the whole column.
+    """
+
+    def __init__(self, factors, scope_categories, category_aliases=None, activity_aliases=None, versions=None):
+        """
+        Compile the factor tables.
+
+        Args:
+            factors (dict): Category to {activity: {"factor", "unit", "source"}}
+            scope_categories (dict): Scope to its list of categories
+            category_aliases (dict, optional): Legacy category name to category
+            activity_aliases (dict, optional): Category to {legacy activity name: activity}
+            versions (dict, optional): (category, activity) to a list of later
+                {"effective_from", "factor", "source"} versions
+
+        Raises:
+            ValueError: If a version names an unknown activity or repeats a source
+        """
+        category_aliases = category_aliases or {}
+        activity_aliases = activity_aliases or {}
+
+        self.category_names = list(factors)
+        self.category_codes = []
+        self.activities = []
+        self.units = []
+        self.sources = []
+        self.factors = []
+        self._ids = {}
+        self._activities_by_category = {}
+        for code, (category, activities) in enumerate(factors.items()):
+            self._activities_by_category[category] = list(activities)
+            for activity, entry in activities.items():
+                self._ids[(category, activity)] = len(self.factors)
+                self.category_codes.append(code)
+                self.activities.append(activity)
+                self.factors.append(float(entry["factor"]))
+                self.units.append(entry["unit"])
+                self.sources.append(entry.get("source", ""))
+
+        for category, aliases in activity_aliases.items():
+            for alias, activity in aliases.items():
+                self._ids[(category, alias)] = self._ids[(category, activity)]
+        self._category_aliases = dict(category_aliases)
+        for alias, category in category_aliases.items():
+            for activity in self._activities_by_category.get(category, []):
+                self._ids.setdefault((alias, activity), self._ids[(category, activity)])
+            for legacy, activity in activity_aliases.get(category, {}).items():
+                self._ids.setdefault((alias, legacy), self._ids[(category, activity)])
+
+        self.category_codes = np.array(self.category_codes, dtype=np.int32)
+        self.activities = np.array(self.activities, dtype=object)
+        self.factors = np.array(self.factors, dtype=np.float64)
+        self.units = np.array(self.units, dtype=object)
+        self.sources = np.array(self.sources, dtype=object)
+
+        # Name vocabularies (aliases included) and the ID of each pair, -1 if none
+        self._key_categories = pd.Index(sorted({category for category, _ in self._ids}))
+        self._key_activities = pd.Index(sorted({activity for _, activity in self._ids}))
+        self._id_matrix = np.full((len(self._key_categories), len(self._key_activities)), -1, dtype=np.int32)
+        for (category, activity), factor_id in self._ids.items():
+            self._id_matrix[self._key_categories.get_loc(category),
+                            self._key_activities.get_loc(activity)] = factor_id
+
+        self._compile_versions(versions or {})
+
+        self._categories_by_scope = {scope: list(categories) for scope, categories in scope_categories.items()}
+        self._factor_categories_by_scope = {
+            scope: [category for category in categories if category in self._activities_by_category]
+            for scope, categories in scope_categories.items()
+        }
+        self._scope_by_category = {
+            category: scope for scope, categories in scope_categories.items() for category in categories
+        }
+
+    def _compile_versions(self, versions):
+        """Build the version arrays: the table value of every factor plus its later versions."""
+        rows = [(factor_id, -_DAY_OFFSET, self.factors[factor_id], self.sources[factor_id])
+                for factor_id in range(len(self.factors))]
+        for (category, activity), entries in versions.items():
+            factor_id = self.factor_id(category, activity)
+            if factor_id < 0:
+                raise ValueError(f"Emission factor version for unknown activity: {category} / {activity}")
+            labels = {self.sources[factor_id]}
+            for entry in entries:
+                if entry["source"] in labels:
+                    raise ValueError(f"Repeated emission factor version for {category} / {activity}: {entry['source']}")
+                labels.add(entry["source"])
+                day = int(np.datetime64(pd.Timestamp(entry["effective_from"]).date(), 'D').astype(np.int64))
+                rows.append((factor_id, day, float(entry["factor"]), entry["source"]))
+        rows.sort(key=lambda row: (row[0], row[1]))
+
+        self.version_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.version_starts = np.array([row[1] for row in rows], dtype=np.int64).astype('datetime64[D]')
+        self.version_factors = np.array([row[2] for row in rows], dtype=np.float64)
+        self.version_labels = np.array([row[3] for row in rows], dtype=object)
+        # Version labels as codes into version_label_index, for building categoricals cheaply
+        self.version_label_codes, labels = pd.factorize(self.version_labels)
+        self.version_label_index = pd.Index(labels)
+        self._version_keys = (self.version_ids << _DAY_BITS) + (np.array([row[1] for row in rows]) + _DAY_OFFSET)
+        self.versioned_ids = np.unique(self.version_ids[np.r_[False, np.diff(self.version_ids) == 0]])
+
+    def __len__(self):
+        return len(self.factors)
+
+    def factor_id(self, category, activity):
+        """
+        Get the ID of an activity's factor.
+
+        Args:
+            category (str): Emission category (legacy names allowed)
+            activity (str): Activity (legacy names allowed)
+
+        Returns:
+            int: Factor ID, or -1 if the registry has no factor for it
+        """
+        return self._ids.get((category, activity), -1)
+
+    def factor_ids(self, categories, activities):
+        """
+        Get the factor IDs of whole columns of categories and activities.
+
+        Args:
+            categories (array-like): Emission categories
+            activities (array-like): Activities, one per category
+
+        Returns:
+            numpy.ndarray: int32 factor IDs; -1 where there is no factor
+        """
+        category_codes = _encode(categories, self._key_categories)
+        activity_codes = _encode(activities, self._key_activities)
+        found = (category_codes >= 0) & (activity_codes >= 0)
+        return np.where(found, self._id_matrix[category_codes, activity_codes], -1).astype(np.int32)
+
+    def factor_values(self, ids):
+        """
+        Get the factors of some factor IDs.
+
+        Args:
+            ids (numpy.ndarray): Factor IDs from factor_ids
+
+        Returns:
+            numpy.ndarray: Factors in kgCO2e per unit; NaN where the ID is -1
+        """
+        ids = np.asarray(ids)
+        return np.where(ids >= 0, self.factors[np.maximum(ids, 0)], np.nan)
+
+    def version_index(self, ids, dates):
+        """
+        Find the factor version in effect on each row's date (an as-of join).
+
+        Args:
+            ids (numpy.ndarray): Factor IDs from factor_ids
+            dates (array-like): Row dates; missing dates get the table value
+
+        Returns:
+            numpy.ndarray: Positions in the version arrays; -1 where the ID is -1
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        days = pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]')
+        day_numbers = np.where(np.isnat(days), -_DAY_OFFSET, days.astype(np.int64))
+        keys = (np.maximum(ids, 0) << _DAY_BITS) + (day_numbers + _DAY_OFFSET)
+        positions = np.searchsorted(self._version_keys, keys, side='right') - 1
+        return np.where(ids >= 0, positions, -1)
+
+    def factors_as_of(self, ids, dates):
+        """
+        Get the factor and version in effect on each row's date.
+
+        Args:
+            ids (numpy.ndarray): Factor IDs from factor_ids
+            dates (array-like): Row dates
+
+        Returns:
+            tuple: (numpy.ndarray of factors, NaN where the ID is -1;
+                numpy.ndarray of version positions from version_index)
+        """
+        positions = self.version_index(ids, dates)
+        factors = np.where(positions >= 0, self.version_factors[np.maximum(positions, 0)], np.nan)
+        return factors, positions
+
+    def label_codes(self, positions):
+        """
+        Get the version label of version positions as codes into version_label_index.
+
+        Args:
+            positions (numpy.ndarray): Version positions from version_index
+
+        Returns:
+            numpy.ndarray: Label codes; -1 where the position is -1
+        """
+        return np.where(positions >= 0, self.version_label_codes[np.maximum(positions, 0)], -1)
+
+    def lookup(self, category, activity, date=None):
+        """
+        Get the factor, unit and source of an activity.
+
+        Args:
+            category (str): Emission category (legacy names allowed)
+            activity (str): Activity (legacy names allowed)
+            date (datetime, optional): Date the factor should be in effect on;
+                defaults to the latest version
+
+        Returns:
+            dict: factor, unit and source (the version's), or None if not found
+        """
+        factor_id = self.factor_id(category, activity)
+        if factor_id < 0:
+            return None
+        position = self.version_index([factor_id], [pd.Timestamp(date or pd.Timestamp.max.normalize())])[0]
+        return {
+            "factor": float(self.version_factors[position]),
+            "unit": self.units[factor_id],
+            "source": self.version_labels[position],
+        }
+
+    def name(self, factor_id):
+        """
+        Get the category and activity of a factor ID.
+
+        Args:
+            factor_id (int): Factor ID
+
+        Returns:
+            tuple: (category, activity)
+        """
+        return self.category_names[self.category_codes[factor_id]], self.activities[factor_id]
+
+    def activities_of(self, category):
+        """
+        Get the activities of a category.
+
+        Args:
+            category (str): Emission category (legacy names allowed)
+
+        Returns:
+            list: Activity names (shared; do not modify), or an empty list
+        """
+        category = self._category_aliases.get(category, category)
+        return self._activities_by_category.get(category, [])
+
+    def categories(self, scope, with_factors=False):
+        """
+        Get the categories of a scope.
+
+        Args:
+            scope (str): Scope 1, Scope 2 or Scope 3
+            with_factors (bool, optional): Only categories that have factors
+
+        Returns:
+            list: Category names (shared; do not modify), or an empty list
+        """
+        by_scope = self._factor_categories_by_scope if with_factors else self._categories_by_scope
+        return by_scope.get(scope, [])
+
+    def scope_of(self, category):
+        """
+        Get the scope a category belongs to.
+
+        Args:
+            category (str): Emission category (legacy names allowed)
+
+        Returns:
+            str: Scope, or None if the category is unknown
+        """
+        return self._scope_by_category.get(self._category_aliases.get(category, category))
+
+
+# The registry every caller shares, compiled once at import
+FACTOR_REGISTRY = FactorRegistry(
+    BANGLADESH_EMISSION_FACTORS,
+    BANGLADESH_SCOPE_CATEGORIES,
+    LEGACY_CATEGORY_ALIASES,
+    LEGACY_ACTIVITY_ALIASES,
+    EMISSION_FACTOR_VERSIONS,
+)
@@ -0,0 +1,201 @@
+"""
+Emission factor search for YourCarbonFootprint application.
+Ranked, typo-tolerant search over the factor registry, indexed once at import.
+"""
+
+import bisect
+import re
+from emission_factors import BENGALI_SEARCH_TERMS, LEGACY_ACTIVITY_ALIASES, LEGACY_CATEGORY_ALIASES
+from factor_registry import FACTOR_REGISTRY
+
+# How much a query word matching each field of a factor counts
+FIELD_WEIGHTS = {
+    'activity': 3.0,
+    'alias': 2.0,  # legacy names and Bengali terms
+    'category': 1.5,
+    'unit': 0.5,
+    'source': 0.5,
+}
+
+# A query word that only starts an indexed word (typing in progress), or
+# only shares character n-grams with it (a typo), counts for less
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+# Smallest Dice similarity of n-gram sets for a typo to match
+MIN_SIMILARITY = 0.45
+NGRAM_SIZE = 3
+
+# Searches remembered before the cache is cleared
+MAX_CACHED_QUERIES = 1024
+
+_WORD_PATTERN = re.compile(r"[^\s()/,&.\-]+")
+
+
+def tokenize(text):
+    """
+    Split text into lowercase search words.
+
+    Args:
+        text (str): Text, e.g. "Petrol/Gasoline" or "R-410A"
+
+    Returns:
+        list: Words, e.g. ["petrol", "gasoline"] or ["r", "410a"]
+    """
+    return _WORD_PATTERN.findall(str(text).lower())
+
+
+def ngrams(word):
+    """
+    Get the character n-grams of a word, padded so its ends count too.
+
+    Args:
+        word (str): Search word
+
+    Returns:
+        set: N-grams, e.g. {"$di", "die", ..., "el$"} for "diesel"
+    """
+    padded = f"${word}$"
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class FactorSearchIndex:
+    """
+    Inverted index over the activities of a FactorRegistry.
+
+    Every word of an activity's name, category, unit and source, plus its
+    legacy names and Bengali terms, has a posting of factor IDs with the
+    weight of the field it came from. A query word is looked up exactly,
+    as a prefix (binary search in the sorted vocabulary) and, for typos,
+    through the character n-grams it shares with indexed words. Factors
+    are ranked by the sum of their best match per query word, so a query
+    costs a few dictionary lookups regardless of the number of factors.
+    """
+
+    def __init__(self, registry, category_aliases=None, activity_aliases=None, bengali_terms=None):
+        """
+        Build the index.
+
+        Args:
+            registry (FactorRegistry): Factors to index
+            category_aliases (dict, optional): Legacy category name to category
+            activity_aliases (dict, optional): Category to {legacy activity name: activity}
+            bengali_terms (dict, optional): English word to Bengali search terms
+        """
+        self.registry = registry
+        self._postings = {}
+        bengali_terms = bengali_terms or {}
+
+        aliases = {factor_id: [] for factor_id in range(len(registry))}
+        for category, names in (activity_aliases or {}).items():
+            for alias, activity in names.items():
+                aliases[registry.factor_id(category, activity)].append(alias)
+        for alias, category in (category_aliases or {}).items():
+            for activity in registry.activities_of(category):
+                aliases[registry.factor_id(category, activity)].append(alias)
+
+        for factor_id in range(len(registry)):
+            category, activity = registry.name(factor_id)
+            self._add(factor_id, activity, 'activity')
+            self._add(factor_id, category, 'category')
+            self._add(factor_id, registry.units[factor_id], 'unit')
+            self._add(factor_id, registry.sources[factor_id], 'source')
+            for alias in aliases[factor_id]:
+                self._add(factor_id, alias, 'alias')
+            for word in tokenize(f"{category} {activity}"):
+                for term in bengali_terms.get(word, []):
+                    self._add(factor_id, term, 'alias')
+
+        self._vocabulary = sorted(self._postings)
+        self._word_ngrams = {word: ngrams(word) for word in self._vocabulary}
+        self._ngram_postings = {}
+        for word, grams in self._word_ngrams.items():
+            for gram in grams:
+                self._ngram_postings.setdefault(gram, []).append(word)
+        self._cache = {}
+
+    def _add(self, factor_id, text, field):
+        """Post every word of a field's text for a factor, keeping the highest field weight."""
+        for word in tokenize(text):
+            factors = self._postings.setdefault(word, {})
+            factors[factor_id] = max(factors.get(factor_id, 0.0), FIELD_WEIGHTS[field])
+
+    def _match_word(self, word):
+        """Score every factor a query word matches exactly, as a prefix or as a typo."""
+        scores = dict(self._postings.get(word, {}))
+
+        def credit(indexed_word, weight):
+            for factor_id, field_weight in self._postings[indexed_word].items():
+                score = field_weight * weight
+                if score > scores.get(factor_id, 0.0):
+                    scores[factor_id] = score
+
+        start = bisect.bisect_right(self._vocabulary, word)
+        stop = bisect.bisect_left(self._vocabulary, word + '￿', start)
+        for indexed_word in self._vocabulary[start:stop]:
+            credit(indexed_word, PREFIX_WEIGHT)
+
+        if len(word) >= NGRAM_SIZE:
+            grams = ngrams(word)
+            shared = {}
+            for gram in grams:
+                for indexed_word in self._ngram_postings.get(gram, ()):
+                    shared[indexed_word] = shared.get(indexed_word, 0) + 1
+            for indexed_word, count in shared.items():
+                similarity = 2 * count / (len(grams) + len(self._word_ngrams[indexed_word]))
+                if similarity >= MIN_SIMILARITY and indexed_word != word:
+                    credit(indexed_word, FUZZY_WEIGHT * similarity)
+        return scores
+
+    def rank(self, query):
+        """
+        Rank the factors matching a query.
+
+        Results are cached per query, so repeated searches while typing
+        are dictionary lookups.
+
+        Args:
+            query (str): Search text in English or Bengali, e.g. "disel generator"
+
+        Returns:
+            list: (factor_id, score) pairs, best first
+        """
+        key = " ".join(tokenize(query))
+        if key not in self._cache:
+            totals = {}
+            for word in key.split():
+                for factor_id, score in self._match_word(word).items():
+                    totals[factor_id] = totals.get(factor_id, 0.0) + score
+            if len(self._cache) >= MAX_CACHED_QUERIES:
+                self._cache.clear()
+            self._cache[key] = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return self._cache[key]
+
+    def search(self, query, limit=10):
+        """
+        Search emission factors.
+
+        Args:
+            query (str): Search text in English or Bengali, e.g. "electrcity"
+            limit (int, optional): Most results to return; None for all
+
+        Returns:
+            list: Dicts with category, activity, factor, unit, source and
+                score, best match first
+        """
+        results = []
+        for factor_id, score in self.rank(query)[:limit]:
+            category, activity = self.registry.name(factor_id)
+            entry = self.registry.lookup(category, activity)
+            results.append(dict(entry, category=category, activity=activity, score=round(score, 3)))
+        return results
+
+
+# The index every caller shares, built once at import
+FACTOR_SEARCH_INDEX = FactorSearchIndex(
+    FACTOR_REGISTRY,
+    LEGACY_CATEGORY_ALIASES,
+    LEGACY_ACTIVITY_ALIASES,
+    BENGALI_SEARCH_TERMS,
+)
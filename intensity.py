@@ -0,0 +1,121 @@
+"""
+Emission intensity scoring for YourCarbonFootprint application.
+Compares facilities' emissions per unit of output with BANGLADESH_INDUSTRY_BENCHMARKS.
+"""
+
+import pandas as pd
+from emission_factors import BANGLADESH_INDUSTRY_BENCHMARKS
+from periods import to_periods
+from schema import apply_schema
+
+# Benchmarks not expressed in kgCO2e per unit, and what they measure instead
+BENCHMARK_NUMERATORS = {
+    'electricity_intensity': 'electricity_kwh',  # kWh per garment
+}
+
+INTENSITY_COLUMNS = [
+    'facility', 'period', 'industry', 'metric', 'output', 'numerator',
+    'intensity', 'benchmark', 'gap', 'gap_pct', 'percentile'
+]
+
+
+def benchmark_frame():
+    """
+    Get BANGLADESH_INDUSTRY_BENCHMARKS as a table.
+
+    Returns:
+        pandas.DataFrame: industry, metric, benchmark and measure
+            ('emissions_kgCO2e' or 'electricity_kwh') columns
+    """
+    rows = [
+        (industry, metric, value, BENCHMARK_NUMERATORS.get(metric, 'emissions_kgCO2e'))
+        for industry, metrics in BANGLADESH_INDUSTRY_BENCHMARKS.items()
+        for metric, value in metrics.items()
+    ]
+    return pd.DataFrame(rows, columns=['industry', 'metric', 'benchmark', 'measure'])
+
+
+def facility_totals(data, granularity='month'):
+    """
+    Sum emissions and grid electricity use per facility and period.
+
+    Entries without a facility (e.g. from files written before the
+    column existed) cannot be attributed and are left out.
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+        granularity (str, optional): A key of periods.PERIOD_FREQUENCIES
+
+    Returns:
+        pandas.DataFrame: facility, period, emissions_kgCO2e and electricity_kwh columns
+    """
+    data = apply_schema(data)
+    electricity = (data['category'] == 'Electricity') & (data['unit'] == 'kWh')
+    totals = pd.DataFrame({
+        'facility': data['facility'].astype(str).where(data['facility'].notna()),
+        'period': to_periods(data['date'], granularity),
+        'emissions_kgCO2e': data['emissions_kgCO2e'].fillna(0.0),
+        'electricity_kwh': data['quantity'].where(electricity, 0.0).fillna(0.0),
+    })
+    return totals.groupby(['facility', 'period'], as_index=False).sum()
+
+
+def _production_periods(production, granularity):
+    """Get the production table's periods from its 'period' or 'date' column."""
+    if 'period' in production.columns:
+        dates = pd.to_datetime(production['period'].astype(str), errors='coerce')
+    else:
+        dates = pd.to_datetime(production['date'], errors='coerce')
+    return to_periods(dates, granularity)
+
+
+def score_intensity(data, production, granularity='month'):
+    """
+    Score every facility and period against its industry benchmark.
+
+    The production table is joined to per-facility totals and to the
+    benchmark table with two merges, so all facilities and periods are
+    scored in one vectorized pass.
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+        production (pandas.DataFrame): Output per facility and period, with
+            facility, industry, metric (a benchmark name, e.g.
+            'per_piece_garment'), output (units produced) and either period
+            ('2025-07') or date columns
+        granularity (str, optional): A key of periods.PERIOD_FREQUENCIES
+
+    Returns:
+        pandas.DataFrame: INTENSITY_COLUMNS, one row per production row:
+            numerator is the facility's emissions (kgCO2e) or electricity
+            use (kWh) in the period, as the benchmark requires; intensity is
+            numerator / output; gap and gap_pct are intensity minus the
+            benchmark (positive means worse than the benchmark); percentile
+            ranks the intensity among facilities with the same industry,
+            metric and period (1.0 is the most intensive). Rows without a
+            matching benchmark or with no output get NaN scores.
+    """
+    missing = [col for col in ['facility', 'industry', 'metric', 'output'] if col not in production.columns]
+    if 'period' not in production.columns and 'date' not in production.columns:
+        missing.append('period')
+    if missing:
+        raise ValueError(f"Production data is missing columns: {', '.join(missing)}")
+
+    scored = pd.DataFrame({
+        'facility': production['facility'].astype(str),
+        'period': _production_periods(production, granularity),
+        'industry': production['industry'].astype(str),
+        'metric': production['metric'].astype(str),
+        'output': pd.to_numeric(production['output'], errors='coerce'),
+    })
+    scored = scored.merge(facility_totals(data, granularity), on=['facility', 'period'], how='left')
+    scored = scored.merge(benchmark_frame(), on=['industry', 'metric'], how='left')
+
+    totals = scored[['emissions_kgCO2e', 'electricity_kwh']].fillna(0.0)
+    numerator = totals['emissions_kgCO2e'].where(scored['measure'] != 'electricity_kwh', totals['electricity_kwh'])
+    scored['numerator'] = numerator.where(scored['benchmark'].notna())
+    scored['intensity'] = scored['numerator'] / scored['output'].where(scored['output'] > 0)
+    scored['gap'] = scored['intensity'] - scored['benchmark']
+    scored['gap_pct'] = scored['gap'] / scored['benchmark'] * 100
+    scored['percentile'] = scored.groupby(['industry', 'metric', 'period'])['intensity'].rank(pct=True)
+    return scored[INTENSITY_COLUMNS]
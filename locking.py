@@ -0,0 +1,145 @@
+"""
+Cross-process locking for YourCarbonFootprint application.
+Serializes writers to the emissions data and tracks its version.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import EMISSIONS_LOCK_FILE, EMISSIONS_VERSION_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers in this process are serialized
+    fcntl = None
+
+
+class DataFileLock:
+    """
+    Advisory lock and version counter for the emissions data.
+
+    The lock is an fcntl.flock on a separate lock file, so every process that
+    writes the data (app workers, import jobs) takes turns. The version file
+    next to the data holds a counter that every successful write increases;
+    a writer that loaded the data at an older version knows someone else has
+    written since. Time spent waiting for the lock is recorded in stats().
+    """
+
+    def __init__(self, lock_file=EMISSIONS_LOCK_FILE, version_file=EMISSIONS_VERSION_FILE):
+        """
+        Initialize the DataFileLock class.
+
+        Args:
+            lock_file (str, optional): Path to the lock file
+            version_file (str, optional): Path to the version file
+        """
+        self.lock_file = lock_file
+        self.version_file = version_file
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+        self._stats = {
+            "acquisitions": 0,
+            "contended": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    @contextmanager
+    def acquire(self):
+        """
+        Hold the lock for the duration of a with block.
+
+        Re-entrant within a thread; blocks while another thread or process holds it.
+        """
+        start = time.monotonic()
+        contended = not self._thread_lock.acquire(blocking=False)
+        if contended:
+            self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                contended = self._lock_file() or contended
+                self._record_wait(time.monotonic() - start, contended)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._unlock_file()
+        finally:
+            self._thread_lock.release()
+
+    def _lock_file(self):
+        """
+        Take the flock on the lock file.
+
+        Returns:
+            bool: True if another process held the lock and we had to wait
+        """
+        if fcntl is None:
+            return False
+        os.makedirs(os.path.dirname(self.lock_file) or '.', exist_ok=True)
+        self._handle = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+            return True
+
+    def _unlock_file(self):
+        """Release the flock."""
+        if self._handle is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+
+    def _record_wait(self, seconds, contended):
+        """Add one acquisition to the wait-time statistics."""
+        self._stats["acquisitions"] += 1
+        self._stats["total_wait_seconds"] += seconds
+        self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], seconds)
+        if contended:
+            self._stats["contended"] += 1
+
+    def stats(self):
+        """
+        Get lock wait-time statistics for this process.
+
+        Returns:
+            dict: acquisitions, contended (acquisitions that had to wait),
+                total_wait_seconds and max_wait_seconds
+        """
+        with self._thread_lock:
+            return dict(self._stats)
+
+    def read_version(self):
+        """
+        Get the current data version.
+
+        Returns:
+            int: Version number, 0 if the data has never been written under a lock
+        """
+        try:
+            with open(self.version_file, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump_version(self):
+        """
+        Increase the data version; call while holding the lock, after a write.
+
+        Returns:
+            int: The new version
+        """
+        version = self.read_version() + 1
+        tmp_file = f"{self.version_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(str(version))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.version_file)
+        return version
@@ -0,0 +1,223 @@
+"""
+Reporting periods for YourCarbonFootprint application.
+Maps emission dates to calendar and Bangladesh fiscal (July - June) periods
+and to the export-season and monsoon reporting windows.
+"""
+
+import calendar
+import numpy as np
+import pandas as pd
+from config import FISCAL_YEAR_START_MONTH, REPORTING_WINDOWS
+
+# Month the fiscal year ends in, as a pandas frequency anchor ("JUN")
+FISCAL_YEAR_END = calendar.month_abbr[(FISCAL_YEAR_START_MONTH - 2) % 12 + 1].upper()
+
+# Period granularity to pandas period frequency
+PERIOD_FREQUENCIES = {
+    'month': 'M',
+    'quarter': 'Q',
+    'fiscal_quarter': f'Q-{FISCAL_YEAR_END}',
+    'calendar_year': 'Y',
+    'fiscal_year': f'Y-{FISCAL_YEAR_END}',
+}
+
+# Bucket granularities for resampling: periods above plus days, weeks
+# (the work week runs Sunday - Thursday, so weeks end on Saturday) and the
+# seasonal windows of REPORTING_WINDOWS, which leave other months out
+BUCKET_FREQUENCIES = dict(PERIOD_FREQUENCIES, day='D', week='W-SAT')
+BUCKETS = list(BUCKET_FREQUENCIES) + list(REPORTING_WINDOWS)
+
+# Buckets made of whole months, which can also be filled from monthly totals
+MONTH_ALIGNED_BUCKETS = [bucket for bucket in BUCKETS if bucket not in ('day', 'week')]
+
+# Year bases for year-to-date totals and year-over-year comparisons
+YEAR_FREQUENCIES = {
+    'calendar': 'Y',
+    'fiscal': f'Y-{FISCAL_YEAR_END}',
+}
+
+
+def _frequency(granularity):
+    """Get the pandas period frequency for a granularity name."""
+    if granularity not in PERIOD_FREQUENCIES:
+        raise ValueError(f"Unknown period granularity: {granularity}")
+    return PERIOD_FREQUENCIES[granularity]
+
+
+def to_periods(dates, granularity='month'):
+    """
+    Convert dates to periods in one vectorized pass.
+
+    Args:
+        dates (pandas.Series): Dates as datetime64
+        granularity (str, optional): A key of PERIOD_FREQUENCIES
+
+    Returns:
+        pandas.Series: Periods; missing dates become NaT
+    """
+    return dates.dt.to_period(_frequency(granularity))
+
+
+def period_range(periods, granularity='month'):
+    """
+    Get every period from the first to the last of some periods.
+
+    Args:
+        periods (pandas.Series or pandas.PeriodIndex): Periods, possibly with gaps
+        granularity (str, optional): A key of PERIOD_FREQUENCIES
+
+    Returns:
+        pandas.PeriodIndex: Consecutive periods without gaps
+    """
+    periods = pd.PeriodIndex(periods, freq=_frequency(granularity)).dropna()
+    if len(periods) == 0:
+        return pd.PeriodIndex([], freq=_frequency(granularity))
+    return pd.period_range(periods.min(), periods.max(), freq=_frequency(granularity))
+
+
+def periods_per_year(granularity):
+    """
+    Get how many periods of a granularity make up one year.
+
+    Args:
+        granularity (str): A key of PERIOD_FREQUENCIES
+
+    Returns:
+        int: 12 for months, 4 for quarters, 1 for years
+    """
+    return {'M': 12, 'Q': 4, 'Y': 1}[_frequency(granularity)[0]]
+
+
+def year_of(periods, year_basis='fiscal'):
+    """
+    Get the calendar or fiscal year each period falls in.
+
+    Args:
+        periods (pandas.PeriodIndex): Month, quarter or year periods
+        year_basis (str, optional): "fiscal" (July - June) or "calendar"
+
+    Returns:
+        pandas.PeriodIndex: Annual periods; a fiscal year is labelled by the
+            year it ends in (July 2024 - June 2025 is 2025)
+    """
+    if year_basis not in YEAR_FREQUENCIES:
+        raise ValueError(f"Unknown year basis: {year_basis}")
+    return periods.asfreq(YEAR_FREQUENCIES[year_basis], how='end')
+
+
+def period_labels(periods):
+    """
+    Get display labels for periods.
+
+    Fiscal years are shown as "FY2024-25" and fiscal quarters as
+    "FY2024-25 Q1"; other periods use pandas' notation ("2025-07",
+    "2025Q3", "2025").
+
+    Args:
+        periods (pandas.PeriodIndex): Periods
+
+    Returns:
+        pandas.Index: Labels
+    """
+    if FISCAL_YEAR_START_MONTH == 1:
+        return periods.astype(str)
+    if periods.freqstr == PERIOD_FREQUENCIES['fiscal_year']:
+        return pd.Index([f"FY{year - 1}-{year % 100:02d}" for year in periods.year])
+    if periods.freqstr == PERIOD_FREQUENCIES['fiscal_quarter']:
+        return pd.Index([f"FY{year - 1}-{year % 100:02d} Q{quarter}"
+                         for year, quarter in zip(periods.qyear, periods.quarter)])
+    return periods.astype(str)
+
+
+def bucket_starts(dates, bucket):
+    """
+    Assign each date to a resampling bucket, in one vectorized pass.
+
+    Args:
+        dates (pandas.Series): Dates as datetime64
+        bucket (str): One of BUCKETS, e.g. 'week', 'fiscal_year' or 'monsoon'
+
+    Returns:
+        numpy.ndarray: datetime64[ns] first day of each date's bucket; NaT for
+            missing dates and for dates outside a seasonal window
+    """
+    if bucket in BUCKET_FREQUENCIES:
+        starts = dates.dt.to_period(BUCKET_FREQUENCIES[bucket]).dt.start_time
+        return starts.to_numpy(dtype='datetime64[ns]')
+    if bucket not in REPORTING_WINDOWS:
+        raise ValueError(f"Unknown resampling bucket: {bucket}")
+
+    first_month, last_month = REPORTING_WINDOWS[bucket]
+    length = (last_month - first_month) % 12 + 1
+    # Months since year 0, and how far each date is into a window
+    months = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype='float64')
+    offset = (months - (first_month - 1)) % 12
+    start_months = np.where(offset < length, months - offset, np.nan)
+    valid = ~np.isnan(start_months)
+    starts = np.full(len(start_months), np.datetime64('NaT'), dtype='datetime64[ns]')
+    start_months = start_months[valid].astype(np.int64)
+    starts[valid] = ((start_months // 12 - 1970) * 12 + start_months % 12).astype('datetime64[M]')
+    return starts
+
+
+def bucket_labels(starts, bucket):
+    """
+    Get display labels for bucket start dates.
+
+    Args:
+        starts (array-like): Bucket start dates from bucket_starts
+        bucket (str): One of BUCKETS
+
+    Returns:
+        pandas.Index: Labels, e.g. "2025-07-13", "Week of 2025-07-13",
+            "FY2024-25", "2024-25 export season" or "2025 monsoon"
+    """
+    starts = pd.DatetimeIndex(starts)
+    if bucket == 'day':
+        return pd.Index(starts.strftime('%Y-%m-%d'))
+    if bucket == 'week':
+        return pd.Index("Week of " + starts.strftime('%Y-%m-%d'))
+    if bucket in PERIOD_FREQUENCIES:
+        return period_labels(starts.to_period(PERIOD_FREQUENCIES[bucket]))
+
+    first_month, last_month = REPORTING_WINDOWS[bucket]
+    name = bucket.replace('_', ' ')
+    if last_month < first_month:
+        # Window spans the turn of the year
+        return pd.Index([f"{year}-{(year + 1) % 100:02d} {name}" for year in starts.year])
+    return pd.Index([f"{year} {name}" for year in starts.year])
+
+
+def resample_frame(data, bucket, by=None, date_column='date', starts=None):
+    """
+    Total emissions per bucket (and group).
+
+    Args:
+        data (pandas.DataFrame): Emissions rows, or cube cells (date_column='month';
+            their rows column is summed rather than counted)
+        bucket (str): One of BUCKETS
+        by (list, optional): Columns to group by as well, e.g. ['scope']
+        date_column (str, optional): Column holding the dates
+        starts (numpy.ndarray, optional): Precomputed bucket_starts of data
+
+    Returns:
+        pandas.DataFrame: bucket (first day), label, the by columns,
+            emissions_kgCO2e and rows, ordered by bucket; rows outside a
+            seasonal window are left out
+    """
+    by = list(by or [])
+    if date_column == 'month' and bucket not in MONTH_ALIGNED_BUCKETS:
+        raise ValueError(f"Monthly totals cannot be resampled by {bucket}")
+    if starts is None:
+        starts = bucket_starts(data[date_column], bucket)
+    rows = data['rows'] if 'rows' in data.columns else pd.Series(1, index=data.index)
+    frame = pd.DataFrame({
+        'bucket': starts,
+        'emissions_kgCO2e': data['emissions_kgCO2e'].fillna(0.0).to_numpy(),
+        'rows': rows.to_numpy(),
+    })
+    for col in by:
+        frame[col] = data[col].to_numpy()
+    result = frame.groupby(['bucket'] + by, observed=True, sort=True)[['emissions_kgCO2e', 'rows']].sum().reset_index()
+    result.insert(1, 'label', np.asarray(bucket_labels(result['bucket'], bucket)))
+    return result
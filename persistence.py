@@ -0,0 +1,265 @@
+"""
+Write-behind persistence for YourCarbonFootprint application.
+Coalesces bursts of edits into a single debounced flush to the storage backend.
+"""
+
+import atexit
+import threading
+import time
+import pandas as pd
+from config import WRITE_BEHIND_DELAY_SECONDS, WRITE_BEHIND_MAX_DELAY_SECONDS
+from locking import DataFileLock
+from schema import apply_schema, concat_emissions, row_hashes
+
+
+def _row_keys(data):
+    """
+    Identify rows by content.
+
+    Returns:
+        pandas.MultiIndex: (row hash, occurrence) per row, so duplicate rows stay distinct
+    """
+    hashes = row_hashes(data)
+    occurrences = hashes.groupby(hashes).cumcount()
+    return pd.MultiIndex.from_arrays([hashes.to_numpy(), occurrences.to_numpy()])
+
+
+def merge_changes(base, ours, theirs):
+    """
+    Three-way merge of emissions data edited by two writers.
+
+    Rows we deleted since base are removed from theirs and rows we added
+    are appended, so changes made by the other writer are kept.
+
+    Args:
+        base (pandas.DataFrame): Data as it was when we loaded it
+        ours (pandas.DataFrame): Our edited data
+        theirs (pandas.DataFrame): Data currently in storage
+
+    Returns:
+        pandas.DataFrame: Merged data
+    """
+    base_keys, our_keys, their_keys = _row_keys(base), _row_keys(ours), _row_keys(theirs)
+    deleted = base_keys.difference(our_keys)
+    kept = theirs[~their_keys.isin(deleted)]
+    added = ours[~our_keys.isin(base_keys)]
+    return concat_emissions(apply_schema(kept), added)
+
+
+class WriteBehindWriter:
+    """
+    Buffers changes to the emissions data and writes them to storage later.
+
+    Appended rows are kept as pending batches and flushed with one
+    storage.append call; any other change (delete, edit) marks the whole
+    frame dirty and is flushed with one storage.save call. Each change
+    restarts the flush timer, so a burst of edits results in one write.
+    A flush is never delayed beyond max_delay after the first pending change.
+
+    Flushes hold a cross-process DataFileLock. If another process has written
+    since this writer's base version, the stored data is re-read and our
+    changes are merged into it (see merge_changes) instead of overwriting it;
+    on_merge is then called with the merged data. After each write a
+    snapshot is recorded if a SnapshotStore is given, and on_write is
+    called with the new data version.
+    """
+
+    def __init__(self, storage, flush_delay=WRITE_BEHIND_DELAY_SECONDS,
+                 max_delay=WRITE_BEHIND_MAX_DELAY_SECONDS, file_lock=None, snapshots=None):
+        """
+        Initialize the WriteBehindWriter class.
+
+        Args:
+            storage (StorageBackend): Backend the changes are written to
+            flush_delay (float, optional): Seconds of quiet before flushing;
+                0 writes every change immediately
+            max_delay (float, optional): Longest time a change may stay unflushed
+            file_lock (DataFileLock, optional): Cross-process lock and version counter
+            snapshots (SnapshotStore, optional): Store recording a snapshot per write
+        """
+        self.storage = storage
+        self.flush_delay = flush_delay
+        self.max_delay = max_delay
+        self.file_lock = file_lock or DataFileLock()
+        self.snapshots = snapshots
+        # Held while changes are recorded or written; callers changing the
+        # data they pass in should hold it too
+        self.lock = threading.RLock()
+        self._timer = None
+        self._pending_rows = []
+        self._data = None
+        self._full_rewrite = False
+        self._first_change_at = None
+        self._base_data = None
+        self.base_version = None
+        self.on_merge = None
+        self.on_write = None
+        self.last_error = None
+        atexit.register(self.close)
+
+    @property
+    def dirty(self):
+        """bool: True if there are changes that have not been written yet."""
+        with self.lock:
+            return self._full_rewrite or len(self._pending_rows) > 0
+
+    def set_base(self, data, version):
+        """
+        Record the data as read from storage and the version it was read at.
+
+        Args:
+            data (pandas.DataFrame): Emissions data read from storage, or None
+            version (int): Data version at the time of the read
+        """
+        with self.lock:
+            self._base_data = data
+            self.base_version = version
+
+    def is_stored(self, data):
+        """
+        Check whether a frame is the data as last read or written.
+
+        Args:
+            data (pandas.DataFrame): Emissions data, or None if not loaded
+
+        Returns:
+            bool: True if data is the frame recorded by the last read or
+                write and no changes are pending
+        """
+        with self.lock:
+            return not self.dirty and data is self._base_data
+
+    def mark_appended(self, new_rows, data=None):
+        """
+        Record rows appended to the dataset.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added
+            data (pandas.DataFrame, optional): Complete emissions data including new_rows
+        """
+        with self.lock:
+            self._data = data
+            if not self._full_rewrite:
+                self._pending_rows.append(new_rows)
+            self._schedule()
+
+    def mark_dirty(self, data):
+        """
+        Record a change that requires rewriting the whole dataset.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        with self.lock:
+            self._data = data
+            self._full_rewrite = True
+            self._pending_rows = []
+            self._schedule()
+
+    def _schedule(self):
+        """Restart the flush timer, or flush now if the delay is used up."""
+        now = time.monotonic()
+        if self._first_change_at is None:
+            self._first_change_at = now
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        remaining = self.max_delay - (now - self._first_change_at)
+        delay = min(self.flush_delay, remaining)
+        if delay <= 0:
+            self.flush()
+            return
+
+        self._timer = threading.Timer(delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self):
+        """Flush from the timer thread, keeping the error for the next explicit flush."""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing emissions data: {str(e)}")
+
+    def flush(self):
+        """
+        Write all pending changes to storage now.
+
+        Raises:
+            Exception: Any storage error; pending changes are kept for a retry
+        """
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.dirty:
+                return
+
+            try:
+                with self.file_lock.acquire():
+                    merged = self._write()
+                    self._pending_rows = []
+                    self._full_rewrite = False
+                    self._first_change_at = None
+                    self.last_error = None
+                    # Callbacks run under the file lock, so anything they
+                    # persist matches the version just written
+                    if merged is not None and self.on_merge is not None:
+                        self.on_merge(merged)
+                    if self.on_write is not None:
+                        self.on_write(self.base_version)
+            except Exception as e:
+                self.last_error = e
+                raise
+
+    def _write(self):
+        """
+        Write pending changes; call while holding the file lock.
+
+        Returns:
+            pandas.DataFrame: Merged data if another process had written
+                since our base version, otherwise None
+        """
+        stale = self.base_version is not None and self.file_lock.read_version() != self.base_version
+        if stale:
+            self.storage.refresh()
+
+        data = self._data
+        new_rows = None
+        merged = None
+        if self._full_rewrite:
+            if stale:
+                merged = merge_changes(self._base_data, self._data, self.storage.load())
+                data = merged
+            self.storage.save(data)
+        else:
+            new_rows = pd.concat(self._pending_rows, ignore_index=True)
+            if stale and data is not None:
+                # Our data is base plus new_rows, so the merge is theirs plus new_rows
+                merged = concat_emissions(apply_schema(self.storage.load()), new_rows)
+                data = merged
+            self.storage.append(new_rows, data)
+
+        self._base_data = data
+        self.base_version = self.file_lock.bump_version()
+        self._take_snapshot(data, new_rows)
+        return merged
+
+    def _take_snapshot(self, data, new_rows):
+        """Record a snapshot of what was just written; failures do not fail the write."""
+        if self.snapshots is None:
+            return
+        try:
+            if data is not None:
+                self.snapshots.take(data, self.base_version)
+            elif self.storage.supports_queries:
+                self.snapshots.take_appended(new_rows, self.storage, self.base_version)
+        except Exception as e:
+            print(f"Error taking snapshot: {str(e)}")
+
+    def close(self):
+        """Flush pending changes and stop the timer."""
+        self.flush()
+        atexit.unregister(self.close)
@@ -0,0 +1,200 @@
+"""
+Bulk emissions recalculation for YourCarbonFootprint application.
+Re-derives emissions from the factor registry for whole DataFrames at once.
+"""
+
+import numpy as np
+import pandas as pd
+from factor_registry import FACTOR_REGISTRY
+from units import FACTOR_PER_ENTERED_UNIT, normalize_units
+
+# Columns recalculate_emissions adds next to the data's own
+RECALCULATION_COLUMNS = ['registry_factor', 'factor_deviates', 'unit_problem']
+
+# Per-row record of the factor version used; entries with their own factor are "custom"
+FACTOR_VERSION_COLUMN = 'factor_version'
+CUSTOM_FACTOR_VERSION = 'custom'
+
+# Stored factors within this relative difference match the registry
+FACTOR_TOLERANCE = 1e-6
+
+
+def _matches(stored, factors):
+    """Whether stored factors equal registry factors (NaN never matches)."""
+    return np.isclose(stored, factors, rtol=FACTOR_TOLERANCE, atol=0.0)
+
+
+def _column(df, name):
+    """A float column as a NumPy array."""
+    return df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _version_categories(registry):
+    """Categories of the factor_version column: every version label, then CUSTOM_FACTOR_VERSION."""
+    return registry.version_label_index.append(pd.Index([CUSTOM_FACTOR_VERSION]))
+
+
+def _versions(codes, registry):
+    """Build the factor_version column from codes into _version_categories."""
+    return pd.Categorical.from_codes(codes, categories=_version_categories(registry))
+
+
+def _recorded_codes(df, registry):
+    """Codes into _version_categories of the version each row's stored factor is."""
+    custom = len(registry.version_label_index)
+    ids = registry.factor_ids(df['category'], df['activity'])
+    stored = _column(df, 'emission_factor')
+    factors, positions = registry.factors_as_of(ids, df['date'])
+    matched = _matches(stored, factors)
+    codes = np.where(matched, registry.label_codes(positions), custom)
+
+    for factor_id in registry.versioned_ids:
+        rows = ~matched & (ids == factor_id)
+        if not rows.any():
+            continue
+        for position in np.flatnonzero(registry.version_ids == factor_id):
+            same = rows & _matches(stored, registry.version_factors[position])
+            codes[same] = registry.version_label_codes[position]
+    return codes
+
+
+def record_factor_versions(df, registry=FACTOR_REGISTRY):
+    """
+    Work out which factor version each row's stored emission factor is.
+
+    A stored factor equal to the version in effect on the row's date is
+    that version. Otherwise, for the few activities with several versions,
+    it may be another of them (e.g. an older value entered before a new
+    one was published); anything else is CUSTOM_FACTOR_VERSION.
+
+    Args:
+        df (pandas.DataFrame): Emissions rows with date, category, activity
+            and emission_factor columns
+        registry (FactorRegistry, optional): Registry to take versions from
+
+    Returns:
+        pandas.Categorical: Version labels (factor sources), one per row
+    """
+    return _versions(_recorded_codes(df, registry), registry)
+
+
+def recalculate_emissions(df, use_registry=True, registry=FACTOR_REGISTRY):
+    """
+    Recalculate emissions_kgCO2e for every row of a DataFrame.
+
+    Each row's (category, activity) is resolved to a registry factor ID
+    for the whole frame at once (see FactorRegistry.factor_ids), and the
+    version in effect on the row's date is picked with one as-of search
+    (see FactorRegistry.factors_as_of), so the cost is a few vectorized
+    passes over the columns.
+
+    Quantities are first converted to the unit of their registry factor
+    (see units.normalize_units). Rows whose unit cannot be converted keep
+    their stored factor and are reported in unit_problem.
+
+    Args:
+        df (pandas.DataFrame): Emissions data with date, category, activity,
+            quantity and emission_factor columns
+        use_registry (bool, optional): Replace stored factors with the
+            registry's where it has one; otherwise keep the stored factors
+            and only recompute quantity * emission_factor
+        registry (FactorRegistry, optional): Registry to take factors from
+
+    Returns:
+        pandas.DataFrame: Copy of df with quantity, unit, emission_factor,
+            emissions_kgCO2e and factor_version rewritten, plus
+            registry_factor (the version in effect on the row's date; NaN
+            for activities the registry does not know), factor_deviates
+            (stored factor differs from it) and unit_problem ('' unless the
+            row's unit cannot be converted to the factor's) columns
+    """
+    # Stored emissions are quantity * emission_factor, so factors are per the stored unit
+    df, unit_problems = normalize_units(df, FACTOR_PER_ENTERED_UNIT, registry)
+    convertible = (unit_problems == '').to_numpy()
+
+    custom = len(registry.version_label_index)
+    ids = registry.factor_ids(df['category'], df['activity'])
+    registry_factor, positions = registry.factors_as_of(ids, df['date'])
+    stored = _column(df, 'emission_factor')
+    known = (positions >= 0) & convertible
+    deviates = known & ~_matches(stored, registry_factor)
+
+    if use_registry:
+        factor = np.where(known, registry_factor, stored)
+        codes = np.where(known, registry.label_codes(positions), custom)
+    else:
+        factor = stored
+        codes = np.where(convertible, _recorded_codes(df, registry), custom)
+    return df.assign(**{
+        'emission_factor': factor,
+        'emissions_kgCO2e': _column(df, 'quantity') * factor,
+        FACTOR_VERSION_COLUMN: _versions(codes, registry),
+        'registry_factor': registry_factor,
+        'factor_deviates': deviates,
+        'unit_problem': unit_problems,
+    })
+
+
+def restate_emissions(df, registry=FACTOR_REGISTRY):
+    """
+    Move rows to the factor version now in effect on their date.
+
+    Only rows whose recorded factor_version is a registry version other
+    than the one now in effect (e.g. dated after the effective date of a
+    newly published version) get a new factor and emissions; entries with
+    a custom factor are left alone. Rows without a recorded version, or
+    with one the registry no longer has, are first given one with
+    record_factor_versions. Versions are compared as categorical codes.
+
+    The work is incremental: only rows of activities with several
+    versions (FactorRegistry.versioned_ids) and rows without a recorded
+    version can need restating, so the as-of search and unit conversion
+    (see units.normalize_units) run on those rows alone, and only the
+    restated rows' values are replaced. Rows whose unit cannot be
+    converted to the factor's are not restated.
+
+    Args:
+        df (pandas.DataFrame): Emissions data
+        registry (FactorRegistry, optional): Registry to take versions from
+
+    Returns:
+        tuple: (DataFrame with the restated rows and recorded versions,
+            numpy boolean array of the restated rows)
+    """
+    custom = len(registry.version_label_index)
+    if FACTOR_VERSION_COLUMN in df.columns:
+        recorded = pd.Categorical(df[FACTOR_VERSION_COLUMN], categories=_version_categories(registry)).codes.copy()
+    else:
+        recorded = np.full(len(df), -1, dtype=np.int64)
+    unrecorded = recorded < 0
+    if unrecorded.any():
+        recorded[unrecorded] = _recorded_codes(df[unrecorded], registry)
+
+    # Only activities with several versions can have moved to another one
+    ids = registry.factor_ids(df['category'], df['activity'])
+    candidates = np.flatnonzero(np.isin(ids, registry.versioned_ids) & (recorded != custom))
+    rows, unit_problems = normalize_units(df.iloc[candidates], FACTOR_PER_ENTERED_UNIT, registry)
+    factors, positions = registry.factors_as_of(ids[candidates], rows['date'])
+    current = registry.label_codes(positions)
+    moved = (positions >= 0) & (recorded[candidates] != current) & (unit_problems == '').to_numpy()
+
+    restate = np.zeros(len(df), dtype=bool)
+    restate[candidates[moved]] = True
+    changes = {FACTOR_VERSION_COLUMN: None}
+    if moved.any():
+        targets = candidates[moved]
+        quantity = _column(rows, 'quantity')[moved]
+        for column, values in (('quantity', quantity), ('emission_factor', factors[moved]),
+                               ('emissions_kgCO2e', quantity * factors[moved])):
+            column_values = _column(df, column).copy()
+            column_values[targets] = values
+            changes[column] = column_values
+        # The unit column is only rebuilt if a restated row's unit was converted
+        units = rows['unit'].to_numpy(dtype=object)[moved]
+        if (df['unit'].iloc[targets].to_numpy(dtype=object) != units).any():
+            column_values = df['unit'].to_numpy(dtype=object, copy=True)
+            column_values[targets] = units
+            changes['unit'] = column_values
+        recorded[targets] = current[moved]
+    changes[FACTOR_VERSION_COLUMN] = _versions(recorded, registry)
+    return df.assign(**changes), restate
@@ -13,6 +13,28 @@ import os
 from datetime import datetime
 import base64
 from io import BytesIO
+from cube import EmissionsCube
+from periods import resample_frame
+
+
+def _as_cube(data):
+    """Get an EmissionsCube for chart input given as a cube or raw rows."""
+    if isinstance(data, EmissionsCube):
+        return data
+    return EmissionsCube.from_data(data)
+
+
+def _resample(data, granularity, by=None):
+    """
+    Total chart input per time bucket.
+
+    Cubes are resampled from their monthly cells, so they support the
+    month-aligned buckets; raw rows support every bucket in periods.BUCKETS.
+    """
+    if isinstance(data, EmissionsCube):
+        return resample_frame(data.cells, granularity, by, date_column='month')
+    return resample_frame(data, granularity, by)
+
 
 class ReportGenerator:
     def __init__(self, data_handler):
@@ -35,6 +57,7 @@ class ReportGenerator:
         try:
             # Get filtered data
             data = self.data_handler.get_filtered_data(start_date, end_date)
+            cube = self.data_handler.get_cube(start_date, end_date)
             
             if len(data) == 0:
                 return False, "No data available for the selected period."
@@ -66,18 +89,18 @@ class ReportGenerator:
             pdf.cell(0, 10, "Summary", 0, 1)
             pdf.set_font("Arial", "", 12)
             
-            total_emissions = data['emissions_kgCO2e'].sum()
+            total_emissions = cube.total()
             pdf.cell(0, 10, f"Total Emissions: {total_emissions:.2f} kgCO2e", 0, 1)
             
             # Emissions by scope
-            scope_data = data.groupby('scope')['emissions_kgCO2e'].sum().reset_index()
+            scope_data = cube.rollup('scope')
             pdf.ln(5)
             pdf.cell(0, 10, "Emissions by Scope:", 0, 1)
             for _, row in scope_data.iterrows():
                 pdf.cell(0, 10, f"{row['scope']}: {row['emissions_kgCO2e']:.2f} kgCO2e ({row['emissions_kgCO2e'] / total_emissions * 100:.1f}%)", 0, 1)
             
             # Emissions by category
-            category_data = data.groupby('category')['emissions_kgCO2e'].sum().reset_index()
+            category_data = cube.rollup('category')
             pdf.ln(5)
             pdf.cell(0, 10, "Top Categories:", 0, 1)
             for _, row in category_data.nlargest(5, 'emissions_kgCO2e').iterrows():
@@ -146,12 +169,12 @@ class ReportGenerator:
         Create pie chart of emissions by scope.
         
         Args:
-            data (pandas.DataFrame): Emissions data
+            data (EmissionsCube or pandas.DataFrame): Emissions cube, or raw emissions rows
             
         Returns:
             plotly.graph_objects.Figure: Pie chart figure
         """
-        scope_data = data.groupby('scope')['emissions_kgCO2e'].sum().reset_index()
+        scope_data = _as_cube(data).rollup('scope')
         fig = px.pie(
             scope_data, 
             values='emissions_kgCO2e', 
@@ -176,12 +199,12 @@ class ReportGenerator:
         Create bar chart of emissions by category.
         
         Args:
-            data (pandas.DataFrame): Emissions data
+            data (EmissionsCube or pandas.DataFrame): Emissions cube, or raw emissions rows
             
         Returns:
             plotly.graph_objects.Figure: Bar chart figure
         """
-        category_data = data.groupby('category')['emissions_kgCO2e'].sum().reset_index()
+        category_data = _as_cube(data).rollup('category')
         category_data = category_data.sort_values('emissions_kgCO2e', ascending=False)
         fig = px.bar(
             category_data, 
@@ -200,43 +223,42 @@ class ReportGenerator:
         )
         return fig
     
-    def create_time_series_chart(self, data):
+    def create_time_series_chart(self, data, granularity='month'):
         """
         Create time series chart of emissions over time.
         
         Args:
-            data (pandas.DataFrame): Emissions data
+            data (EmissionsCube or pandas.DataFrame): Emissions cube, or raw emissions rows
+            granularity (str, optional): Time bucket, one of periods.BUCKETS
+                ('day' and 'week' need raw rows)
             
         Returns:
             plotly.graph_objects.Figure: Line chart figure
         """
-        if 'date' not in data.columns or len(data) == 0:
+        axis_title = granularity.replace('_', ' ').title()
+        time_data = _resample(data, granularity, ['scope'])
+        if len(time_data) == 0:
             # Create empty figure if no data
             fig = go.Figure()
             fig.update_layout(
                 title='Emissions Over Time',
-                xaxis_title="Month",
+                xaxis_title=axis_title,
                 yaxis_title="Emissions (kgCO2e)",
                 font=dict(size=12),
                 margin=dict(t=50, b=50, l=50, r=20)
             )
             return fig
         
-        # Group by month and scope
-        time_data = data.copy()
-        time_data['month'] = pd.to_datetime(time_data['date']).dt.strftime('%Y-%m')
-        time_data = time_data.groupby(['month', 'scope'])['emissions_kgCO2e'].sum().reset_index()
-        
         fig = px.line(
             time_data, 
-            x='month', 
+            x='label', 
             y='emissions_kgCO2e',
             color='scope',
             markers=True,
             title='Emissions Over Time'
         )
         fig.update_layout(
-            xaxis_title="Month",
+            xaxis_title=axis_title,
             yaxis_title="Emissions (kgCO2e)",
             legend_title="Scope",
             font=dict(size=12),
@@ -249,13 +271,16 @@ class ReportGenerator:
         Create treemap of emissions by scope, category, and activity.
         
         Args:
-            data (pandas.DataFrame): Emissions data
+            data (EmissionsCube or pandas.DataFrame): Emissions cube, or raw emissions rows
             
         Returns:
             plotly.graph_objects.Figure: Treemap figure
         """
+        # Plotly aggregates the color column, which categoricals do not support
+        tree_data = _as_cube(data).rollup('scope', 'category', 'activity')
+        tree_data = tree_data.astype({'scope': str, 'category': str, 'activity': str})
         fig = px.treemap(
-            data,
+            tree_data,
             path=['scope', 'category', 'activity'],
             values='emissions_kgCO2e',
             color='scope',
@@ -272,41 +297,41 @@ class ReportGenerator:
         )
         return fig
     
-    def create_monthly_comparison_chart(self, data):
+    def create_monthly_comparison_chart(self, data, granularity='month'):
         """
         Create bar chart comparing emissions by month.
         
         Args:
-            data (pandas.DataFrame): Emissions data
+            data (EmissionsCube or pandas.DataFrame): Emissions cube, or raw emissions rows
+            granularity (str, optional): Time bucket to compare instead of
+                months, one of periods.BUCKETS ('day' and 'week' need raw rows)
             
         Returns:
             plotly.graph_objects.Figure: Bar chart figure
         """
-        if 'date' not in data.columns or len(data) == 0:
+        axis_title = granularity.replace('_', ' ').title()
+        title = 'Monthly Emissions Comparison' if granularity == 'month' else f"Emissions by {axis_title}"
+        period_data = _resample(data, granularity)
+        if len(period_data) == 0:
             # Create empty figure if no data
             fig = go.Figure()
             fig.update_layout(
-                title='Monthly Emissions Comparison',
-                xaxis_title="Month",
+                title=title,
+                xaxis_title=axis_title,
                 yaxis_title="Emissions (kgCO2e)",
                 font=dict(size=12),
                 margin=dict(t=50, b=50, l=50, r=20)
             )
             return fig
         
-        # Group by month
-        monthly_data = data.copy()
-        monthly_data['month'] = pd.to_datetime(monthly_data['date']).dt.strftime('%Y-%m')
-        monthly_data = monthly_data.groupby('month')['emissions_kgCO2e'].sum().reset_index()
-        
         fig = px.bar(
-            monthly_data,
-            x='month',
+            period_data,
+            x='label',
             y='emissions_kgCO2e',
-            title='Monthly Emissions Comparison'
+            title=title
         )
         fig.update_layout(
-            xaxis_title="Month",
+            xaxis_title=axis_title,
             yaxis_title="Emissions (kgCO2e)",
             font=dict(size=12),
             margin=dict(t=50, b=50, l=50, r=20)
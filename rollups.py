@@ -0,0 +1,269 @@
+"""
+Yearly emissions rollups for YourCarbonFootprint application.
+Freezes the totals of closed fiscal years so multi-year trends skip their rows.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from periods import PERIOD_FREQUENCIES, period_labels
+from schema import date_range_positions
+from storage import _atomic_write
+
+FISCAL_YEAR_FREQUENCY = PERIOD_FREQUENCIES['fiscal_year']
+
+# Breakdowns kept in every rollup, each as {value: [emissions, rows]}
+ROLLUP_GROUPS = ('scope', 'category', 'data_quality')
+
+TREND_COLUMNS = ['bucket', 'label', 'emissions_kgCO2e', 'rows', 'frozen']
+
+
+def fiscal_year(date):
+    """
+    Get the fiscal year a date falls in.
+
+    Args:
+        date (datetime): Date
+
+    Returns:
+        int: Year the fiscal year ends in (July 2024 - June 2025 is 2025)
+    """
+    return pd.Timestamp(date).to_period(FISCAL_YEAR_FREQUENCY).year
+
+
+def _year_bounds(year):
+    """First and last day of a fiscal year."""
+    period = pd.Period(year, freq=FISCAL_YEAR_FREQUENCY)
+    return period.start_time.normalize(), period.end_time.normalize()
+
+
+def _group_keys(rows, name):
+    """Values of a breakdown column as strings; '' where missing, or for every row if the column is absent."""
+    if name not in rows.columns:
+        return np.full(len(rows), '', dtype=object)
+    values = rows[name].astype(object)
+    return values.where(values.notna(), '').astype(str).to_numpy()
+
+
+def summarize_rows(rows):
+    """
+    Build a rollup record from emission rows.
+
+    Rows without a value for a breakdown are counted under ''.
+
+    Args:
+        rows (pandas.DataFrame): Emissions rows of one year
+
+    Returns:
+        dict: total, rows, and per-value [emissions, rows] pairs for each of ROLLUP_GROUPS
+    """
+    emissions = rows['emissions_kgCO2e'].fillna(0.0)
+    record = {'total': float(emissions.sum()), 'rows': len(rows)}
+    for name in ROLLUP_GROUPS:
+        grouped = emissions.groupby(_group_keys(rows, name))
+        sums = grouped.sum()
+        record[name] = {
+            str(key): [value, count] for key, value, count in zip(sums.index, sums.tolist(), grouped.size().tolist())
+        }
+    return record
+
+
+class YearlyRollups:
+    """
+    Frozen per-fiscal-year totals of the emissions data.
+
+    Once a fiscal year has ended its totals (overall, per scope, per
+    category, entry count and data-quality mix) are computed once and kept
+    as an immutable record, persisted next to the emissions data. Trend
+    queries combine these records with a live aggregation of the open
+    year, so their cost depends on the rows of the open year, not on the
+    length of the history. A back-dated add or delete drops the record of
+    the year it touches, which is then frozen again from the current rows.
+
+    The records are keyed on the data version they are up to date with,
+    like the running aggregates and the cube: the owner moves them to a
+    new version when it drops the years a change touched, and refresh()
+    freezes every year again after any other change (e.g. an edit or a
+    restatement that keeps the row count).
+    """
+
+    def __init__(self, storage=None):
+        """
+        Initialize empty rollups.
+
+        Args:
+            storage (str, optional): Name of the storage backend the data lives in
+        """
+        self.storage = storage
+        self.records = {}
+        # Data version the records are up to date with
+        self.version = None
+
+    def closed_through(self, today=None):
+        """
+        Get the last closed fiscal year.
+
+        Args:
+            today (datetime, optional): Current date; defaults to today
+
+        Returns:
+            int: Fiscal year before the one today falls in
+        """
+        return fiscal_year(today or pd.Timestamp.today()) - 1
+
+    def invalidate(self, dates):
+        """
+        Drop the records of the years some changed rows fall in.
+
+        Args:
+            dates (pandas.Series): Dates of the added or deleted rows
+
+        Returns:
+            list: Fiscal years whose records were dropped
+        """
+        dates = pd.to_datetime(pd.Series(dates), errors='coerce').dropna()
+        if len(dates) == 0:
+            return []
+        years = np.unique(dates.dt.to_period(FISCAL_YEAR_FREQUENCY).dt.year.to_numpy())
+        return [int(year) for year in years if self.records.pop(int(year), None) is not None]
+
+    def refresh(self, data, version, today=None):
+        """
+        Freeze every closed year of the data that has no record.
+
+        If the records are not up to date with the data's version (the data
+        changed in a way they were not told about), every record is dropped
+        and frozen again. Finding a year's rows is a binary search on the
+        date-sorted data.
+
+        Args:
+            data (pandas.DataFrame): Emissions data sorted by schema.sort_by_date
+            version (int): Data version of data
+            today (datetime, optional): Current date; defaults to today
+
+        Returns:
+            bool: True if any record was added, replaced or dropped
+        """
+        dates = data['date'].dropna()
+        last_closed = self.closed_through(today)
+        if version != self.version:
+            stale = list(self.records)
+            self.version = version
+        else:
+            stale = [year for year in self.records if year > last_closed]
+        for year in stale:
+            del self.records[year]
+        changed = bool(stale)
+        if len(dates) == 0:
+            if self.records:
+                self.records = {}
+                changed = True
+            return changed
+
+        first_year = fiscal_year(dates.iloc[0])
+        for year in range(first_year, last_closed + 1):
+            if year in self.records:
+                continue
+            start, stop = date_range_positions(data, *_year_bounds(year))
+            if stop == start:
+                continue
+            self.records[year] = summarize_rows(data.iloc[start:stop])
+            changed = True
+        # Years before the first row can only be left over from deleted rows
+        for year in [year for year in self.records if year < first_year]:
+            del self.records[year]
+            changed = True
+        return changed
+
+    def trend(self, data, by=None, today=None):
+        """
+        Total emissions per fiscal year, from the frozen records and the open year's rows.
+
+        Call refresh() first so every closed year has a record.
+
+        Args:
+            data (pandas.DataFrame): Emissions data sorted by schema.sort_by_date
+            by (str, optional): 'scope', 'category' or 'data_quality' to break the totals down
+            today (datetime, optional): Current date; defaults to today
+
+        Returns:
+            pandas.DataFrame: bucket (first day of the fiscal year), label
+                ("FY2024-25"), the by column ('' for rows without a value),
+                emissions_kgCO2e, rows and frozen (False for the open year),
+                ordered by year
+        """
+        if by is not None and by not in ROLLUP_GROUPS:
+            raise ValueError(f"Yearly trends cannot be broken down by {by}")
+        columns = TREND_COLUMNS[:2] + ([by] if by else []) + TREND_COLUMNS[2:]
+
+        rows = []
+        for year, record in sorted(self.records.items()):
+            if by is None:
+                rows.append((year, None, record['total'], record['rows'], True))
+            else:
+                rows.extend((year, key, value, count, True) for key, (value, count) in sorted(record[by].items()))
+
+        # Live part: every row after the last closed year
+        open_start, _ = _year_bounds(self.closed_through(today) + 1)
+        start = int(data['date'].searchsorted(open_start, side='left'))
+        live = data.iloc[start:]
+        live = live[live['date'].notna()]
+        if len(live) > 0:
+            years = live['date'].dt.to_period(FISCAL_YEAR_FREQUENCY).dt.year
+            keys = [years.to_numpy()] + ([_group_keys(live, by)] if by else [])
+            grouped = live['emissions_kgCO2e'].fillna(0.0).groupby(keys)
+            sums = grouped.sum()
+            for key, value, count in zip(sums.index, sums.tolist(), grouped.size().tolist()):
+                year, group = (key if by else (key, None))
+                rows.append((int(year), group, value, count, False))
+
+        frame = pd.DataFrame(rows, columns=['year', 'group', 'emissions_kgCO2e', 'rows', 'frozen'])
+        periods = pd.PeriodIndex(frame['year'].astype('int64').tolist(), freq=FISCAL_YEAR_FREQUENCY)
+        frame['bucket'] = periods.start_time
+        frame['label'] = np.asarray(period_labels(periods))
+        if by:
+            frame[by] = frame['group']
+        return frame[columns]
+
+    def save(self, path, version):
+        """
+        Write the rollups to disk, stamped with the stored data's version.
+
+        Args:
+            path (str): Path to the rollups file
+            version (int): Version of the stored data the records match
+        """
+        content = {
+            "storage": self.storage,
+            "version": version,
+            "years": {str(year): record for year, record in self.records.items()},
+        }
+        _atomic_write(path, json.dumps(content).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path, storage):
+        """
+        Read rollups written by save().
+
+        Args:
+            path (str): Path to the rollups file
+            storage (str): Name of the storage backend the data lives in
+
+        Returns:
+            YearlyRollups: Rollups from the file, with version set to the stored
+                data version they were saved for; empty if the file is missing,
+                unreadable or belongs to another backend
+        """
+        rollups = cls(storage)
+        if not os.path.exists(path):
+            return rollups
+        try:
+            with open(path, 'r') as f:
+                content = json.load(f)
+        except json.JSONDecodeError:
+            return rollups
+        if content.get('storage') == storage:
+            rollups.records = {int(year): record for year, record in content['years'].items()}
+            rollups.version = content.get('version')
+        return rollups
@@ -0,0 +1,228 @@
+"""
+Emissions data schema for YourCarbonFootprint application.
+Defines the canonical columns and dtypes of the emissions DataFrame.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Canonical column order
+EMISSIONS_COLUMNS = [
+    'date', 'scope', 'category', 'activity', 'quantity',
+    'unit', 'emission_factor', 'emissions_kgCO2e', 'notes',
+    'business_unit', 'project', 'country', 'facility',
+    'responsible_person', 'data_quality', 'verification_status',
+    'factor_version'
+]
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'scope', 'category', 'activity', 'unit', 'country', 'facility',
+    'business_unit', 'project', 'data_quality', 'verification_status',
+    'factor_version'
+]
+
+NUMERIC_COLUMNS = ['quantity', 'emission_factor', 'emissions_kgCO2e']
+
+DATE_COLUMN = 'date'
+
+
+def apply_schema(data):
+    """
+    Convert emissions data to the canonical columns and dtypes.
+
+    Dates become datetime64, numeric columns float64 and the low-cardinality
+    text columns pandas categoricals. Values that cannot be converted become
+    NaT/NaN. Canonical columns the data lacks (e.g. facility in files
+    written before it existed, or in shards of rows entered without it) are
+    added as missing values of their dtype, so every column of
+    EMISSIONS_COLUMNS can be read. Columns not in the schema are left
+    unchanged.
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+
+    Returns:
+        pandas.DataFrame: Data with every canonical column in its dtype
+    """
+    missing = [col for col in EMISSIONS_COLUMNS if col not in data.columns]
+    if missing:
+        # Start as object nulls; the conversions below give them their dtype
+        data = data.assign(**{col: pd.Series(None, index=data.index, dtype=object) for col in missing})
+    conversions = {}
+    if DATE_COLUMN in data.columns and not pd.api.types.is_datetime64_any_dtype(data[DATE_COLUMN]):
+        conversions[DATE_COLUMN] = pd.to_datetime(data[DATE_COLUMN], errors='coerce')
+    for col in NUMERIC_COLUMNS:
+        if col in data.columns and data[col].dtype != 'float64':
+            conversions[col] = pd.to_numeric(data[col], errors='coerce').astype('float64')
+    for col in CATEGORICAL_COLUMNS:
+        if col in data.columns and not isinstance(data[col].dtype, pd.CategoricalDtype):
+            conversions[col] = data[col].astype('category')
+    if conversions:
+        data = data.assign(**conversions)
+    return data
+
+
+def empty_emissions_frame():
+    """
+    Get an empty emissions dataframe with the canonical columns and dtypes.
+
+    Returns:
+        pandas.DataFrame: Empty emissions data
+    """
+    return apply_schema(pd.DataFrame(columns=EMISSIONS_COLUMNS))
+
+
+def concat_emissions(data, new_rows):
+    """
+    Append rows to emissions data without losing categorical dtypes.
+
+    Categories are unioned first so pandas keeps the columns categorical
+    instead of falling back to object strings.
+
+    Args:
+        data (pandas.DataFrame): Existing emissions data in the canonical schema
+        new_rows (pandas.DataFrame): Rows to append
+
+    Returns:
+        pandas.DataFrame: Combined data with a fresh RangeIndex
+    """
+    columns = list(data.columns) + [col for col in new_rows.columns if col not in data.columns]
+    data = apply_schema(data.reindex(columns=columns))
+    new_rows = apply_schema(new_rows.reindex(columns=columns))
+    aligned_data = {}
+    aligned_rows = {}
+    for col in CATEGORICAL_COLUMNS:
+        if col in columns:
+            # Only add the unseen categories so existing codes stay valid
+            added = new_rows[col].cat.categories.difference(data[col].cat.categories)
+            aligned_data[col] = data[col].cat.add_categories(added)
+            aligned_rows[col] = new_rows[col].cat.set_categories(aligned_data[col].cat.categories)
+    if aligned_data:
+        data = data.assign(**aligned_data)
+        new_rows = new_rows.assign(**aligned_rows)
+    return pd.concat([data, new_rows], ignore_index=True)
+
+
+def row_hashes(data):
+    """
+    Hash each row's canonical column values.
+
+    Equal rows get equal hashes whatever their dtypes (e.g. string or
+    datetime dates, object or categorical text).
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+
+    Returns:
+        pandas.Series: uint64 hash per row, with a fresh RangeIndex
+    """
+    data = apply_schema(data.reindex(columns=EMISSIONS_COLUMNS))
+    data = data.assign(**{DATE_COLUMN: data[DATE_COLUMN].astype('datetime64[ns]')})
+    return pd.util.hash_pandas_object(data, index=False).reset_index(drop=True)
+
+
+def sort_by_date(data):
+    """
+    Order emissions rows by date, oldest first, with missing dates last.
+
+    The sort is stable, so rows with the same date keep their order. Data
+    that is already in order, or has no date column, is returned unchanged.
+
+    Args:
+        data (pandas.DataFrame): Emissions data in the canonical schema
+
+    Returns:
+        pandas.DataFrame: Data sorted by date with a fresh RangeIndex
+    """
+    if DATE_COLUMN not in data.columns:
+        return data
+    dates = data[DATE_COLUMN]
+    dated = int(dates.notna().sum())
+    if dates.iloc[:dated].notna().all() and dates.iloc[:dated].is_monotonic_increasing:
+        return data
+    return data.sort_values(DATE_COLUMN, kind='stable', na_position='last').reset_index(drop=True)
+
+
+def append_sorted(data, new_rows):
+    """
+    Append rows to date-sorted emissions data, keeping it sorted.
+
+    Only the new rows are sorted when they all fall on or after the last
+    existing date (the usual case for new entries); otherwise the combined
+    data is re-sorted.
+
+    Args:
+        data (pandas.DataFrame): Emissions data sorted by sort_by_date
+        new_rows (pandas.DataFrame): Rows to append
+
+    Returns:
+        pandas.DataFrame: Combined data sorted by date with a fresh RangeIndex
+    """
+    new_rows = sort_by_date(apply_schema(new_rows))
+    combined = concat_emissions(data, new_rows)
+    if len(data) == 0 or len(new_rows) == 0:
+        return combined
+    last_date = data[DATE_COLUMN].iloc[-1]
+    first_new = new_rows[DATE_COLUMN].iloc[0]
+    if pd.notna(last_date) and pd.notna(first_new) and first_new >= last_date:
+        return combined
+    return sort_by_date(combined)
+
+
+def sorted_insert_positions(data, new_rows):
+    """
+    Get where append_sorted places new rows.
+
+    Args:
+        data (pandas.DataFrame): Emissions data sorted by sort_by_date
+        new_rows (pandas.DataFrame): Rows about to be appended
+
+    Returns:
+        numpy.ndarray: Ascending row positions of the new rows in the combined data
+    """
+    new_dates = sort_by_date(apply_schema(new_rows))[DATE_COLUMN]
+    # Rows with an equal date go after the existing ones (stable sort)
+    before = data[DATE_COLUMN].searchsorted(new_dates, side='right')
+    return np.asarray(before, dtype=np.int64) + np.arange(len(new_dates))
+
+
+def date_range_positions(data, start_date, end_date):
+    """
+    Find the row positions of a date range in date-sorted emissions data.
+
+    The bounds are found by binary search, so the cost does not depend on
+    the size of the data.
+
+    Args:
+        data (pandas.DataFrame): Emissions data sorted by sort_by_date
+        start_date (datetime): First date to include
+        end_date (datetime): Last date to include
+
+    Returns:
+        tuple: (start, stop) such that rows start to stop - 1 have
+            start_date <= date <= end_date
+    """
+    dates = data[DATE_COLUMN]
+    start = int(dates.searchsorted(pd.Timestamp(start_date), side='left'))
+    stop = int(dates.searchsorted(pd.Timestamp(end_date), side='right'))
+    return start, stop
+
+
+def date_range_slice(data, start_date, end_date):
+    """
+    Get the rows of date-sorted emissions data within a date range.
+
+    The cost depends on the number of matching rows rather than the size
+    of the data, and the result is a slice of data rather than a masked copy.
+
+    Args:
+        data (pandas.DataFrame): Emissions data sorted by sort_by_date
+        start_date (datetime): First date to include
+        end_date (datetime): Last date to include
+
+    Returns:
+        pandas.DataFrame: Rows with start_date <= date <= end_date
+    """
+    start, stop = date_range_positions(data, start_date, end_date)
+    return data.iloc[start:stop]
@@ -0,0 +1,273 @@
+"""
+Incremental snapshots for YourCarbonFootprint application.
+Keeps point-in-time versions of the emissions data as content-addressed month blocks.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+import pandas as pd
+from config import SNAPSHOT_DIR, SNAPSHOT_KEEP_ALL_HOURS, SNAPSHOT_KEEP_DAILY_DAYS
+from schema import DATE_COLUMN, apply_schema, empty_emissions_frame, row_hashes
+from storage import _atomic_write, _to_records
+
+UNDATED_BLOCK = "undated"
+
+
+def _month_keys(dates):
+    """Get the 'YYYY-MM' block key for each date ('undated' for missing dates)."""
+    return dates.dt.strftime('%Y-%m').where(dates.notna(), UNDATED_BLOCK)
+
+
+class SnapshotStore:
+    """
+    Content-addressed snapshots of the emissions data.
+
+    Rows are split into one block per month. A block is stored once under
+    the SHA-1 of its JSON content (blocks/ab/ab12....json), and each
+    snapshot is a small manifest (manifests/<timestamp>.json) listing the
+    blocks that made up the data at that time. A save that only touches
+    one month therefore stores one new block plus a manifest, and any past
+    snapshot can be rebuilt from its manifest. Row order is restored
+    within a month; months come back in date order.
+
+    Retention: every snapshot of the last SNAPSHOT_KEEP_ALL_HOURS is kept,
+    then the last one of each day for SNAPSHOT_KEEP_DAILY_DAYS, then the
+    last one of each month. Blocks no manifest refers to are deleted.
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, keep_all_hours=SNAPSHOT_KEEP_ALL_HOURS,
+                 keep_daily_days=SNAPSHOT_KEEP_DAILY_DAYS):
+        """
+        Initialize the SnapshotStore class.
+
+        Args:
+            snapshot_dir (str, optional): Directory holding blocks and manifests
+            keep_all_hours (float, optional): Keep every snapshot this recent
+            keep_daily_days (float, optional): Keep one snapshot per day this recent
+        """
+        self.snapshot_dir = snapshot_dir
+        self.block_dir = os.path.join(snapshot_dir, "blocks")
+        self.manifest_dir = os.path.join(snapshot_dir, "manifests")
+        self.keep_all_hours = keep_all_hours
+        self.keep_daily_days = keep_daily_days
+        os.makedirs(self.block_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    def _block_path(self, block_hash):
+        """Get the file path for a block hash."""
+        return os.path.join(self.block_dir, block_hash[:2], f"{block_hash}.json")
+
+    def _write_block(self, rows):
+        """
+        Store a block of rows unless an identical block already exists.
+
+        Returns:
+            str: SHA-1 of the block content
+        """
+        content = json.dumps(_to_records(rows), default=str).encode('utf-8')
+        block_hash = hashlib.sha1(content).hexdigest()
+        path = self._block_path(block_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, content)
+        return block_hash
+
+    def _read_block(self, block_hash):
+        """Read the rows of a block."""
+        with open(self._block_path(block_hash), 'r') as f:
+            return json.load(f)
+
+    def list_snapshots(self):
+        """
+        Get the stored snapshots, oldest first.
+
+        Returns:
+            list: Manifest file names ('<YYYYmmddTHHMMSSffffff>.json')
+        """
+        return sorted(name for name in os.listdir(self.manifest_dir) if name.endswith('.json'))
+
+    def _read_manifest(self, name):
+        """Read a snapshot manifest."""
+        with open(os.path.join(self.manifest_dir, name), 'r') as f:
+            return json.load(f)
+
+    def latest(self):
+        """
+        Get the most recent snapshot manifest.
+
+        Returns:
+            dict: Manifest, or None if there are no snapshots
+        """
+        names = self.list_snapshots()
+        return self._read_manifest(names[-1]) if names else None
+
+    def _build_blocks(self, data, previous):
+        """
+        Store the month blocks of data, reusing blocks whose rows are unchanged.
+
+        Rows are compared by hash against the previous manifest, so unchanged
+        months are neither serialized nor written again.
+
+        Returns:
+            dict: Block key to {"hash", "digest", "rows"}
+        """
+        data = apply_schema(data).reset_index(drop=True)
+        keys = _month_keys(data[DATE_COLUMN])
+        hashes = row_hashes(data)
+        blocks = {}
+        for key, positions in hashes.groupby(keys).groups.items():
+            digest = hashlib.sha1(hashes.loc[positions].to_numpy().tobytes()).hexdigest()
+            old = previous.get(key)
+            if old and old['digest'] == digest:
+                blocks[key] = old
+            else:
+                blocks[key] = {
+                    "hash": self._write_block(data.loc[positions]),
+                    "digest": digest,
+                    "rows": int(len(positions)),
+                }
+        return blocks
+
+    def _write_manifest(self, blocks, version=None):
+        """
+        Record a snapshot, unless it has the same blocks as the latest one.
+
+        Returns:
+            str: Manifest file name, or None if nothing changed
+        """
+        latest = self.latest()
+        if latest and latest['blocks'] == blocks:
+            return None
+        now = datetime.now()
+        name = f"{now.strftime('%Y%m%dT%H%M%S%f')}.json"
+        manifest = {
+            "created_at": now.isoformat(),
+            "version": version,
+            "rows": sum(block['rows'] for block in blocks.values()),
+            "blocks": dict(sorted(blocks.items())),
+        }
+        _atomic_write(os.path.join(self.manifest_dir, name), json.dumps(manifest, indent=2).encode('utf-8'))
+        self.prune()
+        return name
+
+    def take(self, data, version=None):
+        """
+        Snapshot the complete emissions data.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+            version (int, optional): Data version being snapshotted
+
+        Returns:
+            str: Manifest file name, or None if nothing changed since the last snapshot
+        """
+        latest = self.latest()
+        previous = latest['blocks'] if latest else {}
+        return self._write_manifest(self._build_blocks(data, previous), version)
+
+    def take_appended(self, new_rows, storage, version=None):
+        """
+        Snapshot after an append without loading the whole dataset.
+
+        Only the months the new rows fall into are re-read, with
+        storage.query; all other blocks are carried over from the last snapshot.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows just appended
+            storage (StorageBackend): Backend supporting queries
+            version (int, optional): Data version being snapshotted
+
+        Returns:
+            str: Manifest file name, or None if nothing changed
+        """
+        latest = self.latest()
+        if latest is None:
+            return self.take(storage.load(), version)
+
+        previous = latest['blocks']
+        blocks = dict(previous)
+        months = pd.to_datetime(new_rows[DATE_COLUMN], errors='coerce').dropna().dt.to_period('M').unique()
+        for month in months:
+            rows = storage.query(month.start_time, month.end_time.normalize())
+            key = month.strftime('%Y-%m')
+            blocks.pop(key, None)
+            if len(rows) > 0:
+                blocks.update(self._build_blocks(rows, previous))
+        return self._write_manifest(blocks, version)
+
+    def load(self, name):
+        """
+        Rebuild the emissions data of one snapshot.
+
+        Args:
+            name (str): Manifest file name
+
+        Returns:
+            pandas.DataFrame: Emissions data in the canonical schema
+        """
+        manifest = self._read_manifest(name)
+        records = []
+        for block in manifest['blocks'].values():
+            records.extend(self._read_block(block['hash']))
+        if not records:
+            return empty_emissions_frame()
+        return apply_schema(pd.DataFrame(records))
+
+    def find_as_of(self, timestamp):
+        """
+        Find the last snapshot taken at or before a point in time.
+
+        Args:
+            timestamp (datetime or str): Point in time
+
+        Returns:
+            str: Manifest file name, or None if there is no snapshot that old
+        """
+        cutoff = pd.Timestamp(timestamp).strftime('%Y%m%dT%H%M%S%f')
+        names = [name for name in self.list_snapshots() if name[:-len('.json')] <= cutoff]
+        return names[-1] if names else None
+
+    def prune(self):
+        """
+        Apply the retention policy and delete unreferenced blocks.
+
+        Returns:
+            int: Number of snapshots removed
+        """
+        names = self.list_snapshots()
+        now = datetime.now()
+        keep_all_after = now - timedelta(hours=self.keep_all_hours)
+        keep_daily_after = now - timedelta(days=self.keep_daily_days)
+
+        kept_buckets = set()
+        removed = []
+        # Newest first, so the last snapshot of each day/month is the one kept
+        for name in reversed(names):
+            taken_at = datetime.strptime(name[:-len('.json')], '%Y%m%dT%H%M%S%f')
+            if taken_at >= keep_all_after:
+                continue
+            bucket = taken_at.strftime('%Y-%m-%d') if taken_at >= keep_daily_after else taken_at.strftime('%Y-%m')
+            if bucket in kept_buckets:
+                removed.append(name)
+            else:
+                kept_buckets.add(bucket)
+
+        if not removed:
+            return 0
+        for name in removed:
+            os.remove(os.path.join(self.manifest_dir, name))
+        self._collect_garbage()
+        return len(removed)
+
+    def _collect_garbage(self):
+        """Delete blocks that no remaining manifest refers to."""
+        referenced = set()
+        for name in self.list_snapshots():
+            referenced.update(block['hash'] for block in self._read_manifest(name)['blocks'].values())
+        for prefix in os.listdir(self.block_dir):
+            prefix_dir = os.path.join(self.block_dir, prefix)
+            for file_name in os.listdir(prefix_dir):
+                if file_name[:-len('.json')] not in referenced:
+                    os.remove(os.path.join(prefix_dir, file_name))
@@ -0,0 +1,1250 @@
+"""
+Storage backends for YourCarbonFootprint application.
+Persists emissions records to disk and loads them back as a DataFrame.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from config import (
+    COLUMNAR_MAX_SMALL_SEGMENTS,
+    COLUMNAR_SEGMENT_ROWS,
+    EMISSIONS_COLUMNAR_DIR,
+    EMISSIONS_DB_FILE,
+    EMISSIONS_FILE,
+    EMISSIONS_JOURNAL_FILE,
+    EMISSIONS_SHARD_DIR,
+    EMISSIONS_SHARD_GRANULARITY,
+    EMISSIONS_STORAGE_MODE,
+    FISCAL_YEAR_START_MONTH,
+    JOURNAL_COMPACT_THRESHOLD_BYTES,
+)
+from schema import (
+    CATEGORICAL_COLUMNS,
+    EMISSIONS_COLUMNS,
+    NUMERIC_COLUMNS,
+    apply_schema,
+    empty_emissions_frame,
+)
+
+def _to_records(data):
+    """
+    Convert emissions data to JSON-serializable records.
+
+    Args:
+        data (pandas.DataFrame): Emissions data
+
+    Returns:
+        list: List of record dictionaries with dates as 'YYYY-MM-DD' strings
+    """
+    if 'date' in data.columns and pd.api.types.is_datetime64_any_dtype(data['date']):
+        data = data.copy()
+        data['date'] = data['date'].dt.strftime('%Y-%m-%d')
+    return data.to_dict('records')
+
+
+def _read_base_file(path):
+    """
+    Read the base emissions JSON file.
+
+    Args:
+        path (str): Path to the JSON file
+
+    Returns:
+        tuple: (records, raw_bytes); an empty or missing file yields no records
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    if not os.path.exists(path):
+        return [], b""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if not raw.strip():
+        return [], raw
+    return json.loads(raw), raw
+
+
+def _atomic_write(path, content):
+    """
+    Write a file atomically.
+
+    The content goes to a temporary file in the same directory, which is
+    synced and then moved over the target with os.replace, so a crash
+    mid-write leaves either the old or the new file, never a partial one.
+
+    Args:
+        path (str): Target file path
+        content (bytes): File content
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_base_file(path, records):
+    """
+    Atomically write records to the base emissions JSON file.
+
+    Returns:
+        bytes: The written file content
+    """
+    raw = json.dumps(records, indent=2).encode('utf-8')
+    _atomic_write(path, raw)
+    return raw
+
+
+def _to_date_string(value):
+    """Convert a date-like value to a 'YYYY-MM-DD' string."""
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def summarize_emissions(data):
+    """
+    Compute total, per-scope, per-category and monthly emissions.
+
+    Args:
+        data (pandas.DataFrame): Emissions data with dates as datetime objects
+
+    Returns:
+        dict: Summary in the same shape as DataHandler.get_emissions_summary
+    """
+    if len(data) == 0:
+        return {
+            "total_emissions": 0,
+            "scope_breakdown": {},
+            "category_breakdown": {},
+            "time_series": {}
+        }
+
+    # Total emissions
+    total_emissions = data['emissions_kgCO2e'].sum()
+
+    # Emissions by scope
+    scope_data = data.groupby('scope', observed=True)['emissions_kgCO2e'].sum().to_dict()
+
+    # Emissions by category
+    category_data = data.groupby('category', observed=True)['emissions_kgCO2e'].sum().to_dict()
+
+    # Time series data (monthly), one dict entry per month and scope group
+    time_series_dict = {}
+    if 'date' in data.columns:
+        months = data['date'].dt.strftime('%Y-%m')
+        time_series = data.groupby([months, 'scope'], observed=True)['emissions_kgCO2e'].sum()
+        for (month, scope), emissions in time_series.items():
+            time_series_dict.setdefault(month, {})[scope] = emissions
+
+    return {
+        "total_emissions": total_emissions,
+        "scope_breakdown": scope_data,
+        "category_breakdown": category_data,
+        "time_series": time_series_dict
+    }
+
+
+class StorageBackend:
+    """
+    Base class for emissions storage backends.
+
+    Backends that set supports_queries to True can answer filtered reads and
+    summaries themselves, so DataHandler does not need to load every row.
+    """
+
+    supports_queries = False
+
+    def load(self):
+        """
+        Load all emissions data.
+
+        Returns:
+            pandas.DataFrame: Emissions data with dates as stored (strings)
+        """
+        raise NotImplementedError
+
+    def save(self, data):
+        """
+        Replace the stored dataset.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        raise NotImplementedError
+
+    def append(self, new_rows, data=None):
+        """
+        Persist newly added rows.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added since the last save
+            data (pandas.DataFrame, optional): Complete emissions data including new_rows
+        """
+        raise NotImplementedError
+
+    def backup_corrupted_file(self):
+        """
+        Move an unreadable data file aside under a timestamped name.
+
+        Returns:
+            str: Path to the backup, or None if the backend has nothing to back up
+        """
+        return None
+
+    def refresh(self):
+        """Drop cached state so the next read sees writes made by other processes."""
+        pass
+
+    def query(self, start_date=None, end_date=None, **filters):
+        """
+        Get emissions rows matching the filters.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            **filters: Column equality filters (scope, category, facility, business_unit)
+
+        Returns:
+            pandas.DataFrame: Matching rows with dates as stored (strings)
+        """
+        raise NotImplementedError
+
+    def summary(self, start_date=None, end_date=None):
+        """
+        Get total, per-scope, per-category and monthly emissions.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            dict: Summary in the same shape as DataHandler.get_emissions_summary
+        """
+        raise NotImplementedError
+
+
+class JsonStorage(StorageBackend):
+    """Stores all emissions records in a single JSON file, rewritten on every save."""
+
+    def __init__(self, base_file=EMISSIONS_FILE):
+        """
+        Initialize the JsonStorage class.
+
+        Args:
+            base_file (str, optional): Path to the emissions JSON file
+        """
+        self.base_file = base_file
+
+    def load(self):
+        """
+        Load emissions data from file.
+
+        Returns:
+            pandas.DataFrame: Emissions data with dates as stored (strings)
+
+        Raises:
+            json.JSONDecodeError: If the file is corrupted
+        """
+        records, _ = _read_base_file(self.base_file)
+        return pd.DataFrame(records)
+
+    def save(self, data):
+        """
+        Save the full emissions dataset to file.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        _write_base_file(self.base_file, _to_records(data))
+
+    def backup_corrupted_file(self):
+        """
+        Move an unreadable emissions JSON file aside under a timestamped name.
+
+        The file is renamed rather than copied, so this costs no rewrite.
+
+        Returns:
+            str: Path to the backup, or None if the file does not exist
+        """
+        if not os.path.exists(self.base_file):
+            return None
+        root, ext = os.path.splitext(self.base_file)
+        backup_file = f"{root}_backup_{int(time.time())}{ext}"
+        os.replace(self.base_file, backup_file)
+        return backup_file
+
+    def append(self, new_rows, data=None):
+        """
+        Persist newly added rows.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added since the last save
+            data (pandas.DataFrame): Complete emissions data including new_rows
+        """
+        self.save(data)
+
+
+class JournalStorage(JsonStorage):
+    """
+    Stores emissions as a base JSON snapshot plus an append-only JSON-lines journal.
+
+    Appends write only the new rows to the journal. Once the journal passes
+    the compaction threshold it is folded into the base snapshot. The first
+    journal line records a hash of the base file it extends, so a journal
+    left behind by an interrupted compaction is never applied twice.
+    """
+
+    def __init__(self, base_file=EMISSIONS_FILE, journal_file=EMISSIONS_JOURNAL_FILE,
+                 compact_threshold=JOURNAL_COMPACT_THRESHOLD_BYTES):
+        """
+        Initialize the JournalStorage class.
+
+        Args:
+            base_file (str, optional): Path to the base emissions JSON file
+            journal_file (str, optional): Path to the JSON-lines journal
+            compact_threshold (int, optional): Journal size in bytes that triggers compaction
+        """
+        super().__init__(base_file)
+        self.journal_file = journal_file
+        self.compact_threshold = compact_threshold
+        self._base_hash = None
+
+    def _read_journal(self, base_hash):
+        """
+        Read journal records that extend the given base snapshot.
+
+        Args:
+            base_hash (str): Hash of the current base file
+
+        Returns:
+            list: Journal records, or empty list if the journal is missing or stale
+        """
+        if not os.path.exists(self.journal_file):
+            return []
+        with open(self.journal_file, 'r') as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return []
+        try:
+            header = json.loads(lines[0])
+        except json.JSONDecodeError:
+            return []
+        if header.get('base_sha1') != base_hash:
+            # Base was rewritten after this journal was started (e.g. a
+            # compaction finished but the journal was not yet removed)
+            return []
+        records = []
+        for i, line in enumerate(lines[1:], start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted append is dropped
+                if i == len(lines) - 1:
+                    break
+                raise
+        return records
+
+    def _load_records(self):
+        """Load base and journal records and remember the base hash."""
+        records, raw = _read_base_file(self.base_file)
+        self._base_hash = hashlib.sha1(raw).hexdigest()
+        return records + self._read_journal(self._base_hash)
+
+    def load(self):
+        """
+        Load the combined view of the base snapshot and the journal.
+
+        Returns:
+            pandas.DataFrame: Emissions data with dates as stored (strings)
+
+        Raises:
+            json.JSONDecodeError: If the base file is corrupted
+        """
+        return pd.DataFrame(self._load_records())
+
+    def save(self, data):
+        """
+        Rewrite the base snapshot with the full dataset and discard the journal.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        raw = _write_base_file(self.base_file, _to_records(data))
+        self._base_hash = hashlib.sha1(raw).hexdigest()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+    def append(self, new_rows, data=None):
+        """
+        Append new rows to the journal, compacting it if it grew too large.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added since the last save
+            data (pandas.DataFrame, optional): Complete emissions data (unused)
+        """
+        if self._base_hash is None:
+            _, raw = _read_base_file(self.base_file)
+            self._base_hash = hashlib.sha1(raw).hexdigest()
+
+        os.makedirs(os.path.dirname(self.journal_file) or '.', exist_ok=True)
+        lines = []
+        if not os.path.exists(self.journal_file) or os.path.getsize(self.journal_file) == 0:
+            lines.append(json.dumps({'base_sha1': self._base_hash}))
+        lines.extend(json.dumps(record, default=str) for record in _to_records(new_rows))
+
+        with open(self.journal_file, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.getsize(self.journal_file) > self.compact_threshold:
+            self.compact()
+
+    def refresh(self):
+        """Forget the cached base file hash."""
+        self._base_hash = None
+
+    def compact(self):
+        """Fold the journal into the base snapshot."""
+        records = self._load_records()
+        raw = _write_base_file(self.base_file, records)
+        self._base_hash = hashlib.sha1(raw).hexdigest()
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Stores emissions records in a local SQLite database.
+
+    Filters and GROUP BYs run inside SQLite using indexes on date, scope,
+    category, facility and business_unit. Only the columns in
+    EMISSIONS_COLUMNS are persisted.
+    """
+
+    supports_queries = True
+
+    FILTER_COLUMNS = ['scope', 'category', 'facility', 'business_unit']
+
+    def __init__(self, db_file=EMISSIONS_DB_FILE):
+        """
+        Initialize the SQLiteStorage class.
+
+        Args:
+            db_file (str, optional): Path to the SQLite database file
+        """
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
+        with self._connect() as conn:
+            column_defs = ", ".join(
+                f"{col} REAL" if col in NUMERIC_COLUMNS else f"{col} TEXT"
+                for col in EMISSIONS_COLUMNS
+            )
+            conn.execute(f"CREATE TABLE IF NOT EXISTS emissions (id INTEGER PRIMARY KEY, {column_defs})")
+            # Databases created before a column was added to the schema get it empty
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(emissions)")}
+            for col in EMISSIONS_COLUMNS:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE emissions ADD COLUMN {col} {'REAL' if col in NUMERIC_COLUMNS else 'TEXT'}")
+            for col in ['date'] + self.FILTER_COLUMNS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_emissions_{col} ON emissions ({col})")
+
+    def _connect(self):
+        """Open a connection to the database."""
+        return sqlite3.connect(self.db_file)
+
+    def _insert(self, conn, rows):
+        """Insert DataFrame rows into the emissions table."""
+        if len(rows) == 0:
+            return
+        rows = rows.reindex(columns=EMISSIONS_COLUMNS)
+        rows = rows.astype(object).where(rows.notna(), None)
+        if 'date' in rows.columns:
+            rows['date'] = [None if d is None else _to_date_string(d) for d in rows['date']]
+        placeholders = ", ".join("?" for _ in EMISSIONS_COLUMNS)
+        conn.executemany(
+            f"INSERT INTO emissions ({', '.join(EMISSIONS_COLUMNS)}) VALUES ({placeholders})",
+            rows.itertuples(index=False, name=None)
+        )
+
+    def _where(self, start_date=None, end_date=None, **filters):
+        """
+        Build a WHERE clause and its parameters.
+
+        Returns:
+            tuple: (sql, params)
+        """
+        clauses = []
+        params = []
+        if start_date and end_date:
+            clauses.append("date BETWEEN ? AND ?")
+            params.extend([_to_date_string(start_date), _to_date_string(end_date)])
+        for col, value in filters.items():
+            if value is None:
+                continue
+            if col not in self.FILTER_COLUMNS:
+                raise ValueError(f"Unsupported filter column: {col}")
+            clauses.append(f"{col} = ?")
+            params.append(value)
+        sql = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return sql, params
+
+    def load(self):
+        """
+        Load all emissions data.
+
+        Returns:
+            pandas.DataFrame: Emissions data with dates as stored (strings)
+        """
+        return self.query()
+
+    def save(self, data):
+        """
+        Replace the stored dataset.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM emissions")
+            self._insert(conn, data)
+
+    def append(self, new_rows, data=None):
+        """
+        Insert newly added rows.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added since the last save
+            data (pandas.DataFrame, optional): Complete emissions data (unused)
+        """
+        with self._connect() as conn:
+            self._insert(conn, new_rows)
+
+    def query(self, start_date=None, end_date=None, **filters):
+        """
+        Get emissions rows matching the filters.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            **filters: Column equality filters (scope, category, facility, business_unit)
+
+        Returns:
+            pandas.DataFrame: Matching rows with dates as stored (strings), in
+                date order (missing dates last, then insertion order) like
+                schema.sort_by_date
+        """
+        where, params = self._where(start_date, end_date, **filters)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                f"SELECT {', '.join(EMISSIONS_COLUMNS)} FROM emissions{where} "
+                f"ORDER BY date IS NULL, date, id",
+                conn, params=params
+            )
+
+    def summary(self, start_date=None, end_date=None):
+        """
+        Get total, per-scope, per-category and monthly emissions.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            dict: Summary in the same shape as DataHandler.get_emissions_summary
+        """
+        where, params = self._where(start_date, end_date)
+        with self._connect() as conn:
+            total = conn.execute(
+                f"SELECT COALESCE(SUM(emissions_kgCO2e), 0) FROM emissions{where}", params
+            ).fetchone()[0]
+            scope_data = dict(conn.execute(
+                f"SELECT scope, SUM(emissions_kgCO2e) FROM emissions{where} GROUP BY scope", params
+            ).fetchall())
+            category_data = dict(conn.execute(
+                f"SELECT category, SUM(emissions_kgCO2e) FROM emissions{where} GROUP BY category", params
+            ).fetchall())
+            time_series = {}
+            for month, scope, emissions in conn.execute(
+                f"SELECT substr(date, 1, 7) AS month, scope, SUM(emissions_kgCO2e) "
+                f"FROM emissions{where} GROUP BY month, scope ORDER BY month", params
+            ):
+                time_series.setdefault(month, {})[scope] = emissions
+        return {
+            "total_emissions": total,
+            "scope_breakdown": scope_data,
+            "category_breakdown": category_data,
+            "time_series": time_series
+        }
+
+
+class ShardedStorage(StorageBackend):
+    """
+    Stores emissions as date-partitioned JSON-lines shards plus a manifest.
+
+    Each shard holds one month (e.g. emissions/2025-07.jsonl) or one fiscal
+    year (e.g. emissions/FY2025-26.jsonl). The manifest records per-shard row
+    counts, min/max dates and total emissions, so range queries only open the
+    shards that overlap the requested period and appends only touch the
+    shards their rows fall into.
+    """
+
+    supports_queries = True
+
+    UNDATED_SHARD = "undated"
+
+    def __init__(self, shard_dir=EMISSIONS_SHARD_DIR, granularity=EMISSIONS_SHARD_GRANULARITY):
+        """
+        Initialize the ShardedStorage class.
+
+        Args:
+            shard_dir (str, optional): Directory holding the shard files
+            granularity (str, optional): "month" or "fiscal_year"
+
+        Raises:
+            ValueError: If the granularity is unknown
+        """
+        if granularity not in ("month", "fiscal_year"):
+            raise ValueError(f"Unknown shard granularity: {granularity}")
+        self.shard_dir = shard_dir
+        self.granularity = granularity
+        self.manifest_file = os.path.join(shard_dir, "manifest.json")
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        """Load the shard manifest, or start an empty one."""
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('granularity') != self.granularity:
+                raise ValueError(
+                    f"Shards in {self.shard_dir} are partitioned by "
+                    f"{manifest.get('granularity')}, not {self.granularity}"
+                )
+            return manifest
+        return {"granularity": self.granularity, "shards": {}}
+
+    def refresh(self):
+        """Re-read the shard manifest."""
+        self.manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        """Write the shard manifest."""
+        _atomic_write(self.manifest_file, json.dumps(self.manifest, indent=2).encode('utf-8'))
+
+    def _shard_path(self, key):
+        """Get the file path for a shard key."""
+        return os.path.join(self.shard_dir, f"{key}.jsonl")
+
+    def _shard_keys(self, dates):
+        """
+        Get the shard key for each date.
+
+        Args:
+            dates (pandas.Series): Dates as datetime objects
+
+        Returns:
+            pandas.Series: Shard keys ('YYYY-MM' or 'FYYYYY-YY')
+        """
+        if self.granularity == "month":
+            keys = dates.dt.strftime('%Y-%m')
+        else:
+            start_year = dates.dt.year - (dates.dt.month < FISCAL_YEAR_START_MONTH)
+            keys = "FY" + start_year.astype('Int64').astype(str) + "-" + \
+                ((start_year + 1) % 100).astype('Int64').astype(str).str.zfill(2)
+        return keys.where(dates.notna(), self.UNDATED_SHARD)
+
+    def _read_shard(self, key):
+        """Read all records from one shard."""
+        path = self._shard_path(key)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _group_by_shard(self, data):
+        """
+        Split rows by shard key.
+
+        Returns:
+            list: (key, rows) tuples, with rows carrying datetime dates
+        """
+        data = data.copy()
+        data['date'] = pd.to_datetime(data['date'], errors='coerce')
+        return list(data.groupby(self._shard_keys(data['date']), sort=True))
+
+    def _update_manifest_entry(self, key, rows, replace):
+        """Record row count, date range and total emissions for a shard."""
+        dates = rows['date'].dropna()
+        stats = {
+            "rows": int(len(rows)),
+            "min_date": _to_date_string(dates.min()) if len(dates) else None,
+            "max_date": _to_date_string(dates.max()) if len(dates) else None,
+            "total_emissions": float(pd.to_numeric(rows['emissions_kgCO2e'], errors='coerce').sum()),
+        }
+        current = self.manifest['shards'].get(key)
+        if current and not replace:
+            min_dates = [d for d in (current['min_date'], stats['min_date']) if d]
+            max_dates = [d for d in (current['max_date'], stats['max_date']) if d]
+            stats = {
+                "rows": current['rows'] + stats['rows'],
+                "min_date": min(min_dates) if min_dates else None,
+                "max_date": max(max_dates) if max_dates else None,
+                "total_emissions": current['total_emissions'] + stats['total_emissions'],
+            }
+        self.manifest['shards'][key] = stats
+
+    def _overlapping_shards(self, start_date=None, end_date=None):
+        """Get keys of shards whose date range overlaps the requested period."""
+        keys = sorted(self.manifest['shards'])
+        if not (start_date and end_date):
+            return keys
+        start, end = _to_date_string(start_date), _to_date_string(end_date)
+        return [
+            key for key in keys
+            if self.manifest['shards'][key]['min_date'] is not None
+            and self.manifest['shards'][key]['min_date'] <= end
+            and self.manifest['shards'][key]['max_date'] >= start
+        ]
+
+    def load(self):
+        """
+        Load all emissions data.
+
+        Returns:
+            pandas.DataFrame: Emissions data with dates as stored (strings)
+        """
+        return self.query()
+
+    def save(self, data):
+        """
+        Replace the stored dataset, rewriting every shard.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        old_keys = set(self.manifest['shards'])
+        self.manifest['shards'] = {}
+        for key, rows in self._group_by_shard(data):
+            lines = [json.dumps(record, default=str) + '\n' for record in _to_records(rows)]
+            _atomic_write(self._shard_path(key), ''.join(lines).encode('utf-8'))
+            self._update_manifest_entry(key, rows, replace=True)
+        for key in old_keys - set(self.manifest['shards']):
+            os.remove(self._shard_path(key))
+        self._save_manifest()
+
+    def append(self, new_rows, data=None):
+        """
+        Append new rows to the shards they fall into.
+
+        Each touched shard is rewritten atomically with its new rows at the
+        end, so a crash mid-write leaves the old shard, never a truncated
+        one; untouched shards are not read or written.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added since the last save
+            data (pandas.DataFrame, optional): Complete emissions data (unused)
+        """
+        for key, rows in self._group_by_shard(new_rows):
+            path = self._shard_path(key)
+            existing = b''
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    existing = f.read()
+            lines = [json.dumps(record, default=str) + '\n' for record in _to_records(rows)]
+            _atomic_write(path, existing + ''.join(lines).encode('utf-8'))
+            self._update_manifest_entry(key, rows, replace=False)
+        self._save_manifest()
+
+    def query(self, start_date=None, end_date=None, **filters):
+        """
+        Get emissions rows matching the filters, reading only overlapping shards.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            **filters: Column equality filters (scope, category, facility, business_unit)
+
+        Returns:
+            pandas.DataFrame: Matching rows with dates as stored (strings)
+        """
+        records = []
+        for key in self._overlapping_shards(start_date, end_date):
+            records.extend(self._read_shard(key))
+        data = pd.DataFrame(records)
+        if len(data) == 0:
+            return data
+
+        if start_date and end_date:
+            dates = pd.to_datetime(data['date'], errors='coerce')
+            data = data[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))]
+        for col, value in filters.items():
+            if value is not None:
+                data = data[data[col] == value]
+        return data.reset_index(drop=True)
+
+    def summary(self, start_date=None, end_date=None):
+        """
+        Get total, per-scope, per-category and monthly emissions.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            dict: Summary in the same shape as DataHandler.get_emissions_summary
+        """
+        data = self.query(start_date, end_date)
+        if len(data) > 0:
+            data['date'] = pd.to_datetime(data['date'])
+        return summarize_emissions(data)
+
+
+class ColumnarStorage(StorageBackend):
+    """
+    Stores emissions as memory-mapped NumPy column files.
+
+    Rows live in immutable segments (emissions_columnar/seg-000001/, ...).
+    Each segment holds one .npy array per column: float64 for the numeric
+    columns, int64 days since 1970-01-01 for the date and int32 dictionary
+    codes for the text columns, whose values are listed in the segment's
+    meta.json. header.json lists the live segments. Arrays are opened with
+    np.load(mmap_mode='r'), so summaries and filtered queries only page in
+    the columns they touch and never build a DataFrame of the full dataset.
+    Appends write a new segment; small segments are merged once there are
+    more than COLUMNAR_MAX_SMALL_SEGMENTS of them.
+    """
+
+    supports_queries = True
+
+    FILTER_COLUMNS = ("scope", "category", "facility", "business_unit")
+
+    # int64 value of NaT, used for missing dates
+    MISSING_DAY = np.iinfo(np.int64).min
+
+    def __init__(self, data_dir=EMISSIONS_COLUMNAR_DIR, segment_rows=COLUMNAR_SEGMENT_ROWS):
+        """
+        Initialize the ColumnarStorage class.
+
+        Args:
+            data_dir (str, optional): Directory holding the header and segments
+            segment_rows (int, optional): Maximum rows per segment written by save
+        """
+        self.data_dir = data_dir
+        self.segment_rows = segment_rows
+        self.header_file = os.path.join(data_dir, "header.json")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.header = self._load_header()
+        self._segments = {}
+
+    def _load_header(self):
+        """Load the header, or start an empty one."""
+        if os.path.exists(self.header_file):
+            with open(self.header_file, 'r') as f:
+                return json.load(f)
+        return {"format_version": 1, "rows": 0, "next_segment": 1, "segments": []}
+
+    def refresh(self):
+        """Re-read the header; opened segments stay cached since they never change."""
+        self.header = self._load_header()
+        for name in set(self._segments) - set(self.header['segments']):
+            del self._segments[name]
+
+    def _save_header(self):
+        """Write the header, which makes newly written segments visible."""
+        _atomic_write(self.header_file, json.dumps(self.header, indent=2).encode('utf-8'))
+
+    def _segment_path(self, name):
+        """Get the directory for a segment."""
+        return os.path.join(self.data_dir, name)
+
+    def _write_segment(self, data):
+        """
+        Write rows as a new segment.
+
+        The segment is written to a temporary directory and renamed into
+        place; it only becomes part of the dataset once the header lists it.
+
+        Args:
+            data (pandas.DataFrame): Emissions rows
+
+        Returns:
+            str: Segment name
+        """
+        name = f"seg-{self.header['next_segment']:06d}"
+        self.header['next_segment'] += 1
+        path = self._segment_path(name)
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        data = apply_schema(data.reindex(columns=EMISSIONS_COLUMNS))
+        meta = {"rows": int(len(data)), "columns": {}}
+        for col in EMISSIONS_COLUMNS:
+            if col == 'date':
+                values = data[col].to_numpy().astype('datetime64[D]').astype(np.int64)
+                info = {"kind": "date"}
+            elif col in NUMERIC_COLUMNS:
+                values = data[col].to_numpy(dtype='float64', na_value=np.nan)
+                info = {"kind": "numeric"}
+            else:
+                codes, uniques = pd.factorize(data[col])
+                values = codes.astype(np.int32)
+                info = {
+                    "kind": "categorical" if col in CATEGORICAL_COLUMNS else "text",
+                    "categories": [str(value) for value in uniques],
+                }
+            with open(os.path.join(tmp_path, f"{col}.npy"), 'wb') as f:
+                np.save(f, values)
+                f.flush()
+                os.fsync(f.fileno())
+            meta['columns'][col] = info
+
+        with open(os.path.join(tmp_path, "meta.json"), 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return name
+
+    def _open_segment(self, name):
+        """
+        Open a segment's column arrays as read-only memory maps.
+
+        Segments never change once written, so opened maps are cached.
+
+        Returns:
+            tuple: (meta, dict of column name to numpy.memmap)
+        """
+        if name not in self._segments:
+            path = self._segment_path(name)
+            with open(os.path.join(path, "meta.json"), 'r') as f:
+                meta = json.load(f)
+            arrays = {
+                col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r')
+                for col in meta['columns']
+            }
+            self._segments[name] = (meta, arrays)
+        return self._segments[name]
+
+    def _remove_segments(self, names):
+        """Delete segment directories that are no longer listed in the header."""
+        for name in names:
+            self._segments.pop(name, None)
+            shutil.rmtree(self._segment_path(name), ignore_errors=True)
+
+    def _day_range(self, start_date=None, end_date=None):
+        """Convert a date range to inclusive day numbers, or (None, None)."""
+        if not (start_date and end_date):
+            return None, None
+        start = np.datetime64(_to_date_string(start_date), 'D').astype(np.int64)
+        end = np.datetime64(_to_date_string(end_date), 'D').astype(np.int64)
+        return start, end
+
+    def _segment_rows(self, meta, arrays, start_day=None, end_day=None, **filters):
+        """
+        Find the rows of a segment that match the filters.
+
+        Returns:
+            slice or numpy.ndarray: slice(None) for every row, else matching row positions
+        """
+        mask = None
+        if start_day is not None:
+            dates = arrays['date']
+            mask = (dates >= start_day) & (dates <= end_day)
+        for col, value in filters.items():
+            if value is None:
+                continue
+            if col not in self.FILTER_COLUMNS:
+                raise ValueError(f"Unsupported filter column: {col}")
+            categories = meta['columns'][col]['categories']
+            if value not in categories:
+                return np.array([], dtype=np.int64)
+            matches = arrays[col] == categories.index(value)
+            mask = matches if mask is None else mask & matches
+        if mask is None:
+            return slice(None)
+        return np.flatnonzero(mask)
+
+    def _decode(self, meta, arrays, rows=slice(None)):
+        """
+        Build a DataFrame from selected rows of a segment.
+
+        Returns:
+            pandas.DataFrame: Rows with datetime dates and categorical text columns
+        """
+        columns = {}
+        for col, info in meta['columns'].items():
+            values = np.array(arrays[col][rows])
+            if info['kind'] == 'date':
+                columns[col] = values.astype('datetime64[D]')
+            elif info['kind'] == 'numeric':
+                columns[col] = values
+            elif info['kind'] == 'categorical':
+                columns[col] = pd.Categorical.from_codes(values, categories=info['categories'])
+            else:
+                # Code -1 (missing) picks the trailing None
+                lookup = np.array(info['categories'] + [None], dtype=object)
+                columns[col] = lookup[values]
+        return pd.DataFrame(columns)
+
+    def load(self):
+        """
+        Load all emissions data.
+
+        Returns:
+            pandas.DataFrame: Emissions data with datetime dates
+        """
+        return self.query()
+
+    def save(self, data):
+        """
+        Replace the stored dataset, rewriting it as segments of segment_rows rows.
+
+        Args:
+            data (pandas.DataFrame): Complete emissions data
+        """
+        old_segments = self.header['segments']
+        segments = [
+            self._write_segment(data.iloc[start:start + self.segment_rows])
+            for start in range(0, len(data), self.segment_rows)
+        ]
+        self.header['segments'] = segments
+        self.header['rows'] = int(len(data))
+        self._save_header()
+        self._remove_segments(old_segments)
+
+    def append(self, new_rows, data=None):
+        """
+        Append new rows as a new segment.
+
+        Args:
+            new_rows (pandas.DataFrame): Rows added since the last save
+            data (pandas.DataFrame, optional): Complete emissions data (unused)
+        """
+        if len(new_rows) == 0:
+            return
+        self.header['segments'].append(self._write_segment(new_rows))
+        self.header['rows'] += int(len(new_rows))
+        self._save_header()
+
+        small = [
+            name for name in self.header['segments']
+            if self._open_segment(name)[0]['rows'] < self.segment_rows
+        ]
+        if len(small) > COLUMNAR_MAX_SMALL_SEGMENTS:
+            self.compact()
+
+    def compact(self):
+        """Merge all segments smaller than segment_rows into one new segment."""
+        small = [
+            name for name in self.header['segments']
+            if self._open_segment(name)[0]['rows'] < self.segment_rows
+        ]
+        if len(small) < 2:
+            return
+        merged = pd.concat([self._decode(*self._open_segment(name)) for name in small],
+                           ignore_index=True)
+        name = self._write_segment(merged)
+        self.header['segments'] = [
+            segment for segment in self.header['segments'] if segment not in small
+        ] + [name]
+        self._save_header()
+        self._remove_segments(small)
+
+    def query(self, start_date=None, end_date=None, **filters):
+        """
+        Get emissions rows matching the filters; only matching rows are decoded.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+            **filters: Column equality filters (scope, category, facility, business_unit)
+
+        Returns:
+            pandas.DataFrame: Matching rows with datetime dates
+        """
+        start_day, end_day = self._day_range(start_date, end_date)
+        frames = []
+        for name in self.header['segments']:
+            meta, arrays = self._open_segment(name)
+            rows = self._segment_rows(meta, arrays, start_day, end_day, **filters)
+            if isinstance(rows, slice) or len(rows) > 0:
+                frames.append(self._decode(meta, arrays, rows))
+        if not frames:
+            return empty_emissions_frame()
+        return apply_schema(pd.concat(frames, ignore_index=True))
+
+    def _add_group_sums(self, totals, categories, codes, emissions):
+        """Add per-code emission sums to totals keyed by category label."""
+        valid = codes >= 0
+        codes = codes[valid]
+        counts = np.bincount(codes, minlength=len(categories))
+        sums = np.bincount(codes, weights=emissions[valid], minlength=len(categories))
+        for code in np.flatnonzero(counts):
+            label = categories[code]
+            totals[label] = totals.get(label, 0.0) + float(sums[code])
+
+    def summary(self, start_date=None, end_date=None):
+        """
+        Get total, per-scope, per-category and monthly emissions.
+
+        Sums are computed per segment with np.bincount over the memory-mapped
+        code arrays, so memory use is bounded by the segment size.
+
+        Args:
+            start_date (datetime, optional): Start date for filtering
+            end_date (datetime, optional): End date for filtering
+
+        Returns:
+            dict: Summary in the same shape as DataHandler.get_emissions_summary
+        """
+        start_day, end_day = self._day_range(start_date, end_date)
+        total = 0.0
+        scope_data = {}
+        category_data = {}
+        month_scope_data = {}
+        for name in self.header['segments']:
+            meta, arrays = self._open_segment(name)
+            rows = self._segment_rows(meta, arrays, start_day, end_day)
+            if not isinstance(rows, slice) and len(rows) == 0:
+                continue
+
+            # pandas sums skip NaN, so treat missing emissions as zero
+            emissions = np.nan_to_num(arrays['emissions_kgCO2e'][rows])
+            scope_codes = np.asarray(arrays['scope'][rows])
+            scopes = meta['columns']['scope']['categories']
+            total += float(emissions.sum())
+            self._add_group_sums(scope_data, scopes, scope_codes, emissions)
+            self._add_group_sums(category_data, meta['columns']['category']['categories'],
+                                 np.asarray(arrays['category'][rows]), emissions)
+
+            # Months since 1970-01 combined with the scope code into one key
+            days = np.asarray(arrays['date'][rows])
+            valid = (days != self.MISSING_DAY) & (scope_codes >= 0)
+            months = days[valid].astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+            keys = months * len(scopes) + scope_codes[valid]
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse, weights=emissions[valid], minlength=len(unique_keys))
+            for key, value in zip(unique_keys.tolist(), sums.tolist()):
+                month, code = divmod(key, len(scopes))
+                month_key = (month, scopes[code])
+                month_scope_data[month_key] = month_scope_data.get(month_key, 0.0) + value
+
+        time_series = {}
+        for (month, scope), value in sorted(month_scope_data.items()):
+            label = f"{1970 + month // 12}-{month % 12 + 1:02d}"
+            time_series.setdefault(label, {})[scope] = value
+        return {
+            "total_emissions": total,
+            "scope_breakdown": scope_data,
+            "category_breakdown": category_data,
+            "time_series": time_series
+        }
+
+
+def migrate_json_to_sqlite(json_file=EMISSIONS_FILE, db_file=EMISSIONS_DB_FILE,
+                           journal_file=EMISSIONS_JOURNAL_FILE):
+    """
+    Copy emissions from the JSON file (and its journal, if any) into SQLite.
+
+    Any rows already in the database are replaced.
+
+    Args:
+        json_file (str, optional): Path to the emissions JSON file
+        db_file (str, optional): Path to the SQLite database file
+        journal_file (str, optional): Path to the JSON-lines journal
+
+    Returns:
+        int: Number of rows migrated
+    """
+    data = JournalStorage(json_file, journal_file).load()
+    SQLiteStorage(db_file).save(data)
+    return len(data)
+
+
+def migrate_json_to_shards(json_file=EMISSIONS_FILE, shard_dir=EMISSIONS_SHARD_DIR,
+                           granularity=EMISSIONS_SHARD_GRANULARITY,
+                           journal_file=EMISSIONS_JOURNAL_FILE):
+    """
+    Split emissions from the JSON file (and its journal, if any) into date shards.
+
+    Any existing shards in shard_dir are replaced.
+
+    Args:
+        json_file (str, optional): Path to the emissions JSON file
+        shard_dir (str, optional): Directory for the shard files
+        granularity (str, optional): "month" or "fiscal_year"
+        journal_file (str, optional): Path to the JSON-lines journal
+
+    Returns:
+        int: Number of rows migrated
+    """
+    data = JournalStorage(json_file, journal_file).load()
+    ShardedStorage(shard_dir, granularity).save(data)
+    return len(data)
+
+
+def migrate_json_to_columnar(json_file=EMISSIONS_FILE, data_dir=EMISSIONS_COLUMNAR_DIR,
+                             journal_file=EMISSIONS_JOURNAL_FILE):
+    """
+    Convert emissions from the JSON file (and its journal, if any) to column files.
+
+    Any existing columnar data in data_dir is replaced.
+
+    Args:
+        json_file (str, optional): Path to the emissions JSON file
+        data_dir (str, optional): Directory for the column files
+        journal_file (str, optional): Path to the JSON-lines journal
+
+    Returns:
+        int: Number of rows migrated
+    """
+    data = JournalStorage(json_file, journal_file).load()
+    ColumnarStorage(data_dir).save(data)
+    return len(data)
+
+
+STORAGE_BACKENDS = {
+    "json": JsonStorage,
+    "journal": JournalStorage,
+    "sqlite": SQLiteStorage,
+    "sharded": ShardedStorage,
+    "columnar": ColumnarStorage,
+}
+
+
+def get_storage(mode=None):
+    """
+    Get a storage backend instance.
+
+    Args:
+        mode (str, optional): Storage mode name; defaults to EMISSIONS_STORAGE_MODE
+
+    Returns:
+        StorageBackend: Storage backend for the requested mode
+
+    Raises:
+        ValueError: If the storage mode is unknown
+    """
+    mode = mode or EMISSIONS_STORAGE_MODE
+    if mode not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage mode: {mode}")
+    return STORAGE_BACKENDS[mode]()
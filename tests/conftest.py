@@ -0,0 +1,81 @@
+"""
+Shared fixtures for the YourCarbonFootprint tests.
+The application modules live at the repository root, so it is put on the import path.
+"""
+
+import json
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from factor_registry import FactorRegistry  # noqa: E402
+
+# A small registry: one factor with a later version, one without
+TEST_FACTORS = {
+    "Electricity": {
+        "Grid": {"factor": 0.6, "unit": "kWh", "source": "Grid 2023"},
+    },
+    "Stationary Combustion": {
+        "Diesel": {"factor": 2.7, "unit": "liter", "source": "IPCC 2006"},
+    },
+}
+TEST_SCOPE_CATEGORIES = {
+    "Scope 1": ["Stationary Combustion"],
+    "Scope 2": ["Electricity"],
+}
+TEST_FACTOR_VERSIONS = {
+    ("Electricity", "Grid"): [
+        {"effective_from": "2025-07-01", "factor": 0.5, "source": "Grid 2025"},
+    ],
+}
+
+
+@pytest.fixture
+def registry():
+    """Registry of TEST_FACTORS, with Grid at 0.6 before 2025-07-01 and 0.5 from then on."""
+    return FactorRegistry(TEST_FACTORS, TEST_SCOPE_CATEGORIES, versions=TEST_FACTOR_VERSIONS)
+
+
+def make_rows(rows):
+    """
+    Build emissions data from (date, category, activity, quantity, unit, emission_factor) tuples.
+
+    Returns:
+        pandas.DataFrame: Rows with emissions_kgCO2e = quantity * emission_factor
+    """
+    data = pd.DataFrame(rows, columns=['date', 'category', 'activity', 'quantity', 'unit', 'emission_factor'])
+    data['date'] = pd.to_datetime(data['date'])
+    data['scope'] = data['category'].map({"Electricity": "Scope 2"}).fillna("Scope 1")
+    data['emissions_kgCO2e'] = data['quantity'] * data['emission_factor']
+    data['notes'] = ""
+    return data
+
+
+# Entries as the first version of the app saved them: no facility, data
+# quality or other later columns
+BASELINE_RECORDS = [
+    {"date": "2024-08-15", "scope": "Scope 2", "category": "Electricity", "activity": "Bangladesh Grid",
+     "quantity": 1200.0, "unit": "kWh", "emission_factor": 0.6815, "emissions_kgCO2e": 817.8, "notes": ""},
+    {"date": "2024-11-20", "scope": "Scope 1", "category": "Stationary Combustion", "activity": "Diesel",
+     "quantity": 300.0, "unit": "liter", "emission_factor": 2.68787, "emissions_kgCO2e": 806.361, "notes": ""},
+    {"date": "2025-03-05", "scope": "Scope 2", "category": "Electricity", "activity": "Bangladesh Grid",
+     "quantity": 1500.0, "unit": "kWh", "emission_factor": 0.6815, "emissions_kgCO2e": 1022.25, "notes": ""},
+    {"date": "2025-09-10", "scope": "Scope 1", "category": "Stationary Combustion", "activity": "Diesel",
+     "quantity": 250.0, "unit": "liter", "emission_factor": 2.68787, "emissions_kgCO2e": 671.9675, "notes": "Generator"},
+]
+
+
+@pytest.fixture
+def baseline_handler(tmp_path, monkeypatch):
+    """DataHandler over a data directory holding a baseline-format emissions.json."""
+    from data_handler import DataHandler
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "emissions.json").write_text(json.dumps(BASELINE_RECORDS))
+    handler = DataHandler("json")
+    yield handler
+    handler.close()
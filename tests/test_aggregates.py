@@ -0,0 +1,59 @@
+"""Tests for the running aggregates and the emissions cube."""
+
+import pandas as pd
+import pytest
+from aggregates import RunningAggregates
+from conftest import BASELINE_RECORDS
+from cube import EmissionsCube
+from schema import apply_schema
+
+DATA = apply_schema(pd.DataFrame(BASELINE_RECORDS))
+
+
+def test_aggregates_summary():
+    summary = RunningAggregates.from_data(DATA).summary()
+    assert summary['total_emissions'] == pytest.approx(3318.3785)
+    assert summary['scope_breakdown'] == pytest.approx({"Scope 1": 1478.3285, "Scope 2": 1840.05})
+    assert summary['time_series']["2024-08"] == pytest.approx({"Scope 2": 817.8})
+
+
+def test_aggregates_follow_adds_and_removes():
+    aggregates = RunningAggregates.from_data(DATA.iloc[:2])
+    aggregates.add_rows(DATA.iloc[2:])
+    aggregates.remove_rows(DATA.iloc[[0]])
+    assert aggregates.verify(DATA.iloc[1:]) == []
+    # Groups left without rows are dropped, as a groupby would
+    assert "2024-08" not in aggregates.summary()['time_series']
+
+
+def test_verify_reports_mismatches():
+    assert RunningAggregates.from_data(DATA.iloc[:2]).verify(DATA)
+
+
+def test_summary_matches_the_data(baseline_handler):
+    summary = baseline_handler.get_emissions_summary()
+    assert summary['total_emissions'] == pytest.approx(3318.3785)
+    assert baseline_handler.verify_aggregates() == []
+
+
+def test_cube_queries():
+    cube = EmissionsCube.from_data(DATA, version=3)
+    assert cube.version == 3
+    assert cube.total() == pytest.approx(3318.3785)
+    assert cube.dice(scope="Scope 1").total() == pytest.approx(1478.3285)
+    assert cube.between("2024-11-01", "2025-03-31").total() == pytest.approx(1828.611)
+    by_scope = cube.rollup('scope').set_index('scope')
+    assert by_scope.loc["Scope 2", 'rows'] == 2
+    with pytest.raises(ValueError):
+        cube.dice(region="Dhaka")
+
+
+def test_cube_is_updated_by_returning_a_new_cube():
+    cube = EmissionsCube.from_data(DATA.iloc[:3], version=1)
+    added = cube.with_added(DATA.iloc[3:], version=2)
+    assert cube.total() == pytest.approx(2646.411)
+    assert added.total() == pytest.approx(3318.3785)
+    removed = added.with_removed(DATA.iloc[[0]], version=3)
+    expected = EmissionsCube.from_data(DATA.iloc[1:])
+    assert removed.total() == pytest.approx(expected.total())
+    assert removed.rollup('scope')['rows'].tolist() == expected.rollup('scope')['rows'].tolist()
@@ -0,0 +1,68 @@
+"""Tests for flagging unusual emission entries."""
+
+import io
+import pandas as pd
+from anomalies import describe_anomaly, detect_anomalies, score_anomalies
+
+
+def _monthly(values, facility=None):
+    """One Bangladesh Grid entry per month of 2024 with the given emissions."""
+    data = pd.DataFrame({
+        'date': pd.date_range("2024-01-01", periods=len(values), freq="MS"),
+        'activity': "Bangladesh Grid",
+        'emissions_kgCO2e': values,
+    })
+    if facility is not None:
+        data['facility'] = facility
+    return data
+
+
+def test_outlier_is_flagged_against_its_series():
+    values = [100.0, 104.0, 98.0, 101.0, 97.0, 103.0, 99.0, 102.0, 1000.0, 100.0, 96.0, 105.0]
+    flagged = detect_anomalies(_monthly(values, facility="Dhaka"))
+    assert flagged.index.tolist() == [8]
+    assert flagged['ratio'].iloc[0] > 9
+    assert describe_anomaly(flagged.iloc[0]).startswith("Bangladesh Grid at Dhaka: ")
+
+
+def test_rows_without_a_facility_column_form_one_series_per_activity():
+    values = [100.0, 104.0, 98.0, 101.0, 97.0, 103.0, 99.0, 102.0, 1000.0, 100.0, 96.0, 105.0]
+    flagged = detect_anomalies(_monthly(values))
+    assert flagged.index.tolist() == [8]
+    assert describe_anomaly(flagged.iloc[0]).startswith("Bangladesh Grid: ")
+
+
+def test_series_with_too_few_entries_are_not_scored():
+    scores = score_anomalies(_monthly([100.0, 1000.0, 100.0]))
+    assert scores['robust_z'].isna().all()
+
+
+def test_detect_anomalies_on_a_baseline_file(baseline_handler):
+    assert len(baseline_handler.detect_anomalies()) == 0
+
+
+def test_import_csv_into_a_baseline_file(baseline_handler):
+    csv = ("date,scope,category,activity,quantity,unit,emission_factor\n"
+           "2025-05-01,Scope 2,Electricity,Bangladesh Grid,5,MWh,0.6815\n")
+    assert baseline_handler.import_csv(io.StringIO(csv)) == (True, "Successfully imported 1 entries")
+    data = baseline_handler.emissions_data
+    assert len(data) == 5
+    assert data['data_quality'].tolist().count("Medium") == 1
+
+
+def test_import_entries_flags_unusual_rows_in_the_history_unit(baseline_handler):
+    # Twelve months of grid use, then an import of one usual month in MWh and one unusual month
+    history = [{'date': f"2024-{month:02d}-15", 'scope': "Scope 2", 'category': "Electricity",
+                'activity': "Bangladesh Grid", 'quantity': 1000.0 + month, 'unit': "kWh", 'emission_factor': 0.6815}
+               for month in range(1, 13)]
+    baseline_handler.add_emission_entries(history)
+    rows = pd.DataFrame({
+        'date': ["2025-01-15", "2025-02-15"], 'scope': "Scope 2", 'category': "Electricity",
+        'activity': "Bangladesh Grid", 'quantity': [1.005, 20000.0], 'unit': ["MWh", "kWh"],
+        'emission_factor': [681.5, 0.6815],
+    })
+    results, anomalies = baseline_handler.import_entries(rows)
+    assert results == [(True, "Entry added"), (True, "Entry added")]
+    assert anomalies.index.tolist() == [1]
+    added = baseline_handler.emissions_data.set_index('date').loc["2025-01-15"]
+    assert (added['business_unit'], added['data_quality']) == ("Corporate", "Medium")
@@ -0,0 +1,32 @@
+"""Tests for the emission factor search."""
+
+from emission_factors import search_emission_factors
+from factor_search import FACTOR_SEARCH_INDEX, ngrams, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Petrol/Gasoline") == ["petrol", "gasoline"]
+    assert tokenize("R-410A") == ["r", "410a"]
+    assert ngrams("ab") == {"$ab", "ab$"}
+
+
+def _activities(query):
+    return [(match['category'], match['activity']) for match in FACTOR_SEARCH_INDEX.search(query, limit=5)]
+
+
+def test_exact_prefix_and_typo_matches():
+    assert _activities("bangladesh grid")[0] == ("Electricity", "Bangladesh Grid")
+    assert ("Electricity", "Bangladesh Grid") in _activities("electr")
+    assert ("Electricity", "Bangladesh Grid") in _activities("electrcity")
+
+
+def test_bengali_terms():
+    assert ("Electricity", "Bangladesh Grid") in _activities("বিদ্যুৎ")
+
+
+def test_results_carry_the_factor():
+    match = FACTOR_SEARCH_INDEX.search("bangladesh grid", limit=1)[0]
+    assert match['factor'] == 0.6815
+    assert match['unit'] == "kWh"
+    assert FACTOR_SEARCH_INDEX.search("zzzz") == []
+    assert search_emission_factors("bangladesh grid")
@@ -0,0 +1,56 @@
+"""Tests for the sorted date index and the bitmap indexes."""
+
+import numpy as np
+import pandas as pd
+from bitmap_index import BitmapIndex
+from schema import append_sorted, apply_schema, date_range_positions, sort_by_date
+
+DATA = sort_by_date(apply_schema(pd.DataFrame({
+    'date': ["2025-03-01", "2025-01-01", None, "2025-02-01", "2025-02-01"],
+    'scope': ["Scope 1", "Scope 2", "Scope 2", "Scope 1", "Scope 3"],
+    'facility': ["Dhaka", "Gazipur", "Dhaka", None, "Dhaka"],
+    'quantity': [1.0, 2.0, 3.0, 4.0, 5.0],
+})))
+
+
+def test_sort_by_date_puts_missing_dates_last():
+    assert DATA['quantity'].tolist() == [2.0, 4.0, 5.0, 1.0, 3.0]
+
+
+def test_date_range_positions():
+    assert date_range_positions(DATA, "2025-02-01", "2025-02-28") == (1, 3)
+    assert date_range_positions(DATA, "2024-01-01", "2024-12-31") == (0, 0)
+
+
+def test_append_sorted_keeps_the_order():
+    new_rows = apply_schema(pd.DataFrame({'date': ["2025-02-01", "2024-12-01"], 'quantity': [6.0, 7.0]}))
+    combined = append_sorted(DATA, new_rows)
+    assert combined['quantity'].tolist() == [7.0, 2.0, 4.0, 5.0, 6.0, 1.0, 3.0]
+
+
+def test_bitmap_query():
+    index = BitmapIndex.from_data(DATA)
+    dhaka = index.query(facility="Dhaka")
+    assert BitmapIndex.positions(dhaka).tolist() == [2, 3, 4]
+    assert BitmapIndex.positions(index.query(facility="Dhaka", scope="Scope 1")).tolist() == [3]
+    both = index.query(match_any=True, facility="Gazipur", scope=["Scope 3"])
+    assert BitmapIndex.positions(both).tolist() == [0, 2]
+    assert BitmapIndex.count(index.query()) == len(DATA)
+
+
+def test_bitmap_follows_inserts_and_deletes():
+    index = BitmapIndex.from_data(DATA)
+    new_rows = apply_schema(pd.DataFrame({'date': ["2025-01-15"], 'scope': ["Scope 1"], 'facility': ["Dhaka"]}))
+    combined = append_sorted(DATA, new_rows)
+    index.insert(combined, np.array([1]))
+    assert BitmapIndex.positions(index.query(facility="Dhaka")).tolist() == [1, 3, 4, 5]
+    index.delete(0)
+    rebuilt = BitmapIndex.from_data(combined.drop(index=0).reset_index(drop=True))
+    assert index.query(facility="Dhaka") == rebuilt.query(facility="Dhaka")
+    assert index.query(scope="Scope 1") == rebuilt.query(scope="Scope 1")
+
+
+def test_handler_query_on_a_baseline_file(baseline_handler):
+    rows = baseline_handler.query("2024-07-01", "2025-06-30", scope="Scope 2")
+    assert rows['quantity'].tolist() == [1200.0, 1500.0]
+    assert len(baseline_handler.query(facility="Dhaka")) == 0
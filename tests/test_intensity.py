@@ -0,0 +1,49 @@
+"""Tests for scoring facilities against industry intensity benchmarks."""
+
+import pandas as pd
+import pytest
+from intensity import INTENSITY_COLUMNS, facility_totals, score_intensity
+
+DATA = pd.DataFrame({
+    'date': pd.to_datetime(["2025-07-05", "2025-07-20", "2025-07-10", "2025-08-03"]),
+    'category': ["Electricity", "Stationary Combustion", "Electricity", "Electricity"],
+    'unit': ["kWh", "liter", "kWh", "kWh"],
+    'quantity': [1000.0, 100.0, 2000.0, 500.0],
+    'emissions_kgCO2e': [681.5, 268.8, 1363.0, 340.75],
+    'facility': ["Dhaka", "Dhaka", "Gazipur", "Dhaka"],
+})
+
+PRODUCTION = pd.DataFrame({
+    'facility': ["Dhaka", "Gazipur"],
+    'period': ["2025-07", "2025-07"],
+    'industry': ["Ready Made Garments", "Ready Made Garments"],
+    'metric': ["electricity_intensity", "electricity_intensity"],
+    'output': [500.0, 500.0],
+})
+
+
+def test_facility_totals():
+    totals = facility_totals(DATA)
+    dhaka = totals[totals['facility'] == "Dhaka"].set_index('period')
+    assert dhaka.loc[pd.Period("2025-07", "M"), 'emissions_kgCO2e'] == pytest.approx(950.3)
+    assert dhaka.loc[pd.Period("2025-07", "M"), 'electricity_kwh'] == 1000.0
+
+
+def test_score_intensity_against_the_benchmark():
+    scored = score_intensity(DATA, PRODUCTION)
+    assert list(scored.columns) == INTENSITY_COLUMNS
+    assert scored['intensity'].tolist() == [2.0, 4.0]
+    assert scored['gap'].tolist() == [-0.5, 1.5]
+    assert scored['percentile'].tolist() == [0.5, 1.0]
+
+
+def test_data_without_facility_or_unit_columns():
+    data = DATA.drop(columns=['facility', 'unit'])
+    assert len(facility_totals(data)) == 0
+    scored = score_intensity(data, PRODUCTION)
+    assert scored['numerator'].tolist() == [0.0, 0.0]
+
+
+def test_missing_production_columns_are_reported():
+    with pytest.raises(ValueError, match="output"):
+        score_intensity(DATA, PRODUCTION.drop(columns=['output']))
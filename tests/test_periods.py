@@ -0,0 +1,52 @@
+"""Tests for the reporting periods and resampling buckets."""
+
+import pandas as pd
+import pytest
+from periods import bucket_labels, bucket_starts, resample_frame
+
+DATES = pd.Series(pd.to_datetime(["2024-06-30", "2024-07-01", "2024-12-15", "2025-02-10", None]))
+
+
+def test_fiscal_year_buckets():
+    starts = bucket_starts(DATES, 'fiscal_year')
+    assert list(pd.DatetimeIndex(starts[:4]).strftime('%Y-%m-%d')) == [
+        "2023-07-01", "2024-07-01", "2024-07-01", "2024-07-01"]
+    assert pd.isna(starts[4])
+    assert list(bucket_labels(starts[:2], 'fiscal_year')) == ["FY2023-24", "FY2024-25"]
+
+
+def test_seasonal_buckets_leave_other_months_out():
+    starts = bucket_starts(DATES, 'export_season')
+    assert pd.isna(starts[0]) and pd.isna(starts[1])
+    assert starts[2] == starts[3] == pd.Timestamp("2024-10-01")
+    assert list(bucket_labels(starts[2:3], 'export_season')) == ["2024-25 export season"]
+    assert list(bucket_labels(bucket_starts(DATES[:1], 'monsoon'), 'monsoon')) == ["2024 monsoon"]
+
+
+def test_weeks_end_on_saturday():
+    starts = bucket_starts(pd.Series(pd.to_datetime(["2025-07-13", "2025-07-19", "2025-07-20"])), 'week')
+    assert list(bucket_labels(starts, 'week')) == [
+        "Week of 2025-07-13", "Week of 2025-07-13", "Week of 2025-07-20"]
+
+
+def test_unknown_bucket():
+    with pytest.raises(ValueError):
+        bucket_starts(DATES, 'fortnight')
+
+
+def test_resample_frame():
+    data = pd.DataFrame({
+        'date': DATES,
+        'scope': ["Scope 1", "Scope 1", "Scope 2", "Scope 1", "Scope 1"],
+        'emissions_kgCO2e': [1.0, 2.0, 3.0, None, 5.0],
+    })
+    result = resample_frame(data, 'fiscal_year', by=['scope'])
+    assert result['label'].tolist() == ["FY2023-24", "FY2024-25", "FY2024-25"]
+    assert result['emissions_kgCO2e'].tolist() == [1.0, 2.0, 3.0]
+    assert result['rows'].tolist() == [1, 2, 1]
+
+
+def test_monthly_totals_cannot_be_resampled_by_week():
+    cells = pd.DataFrame({'month': DATES[:1], 'emissions_kgCO2e': [1.0], 'rows': [1]})
+    with pytest.raises(ValueError):
+        resample_frame(cells, 'week', date_column='month')
@@ -0,0 +1,58 @@
+"""Tests for the three-way merge of concurrent edits."""
+
+import pandas as pd
+from conftest import make_rows
+from persistence import merge_changes
+
+BASE = make_rows([
+    ("2025-01-10", "Electricity", "Grid", 100.0, "kWh", 0.6),
+    ("2025-02-10", "Electricity", "Grid", 200.0, "kWh", 0.6),
+    ("2025-03-10", "Stationary Combustion", "Diesel", 50.0, "liter", 2.7),
+])
+
+
+def _with(new_rows):
+    """BASE with rows appended."""
+    return pd.concat([BASE, new_rows], ignore_index=True)
+
+
+def _quantities(data):
+    """Sorted quantities, which identify the test rows."""
+    return sorted(data['quantity'].tolist())
+
+
+def test_merge_keeps_both_writers_additions():
+    ours = make_rows([("2025-04-10", "Electricity", "Grid", 300.0, "kWh", 0.6)])
+    theirs = make_rows([("2025-05-10", "Stationary Combustion", "Diesel", 70.0, "liter", 2.7)])
+    merged = merge_changes(BASE, _with(ours), _with(theirs))
+    assert _quantities(merged) == [50.0, 70.0, 100.0, 200.0, 300.0]
+
+
+def test_merge_applies_our_deletion_to_their_data():
+    ours = BASE.drop(index=1)
+    theirs = _with(make_rows([("2025-05-10", "Electricity", "Grid", 400.0, "kWh", 0.6)]))
+    merged = merge_changes(BASE, ours, theirs)
+    assert _quantities(merged) == [50.0, 100.0, 400.0]
+
+
+def test_merge_keeps_their_deletion():
+    ours = _with(make_rows([("2025-04-10", "Electricity", "Grid", 300.0, "kWh", 0.6)]))
+    theirs = BASE.drop(index=0)
+    merged = merge_changes(BASE, ours, theirs)
+    assert _quantities(merged) == [50.0, 200.0, 300.0]
+
+
+def test_merge_treats_an_edit_as_delete_plus_add():
+    ours = BASE.copy()
+    ours.loc[2, 'quantity'] = 55.0
+    merged = merge_changes(BASE, ours, BASE)
+    assert _quantities(merged) == [55.0, 100.0, 200.0]
+
+
+def test_merge_keeps_duplicate_rows_distinct():
+    duplicate = BASE.iloc[[0]]
+    ours = _with(duplicate)
+    theirs = BASE.drop(index=0)
+    # Our second copy is an addition, so it survives their deletion of the first
+    merged = merge_changes(BASE, ours, theirs)
+    assert _quantities(merged) == [50.0, 100.0, 200.0]
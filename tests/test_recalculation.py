@@ -0,0 +1,104 @@
+"""Tests for recalculating and restating emissions with effective-dated factors."""
+
+import numpy as np
+import pytest
+from conftest import make_rows
+from recalculation import (
+    CUSTOM_FACTOR_VERSION,
+    FACTOR_VERSION_COLUMN,
+    recalculate_emissions,
+    record_factor_versions,
+    restate_emissions,
+)
+
+
+def test_recalculate_uses_the_version_in_effect_on_each_date(registry):
+    data = make_rows([
+        ("2025-06-30", "Electricity", "Grid", 100.0, "kWh", 1.0),
+        ("2025-07-01", "Electricity", "Grid", 100.0, "kWh", 1.0),
+        ("2025-07-01", "Stationary Combustion", "Diesel", 10.0, "liter", 2.7),
+        ("2025-07-01", "Other", "Own Activity", 10.0, "kg", 3.0),
+    ])
+    result = recalculate_emissions(data, registry=registry)
+    assert result['emission_factor'].tolist() == [0.6, 0.5, 2.7, 3.0]
+    assert result['emissions_kgCO2e'].tolist() == pytest.approx([60.0, 50.0, 27.0, 30.0])
+    assert result[FACTOR_VERSION_COLUMN].tolist() == ["Grid 2023", "Grid 2025", "IPCC 2006", CUSTOM_FACTOR_VERSION]
+    assert result['factor_deviates'].tolist() == [True, True, False, False]
+    assert np.isnan(result['registry_factor'].iloc[3])
+
+
+def test_recalculate_converts_units_first(registry):
+    data = make_rows([
+        ("2025-08-01", "Electricity", "Grid", 2.0, "MWh", 0.5),
+        ("2025-08-01", "Electricity", "Grid", 2.0, "liter", 0.7),
+    ])
+    result = recalculate_emissions(data, registry=registry)
+    assert result['quantity'].tolist() == [2000.0, 2.0]
+    assert result['emissions_kgCO2e'].tolist() == pytest.approx([1000.0, 1.4])
+    # The row that cannot be converted keeps its stored factor
+    assert result['emission_factor'].tolist() == [0.5, 0.7]
+    assert result['unit_problem'].tolist() == ["", "unit liter cannot be converted to kWh"]
+
+
+def test_restate_moves_rows_to_the_version_now_in_effect(registry):
+    # Entered with the old Grid factor before the new version was known
+    data = make_rows([
+        ("2025-06-15", "Electricity", "Grid", 100.0, "kWh", 0.6),
+        ("2025-07-15", "Electricity", "Grid", 100.0, "kWh", 0.6),
+        ("2025-07-15", "Electricity", "Grid", 100.0, "kWh", 0.9),
+        ("2025-07-15", "Stationary Combustion", "Diesel", 10.0, "liter", 2.7),
+    ])
+    data[FACTOR_VERSION_COLUMN] = ["Grid 2023", "Grid 2023", CUSTOM_FACTOR_VERSION, "IPCC 2006"]
+    restated_data, restated = restate_emissions(data, registry)
+    assert restated.tolist() == [False, True, False, False]
+    assert restated_data['emission_factor'].tolist() == [0.6, 0.5, 0.9, 2.7]
+    assert restated_data['emissions_kgCO2e'].tolist() == pytest.approx([60.0, 50.0, 90.0, 27.0])
+    assert restated_data[FACTOR_VERSION_COLUMN].tolist() == ["Grid 2023", "Grid 2025", CUSTOM_FACTOR_VERSION, "IPCC 2006"]
+
+    _, restated_again = restate_emissions(restated_data, registry)
+    assert not restated_again.any()
+
+
+def test_restate_records_missing_versions_first(registry):
+    data = make_rows([
+        ("2025-07-15", "Electricity", "Grid", 100.0, "kWh", 0.6),
+        ("2025-07-15", "Electricity", "Grid", 100.0, "kWh", 0.5),
+    ])
+    assert record_factor_versions(data, registry).tolist() == ["Grid 2023", "Grid 2025"]
+    restated_data, restated = restate_emissions(data, registry)
+    assert restated.tolist() == [True, False]
+    assert restated_data['emission_factor'].tolist() == [0.5, 0.5]
+
+
+def test_restate_converts_units_of_restated_rows(registry):
+    data = make_rows([("2025-07-15", "Electricity", "Grid", 1.0, "MWh", 0.6)])
+    data[FACTOR_VERSION_COLUMN] = ["Grid 2023"]
+    restated_data, restated = restate_emissions(data, registry)
+    assert restated.tolist() == [True]
+    assert restated_data['quantity'].tolist() == [1000.0]
+    assert restated_data['unit'].tolist() == ["kWh"]
+    assert restated_data['emissions_kgCO2e'].tolist() == pytest.approx([500.0])
+
+
+def test_entries_with_the_old_form_jute_factor_are_custom():
+    # The shared registry: Jute Products is 1.15; the old form entered 0.82
+    data = make_rows([
+        ("2024-03-01", "Purchased Goods & Services", "Jute Products", 100.0, "kg", 0.82),
+        ("2024-03-01", "Purchased Goods & Services", "Jute Products", 100.0, "kg", 1.15),
+    ])
+    assert record_factor_versions(data).tolist() == [CUSTOM_FACTOR_VERSION, "Local LCA study"]
+    restated_data, restated = restate_emissions(data)
+    assert not restated.any()
+    assert restated_data['emission_factor'].tolist() == [0.82, 1.15]
+
+
+def test_backdated_entries_get_the_published_jute_factor(baseline_handler):
+    results = baseline_handler.add_emission_entries([{
+        'date': "2024-03-01", 'scope': "Scope 3", 'category': "Purchased Goods & Services",
+        'activity': "Jute Products", 'quantity': 100.0, 'unit': "kg", 'emission_factor': None,
+    }])
+    assert results == [(True, "Entry added")]
+    data = baseline_handler.emissions_data
+    row = data[data['activity'] == "Jute Products"].iloc[0]
+    assert row['emission_factor'] == 1.15
+    assert row['emissions_kgCO2e'] == pytest.approx(115.0)
@@ -0,0 +1,99 @@
+"""Tests for the frozen yearly rollups behind multi-year trends."""
+
+import pandas as pd
+import pytest
+from rollups import YearlyRollups, fiscal_year, summarize_rows
+from schema import apply_schema, sort_by_date
+
+TODAY = pd.Timestamp("2025-10-01")
+
+
+def _data(rows):
+    """Sorted emissions data from (date, scope, emissions_kgCO2e) tuples, without a data_quality column."""
+    data = pd.DataFrame(rows, columns=['date', 'scope', 'emissions_kgCO2e'])
+    return sort_by_date(apply_schema(data).drop(columns=['data_quality']))
+
+
+DATA = _data([
+    ("2023-08-01", "Scope 1", 10.0),
+    ("2024-03-01", "Scope 2", 20.0),
+    ("2024-09-01", "Scope 1", 30.0),
+    ("2025-08-01", "Scope 2", 40.0),
+])
+
+
+def test_fiscal_year_ends_in_june():
+    assert fiscal_year("2024-06-30") == 2024
+    assert fiscal_year("2024-07-01") == 2025
+
+
+def test_summarize_rows_counts_missing_groups_as_blank():
+    record = summarize_rows(DATA.iloc[:2])
+    assert record['total'] == 30.0
+    assert record['scope'] == {"Scope 1": [10.0, 1], "Scope 2": [20.0, 1]}
+    assert record['data_quality'] == {"": [30.0, 2]}
+
+
+def test_trend_freezes_closed_years_only():
+    rollups = YearlyRollups()
+    assert rollups.refresh(DATA, 1, TODAY)
+    assert sorted(rollups.records) == [2024, 2025]
+    trend = rollups.trend(DATA, today=TODAY)
+    assert trend['label'].tolist() == ["FY2023-24", "FY2024-25", "FY2025-26"]
+    assert trend['emissions_kgCO2e'].tolist() == [30.0, 30.0, 40.0]
+    assert trend['frozen'].tolist() == [True, True, False]
+    assert not rollups.refresh(DATA, 1, TODAY)
+
+
+@pytest.mark.parametrize("by", ["scope", "data_quality"])
+def test_trend_breakdowns(by):
+    rollups = YearlyRollups()
+    rollups.refresh(DATA, 1, TODAY)
+    trend = rollups.trend(DATA, by=by, today=TODAY)
+    assert trend.groupby('label')['emissions_kgCO2e'].sum().tolist() == [30.0, 30.0, 40.0]
+    if by == "data_quality":
+        assert set(trend[by]) == {""}
+
+
+def test_a_change_rollups_were_not_told_about_refreezes_every_year():
+    rollups = YearlyRollups()
+    rollups.refresh(DATA, 1, TODAY)
+    edited = DATA.copy()
+    edited.loc[0, 'emissions_kgCO2e'] = 15.0
+    assert rollups.refresh(edited, 2, TODAY)
+    assert rollups.trend(edited, today=TODAY)['emissions_kgCO2e'].tolist() == [35.0, 30.0, 40.0]
+
+
+def test_invalidate_drops_the_touched_year():
+    rollups = YearlyRollups()
+    rollups.refresh(DATA, 1, TODAY)
+    assert rollups.invalidate(pd.Series(["2024-01-15"])) == [2024]
+    assert sorted(rollups.records) == [2025]
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "rollups.json")
+    rollups = YearlyRollups("JsonStorage")
+    rollups.refresh(DATA, 1, TODAY)
+    rollups.save(path, 7)
+    loaded = YearlyRollups.load(path, "JsonStorage")
+    assert loaded.version == 7
+    assert loaded.records == rollups.records
+    assert YearlyRollups.load(path, "SQLiteStorage").records == {}
+
+
+def test_yearly_trend_on_a_baseline_file(baseline_handler):
+    trend = baseline_handler.get_yearly_trend()
+    assert trend['emissions_kgCO2e'].sum() == pytest.approx(3318.3785)
+    by_quality = baseline_handler.get_yearly_trend('data_quality')
+    assert set(by_quality['data_quality']) == {""}
+    assert baseline_handler.get_yearly_trend('scope')['emissions_kgCO2e'].sum() == pytest.approx(3318.3785)
+
+
+def test_fiscal_year_dashboard_inputs_on_a_baseline_file(baseline_handler):
+    from data_store import SharedEmissionsStore
+
+    store = SharedEmissionsStore(baseline_handler)
+    version, _ = store.snapshot()
+    cube, time_data = store.dashboard_inputs(version, 'fiscal_year')
+    assert time_data['emissions_kgCO2e'].sum() == pytest.approx(3318.3785)
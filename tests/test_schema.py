@@ -0,0 +1,28 @@
+"""Tests for the canonical emissions schema."""
+
+import pandas as pd
+from conftest import BASELINE_RECORDS
+from schema import EMISSIONS_COLUMNS, apply_schema
+
+
+def test_missing_columns_are_added_with_their_dtype():
+    data = apply_schema(pd.DataFrame(BASELINE_RECORDS))
+    assert set(EMISSIONS_COLUMNS) <= set(data.columns)
+    assert isinstance(data['facility'].dtype, pd.CategoricalDtype)
+    assert data['facility'].isna().all()
+    assert data['notes'].tolist() == [record['notes'] for record in BASELINE_RECORDS]
+    assert pd.api.types.is_datetime64_any_dtype(data['date'])
+
+
+def test_columns_outside_the_schema_are_kept():
+    data = apply_schema(pd.DataFrame({'quantity': ['5'], 'supplier': ['Acme']}))
+    assert data['quantity'].tolist() == [5.0]
+    assert data['supplier'].tolist() == ['Acme']
+    assert data['date'].isna().all()
+
+
+def test_baseline_file_loads_with_every_column(baseline_handler):
+    data = baseline_handler.emissions_data
+    assert len(data) == len(BASELINE_RECORDS)
+    assert set(EMISSIONS_COLUMNS) <= set(data.columns)
+    assert data['data_quality'].isna().all()
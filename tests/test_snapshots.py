@@ -0,0 +1,77 @@
+"""Tests for the incremental time-travel snapshots."""
+
+import os
+import pandas as pd
+from conftest import BASELINE_RECORDS
+from schema import apply_schema
+from snapshots import SnapshotStore
+
+DATA = apply_schema(pd.DataFrame(BASELINE_RECORDS))
+
+
+def _block_files(store):
+    """Number of block files written."""
+    return sum(len(files) for _, _, files in os.walk(store.block_dir))
+
+
+def test_take_and_load(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    name = store.take(DATA, 1)
+    loaded = store.load(name)
+    assert loaded['quantity'].tolist() == DATA['quantity'].tolist()
+    assert store.latest()['version'] == 1
+    assert store.latest()['rows'] == len(DATA)
+
+
+def test_unchanged_data_takes_no_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.take(DATA)
+    assert store.take(DATA.copy()) is None
+    assert len(store.list_snapshots()) == 1
+
+
+def test_only_changed_months_are_written(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.take(DATA)
+    blocks = _block_files(store)
+    edited = DATA.copy()
+    edited.loc[3, 'quantity'] = 260.0
+    store.take(edited)
+    assert _block_files(store) == blocks + 1
+    assert store.load(store.list_snapshots()[-1])['quantity'].tolist()[3] == 260.0
+    assert store.load(store.list_snapshots()[0])['quantity'].tolist()[3] == 250.0
+
+
+def test_find_as_of(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    assert store.find_as_of("2000-01-01") is None
+    name = store.take(DATA)
+    assert store.find_as_of(pd.Timestamp.now() + pd.Timedelta(minutes=1)) == name
+
+
+def test_corrupted_file_is_restored_from_the_latest_snapshot(baseline_handler):
+    # Loading the baseline file took the first snapshot
+    assert baseline_handler.snapshots.latest()['rows'] == len(BASELINE_RECORDS)
+    baseline_handler.close()
+    with open(os.path.join("data", "emissions.json"), "w") as f:
+        f.write("[{not json")
+
+    from data_handler import DataHandler
+    restored = DataHandler("json")
+    try:
+        assert len(restored.emissions_data) == len(BASELINE_RECORDS)
+        assert "restored from the snapshot" in restored.load_warning
+    finally:
+        restored.close()
+
+
+def test_as_of_returns_the_data_before_a_change(baseline_handler):
+    before = pd.Timestamp.now()
+    baseline_handler.add_emission_entries([{
+        'date': "2025-10-01", 'scope': "Scope 2", 'category': "Electricity", 'activity': "Bangladesh Grid",
+        'quantity': 100.0, 'unit': "kWh", 'emission_factor': 0.6815,
+    }])
+    baseline_handler.flush()
+    assert len(baseline_handler.as_of(before)) == len(BASELINE_RECORDS)
+    assert len(baseline_handler.as_of(pd.Timestamp.now())) == len(BASELINE_RECORDS) + 1
+
@@ -0,0 +1,86 @@
+"""Tests for saving, appending and loading emissions through each storage backend."""
+
+import os
+import pandas as pd
+import pytest
+from conftest import make_rows
+from schema import EMISSIONS_COLUMNS, apply_schema, sort_by_date
+from storage import ColumnarStorage, JournalStorage, JsonStorage, ShardedStorage, SQLiteStorage
+
+# Backend name to a factory of a backend storing under a directory
+BACKENDS = {
+    "json": lambda path: JsonStorage(os.path.join(path, "emissions.json")),
+    "journal": lambda path: JournalStorage(os.path.join(path, "emissions.json"),
+                                           os.path.join(path, "emissions_journal.jsonl")),
+    "sqlite": lambda path: SQLiteStorage(os.path.join(path, "emissions.db")),
+    "sharded": lambda path: ShardedStorage(os.path.join(path, "emissions")),
+    "columnar": lambda path: ColumnarStorage(os.path.join(path, "emissions_columnar"), segment_rows=2),
+}
+
+
+def _emissions(rows):
+    """Emissions data with every canonical column."""
+    data = make_rows(rows)
+    for column in EMISSIONS_COLUMNS:
+        if column not in data.columns:
+            data[column] = "Head Office" if column == 'facility' else ""
+    return apply_schema(data[EMISSIONS_COLUMNS])
+
+
+def _comparable(data):
+    """Data in canonical dtypes and date order, with plain columns so dtypes compare equal."""
+    data = sort_by_date(apply_schema(data[EMISSIONS_COLUMNS])).reset_index(drop=True)
+    # Backends differ in date resolution and category order, not in values
+    return data.astype({column: 'datetime64[ns]' if column == 'date' else object for column in data.columns})
+
+
+SAVED = _emissions([
+    ("2025-01-10", "Electricity", "Grid", 100.0, "kWh", 0.6),
+    ("2025-02-10", "Electricity", "Grid", 200.0, "kWh", 0.6),
+    ("2025-08-10", "Stationary Combustion", "Diesel", 50.0, "liter", 2.7),
+])
+APPENDED = _emissions([
+    ("2025-03-10", "Stationary Combustion", "Diesel", 20.0, "liter", 2.7),
+    ("2026-01-10", "Electricity", "Grid", 300.0, "kWh", 0.5),
+])
+
+
+@pytest.mark.parametrize("mode", list(BACKENDS))
+def test_round_trip(tmp_path, mode):
+    storage = BACKENDS[mode](str(tmp_path))
+    storage.save(SAVED)
+    pd.testing.assert_frame_equal(_comparable(storage.load()), _comparable(SAVED))
+
+    everything = pd.concat([SAVED, APPENDED], ignore_index=True)
+    storage.append(APPENDED, everything)
+    pd.testing.assert_frame_equal(_comparable(storage.load()), _comparable(everything))
+
+    # A new instance, as another process would open it, reads the same rows
+    reopened = BACKENDS[mode](str(tmp_path))
+    pd.testing.assert_frame_equal(_comparable(reopened.load()), _comparable(everything))
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".tmp")]
+
+
+def test_sqlite_query_is_in_date_order(tmp_path):
+    storage = BACKENDS["sqlite"](str(tmp_path))
+    storage.save(SAVED)
+    storage.append(APPENDED, pd.concat([SAVED, APPENDED], ignore_index=True))
+    dates = storage.query()['date'].tolist()
+    assert dates == sorted(dates)
+
+
+@pytest.mark.parametrize("mode", list(BACKENDS))
+def test_filtered_data_is_in_date_order_on_every_backend(tmp_path, monkeypatch, mode):
+    from data_handler import DataHandler
+
+    monkeypatch.chdir(tmp_path)
+    handler = DataHandler(mode)
+    try:
+        handler.add_emission_entries(APPENDED)
+        handler.add_emission_entries(SAVED)
+        handler.flush()
+        data = handler.get_filtered_data()
+        assert data['date'].is_monotonic_increasing
+        assert data['quantity'].tolist() == [100.0, 200.0, 20.0, 50.0, 300.0]
+    finally:
+        handler.close()
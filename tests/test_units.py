@@ -0,0 +1,91 @@
+"""Tests for converting quantities to the unit of their emission factor."""
+
+import io
+import numpy as np
+import pytest
+from conftest import make_rows
+from units import FACTOR_PER_ENTERED_UNIT, FACTOR_PER_FACTOR_UNIT, conversion_factor, normalize_units
+
+
+def test_conversion_factor():
+    assert conversion_factor("MWh", "kWh") == 1000.0
+    assert conversion_factor("m3", "liter") == 1000.0
+    assert conversion_factor("liter", "kWh") is None
+
+
+@pytest.mark.parametrize("factors_per", [FACTOR_PER_FACTOR_UNIT, FACTOR_PER_ENTERED_UNIT])
+def test_quantity_is_converted_to_the_factor_unit(registry, factors_per):
+    data = make_rows([("2025-01-10", "Electricity", "Grid", 5.0, "MWh", np.nan)])
+    converted, problems = normalize_units(data, factors_per, registry)
+    assert converted['quantity'].tolist() == [5000.0]
+    assert converted['unit'].tolist() == ["kWh"]
+    assert problems.tolist() == [""]
+
+
+def test_factor_per_factor_unit_is_kept(registry):
+    # The form asks for kgCO2e per kWh, so a 0.70 override stays 0.70 per kWh
+    data = make_rows([("2025-01-10", "Electricity", "Grid", 5.0, "MWh", 0.7)])
+    converted, _ = normalize_units(data, FACTOR_PER_FACTOR_UNIT, registry)
+    assert converted['quantity'].tolist() == [5000.0]
+    assert converted['emission_factor'].tolist() == [0.7]
+
+
+def test_factor_per_entered_unit_is_converted_with_the_quantity(registry):
+    # 5 MWh at 681.5 kgCO2e/MWh is 5000 kWh at 0.6815 kgCO2e/kWh
+    data = make_rows([("2025-01-10", "Electricity", "Grid", 5.0, "MWh", 681.5)])
+    converted, problems = normalize_units(data, FACTOR_PER_ENTERED_UNIT, registry)
+    assert converted['quantity'].tolist() == [5000.0]
+    assert converted['emission_factor'].tolist() == pytest.approx([0.6815])
+    assert (converted['quantity'] * converted['emission_factor']).tolist() == pytest.approx([3407.5])
+    assert problems.tolist() == [""]
+
+
+def test_unknown_factor_basis_is_rejected(registry):
+    data = make_rows([("2025-01-10", "Electricity", "Grid", 5.0, "MWh", 0.7)])
+    with pytest.raises(ValueError):
+        normalize_units(data, "MWh", registry)
+
+
+def test_form_entry_in_another_unit(baseline_handler):
+    # As app.add_emission_entry sends it: factor per the factor's unit (kWh)
+    results = baseline_handler.add_emission_entries([{
+        'date': "2025-05-01", 'scope': "Scope 2", 'category': "Electricity", 'activity': "Bangladesh Grid",
+        'quantity': 5.0, 'unit': "MWh", 'emission_factor': 0.70,
+    }])
+    assert results == [(True, "Entry added")]
+    row = baseline_handler.emissions_data.iloc[-2]
+    assert (row['quantity'], row['unit'], row['emission_factor']) == (5000.0, "kWh", 0.70)
+    assert row['emissions_kgCO2e'] == pytest.approx(3500.0)
+
+
+def test_csv_entry_in_another_unit(baseline_handler):
+    csv = ("date,scope,category,activity,quantity,unit,emission_factor\n"
+           "2025-05-01,Scope 2,Electricity,Bangladesh Grid,5,MWh,700\n")
+    success, _ = baseline_handler.import_csv(io.StringIO(csv))
+    assert success
+    row = baseline_handler.emissions_data.iloc[-2]
+    assert (row['quantity'], row['unit']) == (5000.0, "kWh")
+    assert row['emission_factor'] == pytest.approx(0.70)
+    assert row['emissions_kgCO2e'] == pytest.approx(3500.0)
+
+
+def test_unconvertible_rows_are_reported(registry):
+    data = make_rows([
+        ("2025-01-10", "Electricity", "Grid", 5.0, "liter", 0.6),
+        ("2025-01-10", "Electricity", "Grid", 5.0, "barrels", 0.6),
+    ])
+    converted, problems = normalize_units(data, FACTOR_PER_FACTOR_UNIT, registry)
+    assert converted['quantity'].tolist() == [5.0, 5.0]
+    assert converted['unit'].tolist() == ["liter", "barrels"]
+    assert problems.tolist() == ["unit liter cannot be converted to kWh", "unknown unit barrels"]
+
+
+def test_blank_units_and_custom_activities(registry):
+    data = make_rows([
+        ("2025-01-10", "Stationary Combustion", "Diesel", 10.0, None, 2.7),
+        ("2025-01-10", "Other", "Own Activity", 3.0, "MWh", 9.0),
+    ])
+    converted, problems = normalize_units(data, FACTOR_PER_FACTOR_UNIT, registry)
+    assert converted['unit'].tolist() == ["liter", "MWh"]
+    assert converted['quantity'].tolist() == [10.0, 3.0]
+    assert problems.tolist() == ["", ""]
@@ -0,0 +1,212 @@
+"""
+Unit conversion for YourCarbonFootprint application.
+Converts entered quantities to the unit of their emission factor, whole columns at a time.
+"""
+
+import numpy as np
+import pandas as pd
+from config import APP_CURRENCY, EXCHANGE_RATES
+from factor_registry import FACTOR_REGISTRY
+
+# What unit a row's emission factor is per, as stated by whoever supplies the rows
+FACTOR_PER_FACTOR_UNIT = "factor_unit"  # e.g. the data entry form: kgCO2e per kWh for the grid
+FACTOR_PER_ENTERED_UNIT = "entered_unit"  # e.g. CSV files and stored rows: emissions = quantity * factor
+
+# Unit to (dimension, size in the dimension's base unit)
+UNIT_CONVERSIONS = {
+    # Energy (base: kWh)
+    "kWh": ("energy", 1.0),
+    "MWh": ("energy", 1000.0),
+    # Volume (base: liter)
+    "liter": ("volume", 1.0),
+    "cubic meter": ("volume", 1000.0),
+    # Mass (base: kg)
+    "kg": ("mass", 1.0),
+    "tonne": ("mass", 1000.0),
+    "maund": ("mass", 37.3242),  # Traditional Bengali unit: 40 seer
+    "seer": ("mass", 37.3242 / 40),  # Traditional Bengali unit
+    # Distance and transport work
+    "km": ("distance", 1.0),
+    "passenger-km": ("passenger distance", 1.0),
+    "tonne-km": ("freight", 1.0),
+    # Area
+    "square meter": ("area", 1.0),
+    # Counts
+    "piece": ("count", 1.0),
+    "dozen": ("count", 12.0),
+    "night": ("nights", 1.0),
+    # Time (base: hour)
+    "hour": ("time", 1.0),
+    "day": ("time", 24.0),
+    "month": ("time", 730.5),  # Average month: 365.25 days / 12
+    # Money (base: the app currency)
+    APP_CURRENCY: ("currency", 1.0),
+}
+# Other currencies at their configured exchange rates, e.g. "USD_TO_BDT"
+for _rate_name, _rate in EXCHANGE_RATES.items():
+    _currency, _, _target = _rate_name.partition("_TO_")
+    if _target == APP_CURRENCY:
+        UNIT_CONVERSIONS.setdefault(_currency, ("currency", float(_rate)))
+
+# Other spellings of the units above
+UNIT_ALIASES = {
+    "litre": "liter",
+    "liters": "liter",
+    "litres": "liter",
+    "m3": "cubic meter",
+    "m²": "square meter",
+    "m2": "square meter",
+    "m³": "cubic meter",
+    "kgs": "kg",
+    "tonnes": "tonne",
+    "pcs": "piece",
+    "pieces": "piece",
+    "taka": "BDT",
+}
+
+_UNITS_BY_NAME = {unit.lower(): unit for unit in UNIT_CONVERSIONS}
+_UNITS_BY_NAME.update({alias.lower(): unit for alias, unit in UNIT_ALIASES.items()})
+
+
+def resolve_unit(unit):
+    """
+    Get the dimension and size of a unit.
+
+    Names are matched case-insensitively and through UNIT_ALIASES. A
+    qualified unit such as "kg steam" is the unit it starts with.
+
+    Args:
+        unit (str): Unit name, e.g. "MWh", "Maund" or "kg cement"
+
+    Returns:
+        tuple: (dimension, size in the dimension's base unit), or (None, nan)
+            if the unit is unknown
+    """
+    if not isinstance(unit, str):
+        return None, np.nan
+    name = " ".join(unit.lower().split())
+    if name not in _UNITS_BY_NAME:
+        name = name.split(" ", 1)[0]
+    if name not in _UNITS_BY_NAME:
+        return None, np.nan
+    return UNIT_CONVERSIONS[_UNITS_BY_NAME[name]]
+
+
+def _resolve_all(units):
+    """Dimension and size arrays of a list of units."""
+    resolved = [resolve_unit(unit) for unit in units]
+    dimensions = np.array([dimension for dimension, _ in resolved], dtype=object)
+    sizes = np.array([size for _, size in resolved], dtype=np.float64)
+    return dimensions, sizes
+
+
+def conversion_factor(from_unit, to_unit):
+    """
+    Get the number to multiply a quantity by to change its unit.
+
+    Args:
+        from_unit (str): Unit the quantity is in, e.g. "MWh"
+        to_unit (str): Unit to convert to, e.g. "kWh"
+
+    Returns:
+        float: Conversion factor (1000.0 for MWh to kWh), or None if the
+            units are unknown or measure different things
+    """
+    from_dimension, from_size = resolve_unit(from_unit)
+    to_dimension, to_size = resolve_unit(to_unit)
+    if from_dimension is None or from_dimension != to_dimension:
+        return None
+    return from_size / to_size
+
+
+def compatible_units(unit):
+    """
+    Get the units a quantity could be entered in for a factor of some unit.
+
+    Args:
+        unit (str): Unit of the emission factor, e.g. "kg"
+
+    Returns:
+        list: The unit itself first, then every other unit of its dimension
+            (e.g. "tonne", "maund", "seer"); just the unit if it is unknown
+    """
+    dimension, _ = resolve_unit(unit)
+    return [unit] + [other for other, (other_dimension, _) in UNIT_CONVERSIONS.items()
+                     if other_dimension == dimension and other != unit]
+
+
+def normalize_units(df, factors_per, registry=FACTOR_REGISTRY):
+    """
+    Convert quantities to the unit of their emission factor.
+
+    Each row's registry factor is found with FactorRegistry.factor_ids,
+    and entered and factor units are resolved once per distinct unit, so
+    the conversion is a few array operations over the whole frame.
+
+    The caller states what unit the rows' emission factors are per. With
+    FACTOR_PER_FACTOR_UNIT (the data entry form asks for kgCO2e per the
+    factor's unit) only the quantity is converted. With
+    FACTOR_PER_ENTERED_UNIT (CSV files, stored rows) the factor is
+    converted too, so the row's emissions stay the same (5 MWh at 681.5
+    kgCO2e/MWh becomes 5000 kWh at 0.6815 kgCO2e/kWh).
+
+    Rows without a registry factor (custom activities) keep the quantity
+    and unit they were entered with; rows with a blank unit get the
+    factor's unit. A row whose unit is unknown or measures something else
+    than the factor's unit (e.g. liters for a kWh factor) is not converted
+    and gets a problem message instead.
+
+    Args:
+        df (pandas.DataFrame): Emissions rows with category, activity,
+            quantity and unit columns, and optionally emission_factor
+        factors_per (str): FACTOR_PER_FACTOR_UNIT or FACTOR_PER_ENTERED_UNIT
+        registry (FactorRegistry, optional): Registry to take factor units from
+
+    Returns:
+        tuple: (copy of df with quantity, unit and emission_factor converted,
+            pandas.Series of problem messages aligned with df, '' where the
+            row is fine)
+
+    Raises:
+        ValueError: If factors_per is neither of the two
+    """
+    if factors_per not in (FACTOR_PER_FACTOR_UNIT, FACTOR_PER_ENTERED_UNIT):
+        raise ValueError(f"Unknown emission factor basis: {factors_per}")
+    ids = registry.factor_ids(df['category'], df['activity'])
+    known = ids >= 0
+    safe_ids = np.maximum(ids, 0)
+
+    # Entered units, one entry per distinct unit (the last one stands for a missing unit)
+    codes, uniques = pd.factorize(df['unit'])
+    entered = [str(unit).strip() for unit in uniques] + ['']
+    entered_dimensions, entered_sizes = _resolve_all(entered)
+    factor_unit_names = pd.Index(pd.unique(registry.units))
+    entered_as_factor_unit = factor_unit_names.get_indexer(entered)
+
+    # Factor units, one entry per registry unit
+    factor_dimensions, factor_sizes = _resolve_all(factor_unit_names)
+    factor_unit_codes = factor_unit_names.get_indexer(registry.units)[safe_ids]
+
+    blank = (np.array(entered) == '')[codes]
+    same = entered_as_factor_unit[codes] == factor_unit_codes
+    comparable = known & ~blank & ~same
+    unknown = comparable & pd.isna(entered_dimensions)[codes]
+    incompatible = comparable & ~unknown & (entered_dimensions[codes] != factor_dimensions[factor_unit_codes])
+    converted = comparable & ~unknown & ~incompatible
+
+    ratio = np.where(converted, entered_sizes[codes] / factor_sizes[factor_unit_codes], 1.0)
+    quantity = pd.to_numeric(df['quantity'], errors='coerce') * ratio
+    unit = np.where(known & (blank | converted), registry.units[safe_ids], df['unit'].to_numpy(dtype=object))
+    changes = {'quantity': quantity, 'unit': unit}
+
+    # Factors per the entered unit change unit with the quantity
+    if factors_per == FACTOR_PER_ENTERED_UNIT and 'emission_factor' in df.columns and converted.any():
+        changes['emission_factor'] = pd.to_numeric(df['emission_factor'], errors='coerce') / ratio
+
+    # Messages are only built for the rows that need one
+    problems = pd.Series('', index=df.index, dtype=object)
+    for rows, template in ((unknown, "unknown unit {}"), (incompatible, "unit {} cannot be converted to {}")):
+        if rows.any():
+            problems[rows] = [template.format(entered[code], registry.units[factor_id])
+                              for code, factor_id in zip(codes[rows], ids[rows])]
+    return df.assign(**changes), problems